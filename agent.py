@@ -1,67 +1,235 @@
 from langchain.agents import Tool, AgentExecutor, create_react_agent
 from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.tools import tool
 from typing import Union
 import os
+import threading
+import time
 import json
+import pandas as pd
+from langchain_core.callbacks import BaseCallbackHandler
+from utils.event_query import EventTable, EventQueryError, MAX_LIMIT, parse_filters
+from utils.match_index import MatchIndex
+from utils.match_retrieval import RETRIEVAL_MAX_TOP_K, RETRIEVAL_TOP_K, MatchRetrievalIndex, \
+    build_retrieval_index
+from utils.instrumentation import text_size, tracer
+from utils.llm import get_llm_backend_name
+from utils.prompt_encoder import encode_lineups, encode_mapping, encode_table
 
-# Criação do agente com built-in tools para procurar informações sobre a partida nos JSONs
+# Cliente do LLM compartilhado por todos os agentes do processo, criado no primeiro uso e recriado quando o
+# backend do LLM muda (set_llm_backend, opção --backend do serve.py e do narrate.py)
+_chat_model = None
+_chat_model_backend = None
+_chat_model_lock = threading.Lock()
 
+# Respostas do modelo falso (LLM_BACKEND=fake), no formato ReAct: uma consulta e a resposta final
+FAKE_AGENT_RESPONSES = [
+    'Thought: I need the event counts of the match\nAction: Match Events\n'
+    'Action Input: {"aggregate": true}',
+    'Thought: I have enough information\nFinal Answer: Fake answer based on the match events.'
+]
+
+
+def get_chat_model():
+    '''
+    Retorna o cliente do LLM usado pelos agentes, do mesmo backend das narrações (get_llm_backend_name).
+    O cliente não guarda estado da conversa, então uma única instância atende todas as partidas e sessões.
+    Returns:
+        ChatGoogleGenerativeAI | FakeListLLM: Cliente do LLM
+    '''
+    global _chat_model, _chat_model_backend
+    backend = get_llm_backend_name()
+    with _chat_model_lock:
+        if _chat_model is not None and _chat_model_backend == backend:
+            return _chat_model
+        if backend == 'fake':
+            _chat_model = fake_chat_model()
+        else:
+            # Importado no primeiro uso: agentes com outro LLM (ex.: benchmarks) não precisam dele
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            _chat_model = ChatGoogleGenerativeAI(
+                model="gemini-1.5-flash",
+                temperature=0.1,
+                google_api_key=os.getenv('GEMINI_API_KEY')
+            )
+        _chat_model_backend = backend
+        return _chat_model
+
+
+def fake_chat_model():
+    '''
+    Modelo falso para rodar o agente sem rede (testes, benchmarks e serviço local).
+    Returns:
+        FakeListLLM: Modelo que repete FAKE_AGENT_RESPONSES em ciclo
+    '''
+    from langchain_core.language_models.fake import FakeListLLM
+
+    return FakeListLLM(responses=FAKE_AGENT_RESPONSES)
+
+
+def set_chat_model(model):
+    '''
+    Substitui o cliente do LLM dos agentes (ex.: fake_chat_model() nos testes). O cliente vale até o backend
+    do LLM mudar.
+    '''
+    global _chat_model, _chat_model_backend
+    with _chat_model_lock:
+        _chat_model = model
+        _chat_model_backend = get_llm_backend_name()
+
+
+class LLMSpanHandler(BaseCallbackHandler):
+    '''
+    Callback do LangChain que registra cada chamada do agente ao LLM como um span,
+    com tamanho do prompt e da resposta. Deve ser passado em invoke(config={'callbacks': [...]}).
+    '''
+
+    def __init__(self):
+        self._starts = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter(), ''.join(prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompt = ''.join(str(message.content) for batch in messages for message in batch)
+        self._starts[run_id] = (time.perf_counter(), prompt)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start, prompt = self._starts.pop(run_id, (time.perf_counter(), ''))
+        text = ''.join(generation.text for generations in response.generations
+                       for generation in generations)
+        tracer.record('agent_llm_call', 'llm', (time.perf_counter() - start) * 1000,
+                      **text_size('prompt', prompt), **text_size('response', text))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start, prompt = self._starts.pop(run_id, (time.perf_counter(), ''))
+        tracer.record('agent_llm_call', 'llm', (time.perf_counter() - start) * 1000,
+                      error=type(error).__name__, **text_size('prompt', prompt))
+
+
+# Criação do agente com built-in tools que consultam fatias filtradas dos dados da partida
+# O agente não guarda histórico: o estado da conversa fica na sessão de cada usuário
+
+
+def create_match_agent(match_info: Union[dict, str], match_index: MatchIndex, player_stats: pd.DataFrame,
+                       lineups: dict, llm=None, retrieval_index: MatchRetrievalIndex = None):
+    event_table = EventTable(match_index)
+    # Índice de busca da partida (load_retrieval_index); construído aqui quando não é passado
+    if retrieval_index is None:
+        retrieval_index = build_retrieval_index(match_index, player_stats, lineups)
+
+    def run_query(tool_name: str, func, input_str: str) -> str:
+        with tracer.span('agent_tool', 'transform', tool=tool_name, input=input_str) as span:
+            try:
+                result = func(parse_filters(input_str))
+            except (EventQueryError, ValueError) as e:
+                result = f"Invalid input: {getattr(e, 'message', str(e))}"
+            span.update(text_size('response', result))
+        return result
 
-def create_match_agent(match_info: Union[dict, str], events: str, player_stats: str, lineups: str):
     @tool
-    def get_match_info(input_str: str = "get_data") -> str:
+    def get_match_info(input_str: str = "") -> str:
         """Get general information about the match including teams, score, date, and venue"""
         if isinstance(match_info, dict):
-            return json.dumps(match_info, indent=2, ensure_ascii=False)
+            return encode_mapping(match_info)
         return str(match_info)
 
     @tool
-    def get_match_events(input_str: str = "get_data") -> str:
-        """Get chronological events of the match including passes, shots, and other actions"""
-        return str(events)
+    def get_match_events(input_str: str = "") -> str:
+        """Get a filtered, paginated slice of the match events"""
+        return run_query('Match Events', event_table.query, input_str)
+
+    def player_stats_query(filters: dict) -> str:
+        table = player_stats
+        if filters.get('player'):
+            table = table[table.index.str.lower().str.contains(
+                str(filters['player']).lower(), regex=False)]
+        if filters.get('team'):
+            table = table[table['team'].str.lower().str.contains(
+                str(filters['team']).lower(), regex=False)]
+        if filters.get('top_n'):
+            sort_by = filters.get('sort_by') if filters.get('sort_by') in table else 'goals'
+            table = table.sort_values(sort_by, ascending=False).head(int(filters['top_n']))
+        if table.empty:
+            return 'No players match these filters'
+        return encode_table('player_stats', table.head(MAX_LIMIT))
 
     @tool
-    def get_player_statistics(input_str: str = "get_data") -> str:
-        """Get detailed statistics for all players in the match"""
-        return str(player_stats)
+    def get_player_statistics(input_str: str = "") -> str:
+        """Get statistics for the players that match the filters"""
+        return run_query('Player Stats', player_stats_query, input_str)
+
+    def lineups_query(filters: dict) -> str:
+        team = str(filters.get('team', '')).lower()
+        selected = {name: lineup for name, lineup in lineups.items()
+                    if team in name.lower()}
+        if not selected:
+            return f"No team matching '{team}'. Available: {', '.join(lineups)}"
+        return encode_lineups(selected)
+
+    @tool
+    def get_team_lineups(input_str: str = "") -> str:
+        """Get the lineups (jersey number and player name) of one or both teams"""
+        return run_query('Team Lineups', lineups_query, input_str)
 
     @tool
-    def get_team_lineups(input_str: str = "get_data") -> str:
-        """Get the starting lineups and formations for both teams"""
-        return str(lineups)
+    def search_match(input_str: str = "") -> str:
+        """Search the match for the passages most relevant to a question"""
+        query, top_k = (input_str or '').strip().strip('`').strip(), RETRIEVAL_TOP_K
+        if query.startswith('{'):
+            try:
+                params = json.loads(query)
+                query = str(params.get('query', ''))
+                top_k = min(max(int(params.get('top_k', RETRIEVAL_TOP_K)), 1), RETRIEVAL_MAX_TOP_K)
+            except (ValueError, TypeError, AttributeError):
+                return 'Invalid input: expected the question or a JSON object with query and optional top_k'
+        with tracer.span('agent_tool', 'transform', tool='Search Match', input=input_str) as span:
+            result = retrieval_index.render(query, top_k)
+            span.update(text_size('response', result))
+        return result
 
     tools = [
         Tool.from_function(
             func=get_match_info,
             name="Match Info",
-            description="Returns general match information such as score, teams, and date"
+            description="Returns general match information such as score, teams, and date. Input: empty"
         ),
         Tool.from_function(
             func=get_match_events,
             name="Match Events",
-            description="Returns match events including goals, shots, and other occurrences"
+            description=(
+                "Returns match events matching filters. Input: JSON object with any of "
+                "player, team, type (e.g. Shot, Pass, Foul Committed, Substitution), minute_from, minute_to, "
+                "limit (max 50), offset (pagination), aggregate (true: counts by type and team), "
+                "top_n (players with most matching events)")
         ),
         Tool.from_function(
             func=get_player_statistics,
             name="Player Stats",
-            description="Returns detailed statistics for all players in the match"
+            description=(
+                "Returns player statistics. Input: JSON object with any of player, team, "
+                "top_n and sort_by (a statistic to rank by, e.g. goals, shots, passes_completed)")
         ),
         Tool.from_function(
             func=get_team_lineups,
             name="Team Lineups",
-            description="Returns the starting lineups and formations for both teams"
+            description="Returns the lineups. Input: JSON object with optional team"
+        ),
+        Tool.from_function(
+            func=search_match,
+            name="Search Match",
+            description=(
+                "Returns the match passages (goals with assists and score, penalty shootout, timeline windows, "
+                "player stats, lineups) most relevant to a question. Input: the question, or JSON object with query and "
+                f"top_k (max {RETRIEVAL_MAX_TOP_K})")
         ),
     ]
 
     tool_names = [tool.name for tool in tools]
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash",
-        temperature=0.1,
-        google_api_key=os.getenv('GEMINI_API_KEY')
-    )
+    # O modelo pode ser substituído (ex.: por um LLM falso nos benchmarks)
+    llm = llm or get_chat_model()
 
     prompt = PromptTemplate(
         template="""You are a football analyst analyzing the following match:
@@ -69,10 +237,13 @@ def create_match_agent(match_info: Union[dict, str], events: str, player_stats:
 
     Instructions:
     1. Use the available tools to analyze the match data
-    2. Always use "get_data" as Action Input
-    3. The returned data will be in JSON format
-    4. Analyze the JSON data carefully before responding
-    5. Always respond in clear and objective English
+    2. Ask for narrow slices: pass a JSON object with filters as Action Input, e.g. {{"type": "Shot", "team": "Barcelona"}},
+       {{"player": "Messi", "aggregate": true}}, {{"type": "Pass", "top_n": 5}} or {{"minute_from": 80, "minute_to": 95}}
+    3. Prefer aggregate or top_n modes for counting questions; use limit/offset only when you need individual events
+    4. Use Search Match for specific moments (who scored or assisted a goal, cards, substitutions, what happened around a minute)
+    5. Match info is returned as "key: value" lines; events, player stats and lineups are returned as compact comma-separated tables
+    6. Analyze the data carefully before responding
+    7. Always respond in clear and objective English
 
     Available tools:
     {tools}
@@ -82,7 +253,7 @@ def create_match_agent(match_info: Union[dict, str], events: str, player_stats:
     Question: {input}
     Thought: [your reasoning in English]
     Action: [one of the options: {tool_names}]
-    Action Input: get_data
+    Action Input: [JSON object with filters, or empty]
     Observation: [result]
     Thought: [analysis of the result in English]
     Final Answer: [final answer in English]
@@ -101,7 +272,7 @@ def create_match_agent(match_info: Union[dict, str], events: str, player_stats:
         agent=agent,
         tools=tools,
         verbose=True,
-        max_iterations=3,
+        max_iterations=6,
         handle_parsing_errors=True,
         return_intermediate_steps=True
     )
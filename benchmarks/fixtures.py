@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import random
+import uuid
+
+# Partidas gravadas para os benchmarks, no mesmo formato do repositório open-data do StatsBomb
+# (<root>/data/competitions.json, matches/, events/, lineups/), lidas pela fonte de dados 'local'.
+#
+# Partidas reais gravadas ficam em fixtures/recorded (versionadas) e são usadas quando existem:
+#   python -m benchmarks.fixtures record --competition-id 11 --season-id 90 --match-ids 3773386 3773403
+# Sem gravações, são usadas partidas sintéticas determinísticas com volume de eventos realista,
+# geradas em fixtures/synthetic (fora do controle de versão):
+#   python -m benchmarks.fixtures synthetic
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RECORDED_DIR = os.path.join(FIXTURES_DIR, 'recorded')
+SYNTHETIC_DIR = os.path.join(FIXTURES_DIR, 'synthetic')
+
+SYNTHETIC_COMPETITION_ID = 11
+SYNTHETIC_SEASON_ID = 90
+SYNTHETIC_MATCH_IDS = (1001, 1002, 1003)
+SYNTHETIC_EVENTS_PER_MATCH = 3500
+
+
+def _write_json(root: str, relative_path: str, payload):
+    path = os.path.join(root, 'data', relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+
+
+def has_fixtures(root: str) -> bool:
+    return os.path.exists(os.path.join(root, 'data', 'competitions.json'))
+
+
+def fixture_match_ids(root: str) -> list:
+    '''
+    Retorna os IDs das partidas gravadas nas fixtures.
+    Args:
+        root (str): Diretório das fixtures
+    Returns:
+        list: IDs das partidas com eventos gravados
+    '''
+    events_dir = os.path.join(root, 'data', 'events')
+    if not os.path.isdir(events_dir):
+        return []
+    return sorted(int(name.split('.')[0]) for name in os.listdir(events_dir) if name.endswith('.json'))
+
+
+def record_fixtures(competition_id: int, season_id: int, match_ids: list, root: str = RECORDED_DIR):
+    '''
+    Grava partidas reais do open-data do StatsBomb como fixtures, sem nenhuma conversão.
+    Args:
+        competition_id (int): ID da competição
+        season_id (int): ID da temporada
+        match_ids (list): IDs das partidas a gravar
+        root (str): Diretório das fixtures
+    '''
+    from utils.cache_manager import OPEN_DATA_URL, cache_manager
+
+    session = cache_manager.get_session()
+
+    def fetch(relative_path: str):
+        response = session.get(f'{OPEN_DATA_URL}/data/{relative_path}')
+        response.raise_for_status()
+        return response.json()
+
+    competitions = [entry for entry in fetch('competitions.json')
+                    if entry['competition_id'] == competition_id and entry['season_id'] == season_id]
+    matches = [match for match in fetch(f'matches/{competition_id}/{season_id}.json')
+               if match['match_id'] in match_ids]
+    _write_json(root, 'competitions.json', competitions)
+    _write_json(root, f'matches/{competition_id}/{season_id}.json', matches)
+    for match_id in match_ids:
+        _write_json(root, f'events/{match_id}.json', fetch(f'events/{match_id}.json'))
+        _write_json(root, f'lineups/{match_id}.json', fetch(f'lineups/{match_id}.json'))
+
+
+def synthetic_fixtures(root: str = SYNTHETIC_DIR, match_ids=SYNTHETIC_MATCH_IDS,
+                       events_per_match: int = SYNTHETIC_EVENTS_PER_MATCH, seed: int = 1):
+    '''
+    Gera partidas sintéticas determinísticas no formato do open-data, para rodar os benchmarks
+    sem acesso à rede. Os tipos de evento seguem proporções próximas às de uma partida real.
+    Args:
+        root (str): Diretório das fixtures
+        match_ids (list): IDs das partidas geradas
+        events_per_match (int): Número de eventos por partida
+        seed (int): Semente do gerador aleatório
+    '''
+    rng = random.Random(seed)
+    teams = [(1, 'Barcelona'), (2, 'Real Madrid')]
+    event_types = (['Pass'] * 6 + ['Ball Receipt*'] * 4 + ['Carry'] * 3 +
+                   ['Shot', 'Foul Committed', 'Foul Won', 'Interception', 'Dribble', 'Ball Recovery',
+                    'Block', 'Miscontrol', 'Pressure', 'Duel', 'Clearance'])
+
+    def uid():
+        return str(uuid.UUID(int=rng.getrandbits(128)))
+
+    def location():
+        return [round(rng.uniform(0, 120), 1), round(rng.uniform(0, 80), 1)]
+
+    _write_json(root, 'competitions.json', [{
+        'competition_id': SYNTHETIC_COMPETITION_ID, 'season_id': SYNTHETIC_SEASON_ID,
+        'country_name': 'Spain', 'competition_name': 'La Liga', 'competition_gender': 'male',
+        'season_name': '2020/2021', 'match_updated': '2021-06-01T00:00:00',
+        'match_available': '2021-06-01T00:00:00'}])
+
+    matches = []
+    for number, match_id in enumerate(match_ids, start=1):
+        home, away = teams if number % 2 else teams[::-1]
+        matches.append({
+            'match_id': match_id, 'match_date': f'2021-01-{number:02d}', 'kick_off': '20:00:00.000',
+            'competition': {'competition_id': SYNTHETIC_COMPETITION_ID, 'country_name': 'Spain',
+                            'competition_name': 'La Liga'},
+            'season': {'season_id': SYNTHETIC_SEASON_ID, 'season_name': '2020/2021'},
+            'home_team': {'home_team_id': home[0], 'home_team_name': home[1], 'home_team_gender': 'male',
+                          'managers': [{'id': home[0], 'name': f'{home[1]} Manager'}],
+                          'country': {'id': 214, 'name': 'Spain'}},
+            'away_team': {'away_team_id': away[0], 'away_team_name': away[1], 'away_team_gender': 'male',
+                          'managers': [{'id': away[0], 'name': f'{away[1]} Manager'}],
+                          'country': {'id': 214, 'name': 'Spain'}},
+            'home_score': rng.randint(0, 4), 'away_score': rng.randint(0, 4), 'match_status': 'available',
+            'last_updated': '2021-06-01T00:00:00', 'metadata': {'data_version': '1.1.0'}, 'match_week': number,
+            'competition_stage': {'id': 1, 'name': 'Regular Season'},
+            'stadium': {'id': home[0], 'name': f'{home[1]} Stadium', 'country': {'id': 214, 'name': 'Spain'}},
+            'referee': {'id': 1, 'name': 'Referee'}})
+
+        players = {team_id: [(team_id * 100 + i, f'{name} Player {i}') for i in range(14)]
+                   for team_id, name in teams}
+        _write_json(root, f'lineups/{match_id}.json', [
+            {'team_id': team_id, 'team_name': name, 'lineup': [
+                {'player_id': player_id, 'player_name': player_name, 'player_nickname': None,
+                 'jersey_number': i + 1, 'country': {'id': 214, 'name': 'Spain'}, 'cards': [], 'positions': []}
+                for i, (player_id, player_name) in enumerate(players[team_id])]}
+            for team_id, name in (home, away)])
+
+        events = []
+        for team_id, name in (home, away):
+            events.append({
+                'id': uid(), 'index': len(events) + 1, 'period': 1, 'timestamp': '00:00:00.000',
+                'minute': 0, 'second': 0, 'type': {'id': 35, 'name': 'Starting XI'}, 'possession': 1,
+                'possession_team': {'id': home[0], 'name': home[1]},
+                'play_pattern': {'id': 1, 'name': 'Regular Play'}, 'team': {'id': team_id, 'name': name},
+                'duration': 0.0, 'tactics': {'formation': 433, 'lineup': [
+                    {'player': {'id': player_id, 'name': player_name},
+                     'position': {'id': 1, 'name': 'Center Forward'}, 'jersey_number': i + 1}
+                    for i, (player_id, player_name) in enumerate(players[team_id][:11])]}})
+
+        for k in range(events_per_match):
+            minute = k * 95 // events_per_match
+            team_id, name = rng.choice(teams)
+            player_id, player_name = rng.choice(players[team_id][:11] if minute < 60 else players[team_id])
+            event_type = rng.choice(event_types)
+            event = {
+                'id': uid(), 'index': len(events) + 1, 'period': 1 if minute < 45 else 2,
+                'timestamp': f'00:{minute % 45:02d}:{k % 60:02d}.000', 'minute': minute, 'second': k % 60,
+                'type': {'id': 1, 'name': event_type}, 'possession': k // 10,
+                'possession_team': {'id': team_id, 'name': name},
+                'play_pattern': {'id': 1, 'name': 'Regular Play'}, 'team': {'id': team_id, 'name': name},
+                'player': {'id': player_id, 'name': player_name},
+                'position': {'id': 1, 'name': 'Center Forward'}, 'location': location(),
+                'duration': 1.0, 'related_events': [uid()]}
+            if event_type == 'Pass':
+                recipient = rng.choice(players[team_id])
+                event['pass'] = {'recipient': {'id': recipient[0], 'name': recipient[1]}, 'length': 10.0,
+                                 'angle': 0.1, 'height': {'id': 1, 'name': 'Ground Pass'},
+                                 'end_location': location()}
+                if rng.random() < 0.2:
+                    event['pass']['outcome'] = {'id': 9, 'name': 'Incomplete'}
+            elif event_type == 'Shot':
+                event['shot'] = {
+                    'statsbomb_xg': rng.random() / 3, 'end_location': [120, 40, 1.0],
+                    'outcome': {'id': 1, 'name': rng.choice(['Goal', 'Saved', 'Off T', 'Blocked'])},
+                    'type': {'id': 87, 'name': rng.choice(['Open Play'] * 9 + ['Penalty'])},
+                    'freeze_frame': [{'location': location(), 'player': {'id': 1, 'name': 'Goalkeeper'},
+                                      'position': {'id': 1, 'name': 'Goalkeeper'}, 'teammate': False}]}
+            elif event_type == 'Foul Committed' and rng.random() < 0.3:
+                event['foul_committed'] = {'card': {'id': 7, 'name': 'Yellow Card'}}
+            elif event_type == 'Dribble':
+                event['dribble'] = {'outcome': {'id': 8, 'name': rng.choice(['Complete', 'Incomplete'])}}
+            elif event_type == 'Carry':
+                event['carry'] = {'end_location': location()}
+            events.append(event)
+        _write_json(root, f'events/{match_id}.json', events)
+
+    _write_json(root, f'matches/{SYNTHETIC_COMPETITION_ID}/{SYNTHETIC_SEASON_ID}.json', matches)
+
+
+def ensure_fixtures() -> str:
+    '''
+    Retorna o diretório das fixtures a usar: as partidas gravadas, se existirem, ou as sintéticas,
+    geradas na primeira execução.
+    Returns:
+        str: Diretório no formato do open-data
+    '''
+    if has_fixtures(RECORDED_DIR):
+        return RECORDED_DIR
+    if not has_fixtures(SYNTHETIC_DIR):
+        synthetic_fixtures(SYNTHETIC_DIR)
+    return SYNTHETIC_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fixtures dos benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record = subparsers.add_parser('record', help='Grava partidas reais do open-data')
+    record.add_argument('--competition-id', type=int, required=True)
+    record.add_argument('--season-id', type=int, required=True)
+    record.add_argument('--match-ids', type=int, nargs='+', required=True)
+    subparsers.add_parser('synthetic', help='Gera partidas sintéticas determinísticas')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        root = RECORDED_DIR
+        record_fixtures(args.competition_id, args.season_id, args.match_ids, root)
+    else:
+        root = SYNTHETIC_DIR
+        synthetic_fixtures(root)
+    print(f'Fixtures em {root}: partidas {fixture_match_ids(root)}')
+
+
+if __name__ == '__main__':
+    main()
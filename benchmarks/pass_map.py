@@ -0,0 +1,100 @@
+import argparse
+import time
+import tracemalloc
+
+import matplotlib.pyplot as plt
+import pandas as pd
+from mplsoccer import Pitch
+
+from utils.dataprep import load_match_events, load_match_index
+from utils.frame_cache import frame_cache
+from utils.pass_map import _to_png, draw_pass_map, draw_pass_network, pass_arrays, render_pass_map
+
+# Benchmark da renderização do mapa de passes:
+#   python -m benchmarks.pass_map --match-id 3788741
+# Compara o desenho antigo (uma chamada de setas por passe, via iterrows) com o vetorizado
+# e mede o acerto no cache de PNGs. Reporta tempo e pico de memória de cada etapa.
+
+
+def draw_pass_map_per_arrow(events: pd.DataFrame, team: str, player: str):
+    '''Implementação anterior da aba de mapa de passes, mantida apenas para comparação'''
+    pitch = Pitch(pitch_color='grass', line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+    pass_events = events[(events['team'] == team) & (events['player'] == player)
+                         & (events['type'] == 'Pass')]
+    for _, event in pass_events.iterrows():
+        completed = pd.isna(event['pass_outcome'])
+        pitch.arrows(event['x'], event['y'], event['end_x'], event['end_y'],
+                     color='blue' if completed else 'red', alpha=0.7 if completed else 0.5,
+                     ax=ax, width=2, label='Passes Concluídos' if completed else 'Passes Incompletos')
+    handles, labels = ax.get_legend_handles_labels()
+    by_label = dict(zip(labels, handles))
+    ax.legend(by_label.values(), by_label.keys(), loc='upper left', fontsize='small')
+    return fig
+
+
+def measure(func, repeat: int = 3) -> dict:
+    '''
+    Executa a função algumas vezes e retorna o melhor tempo e o pico de memória alocada.
+    Args:
+        func (callable): Função sem argumentos
+        repeat (int): Número de execuções
+    Returns:
+        dict: Tempo em ms e pico de memória em MB
+    '''
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {'ms': round(min(timings) * 1000, 2), 'peak_mb': round(peak / (1024 * 1024), 2)}
+
+
+def run(match_id: int, repeat: int = 3) -> dict:
+    '''
+    Executa o benchmark para o jogador com mais passes da partida.
+    Args:
+        match_id (int): ID da partida
+        repeat (int): Execuções por etapa
+    Returns:
+        dict: Resultados por etapa
+    '''
+    events = load_match_events(match_id)
+    match_index = load_match_index(match_id)
+    passes = events[events['type'] == 'Pass']
+    team, player = passes.groupby(['team', 'player'], observed=True).size().idxmax()
+
+    frame_cache.invalidate(('pass_map', int(match_id), team, player))
+    render_pass_map(match_id, team, player)
+
+    return {
+        'match_id': match_id,
+        'player': player,
+        'passes': int(((passes['team'] == team) & (passes['player'] == player)).sum()),
+        'per_arrow_png': measure(lambda: _to_png(draw_pass_map_per_arrow(events, team, player)), repeat),
+        'vectorized_png': measure(lambda: _to_png(draw_pass_map(pass_arrays(match_index, team, player))), repeat),
+        'pass_network_png': measure(lambda: _to_png(draw_pass_network(pass_arrays(match_index, team))), repeat),
+        'cached_png': measure(lambda: render_pass_map(match_id, team, player), repeat)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark da renderização do mapa de passes')
+    parser.add_argument('--match-id', type=int, required=True)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.match_id, args.repeat)
+    print(f"Partida {results['match_id']} | {results['player']} ({results['passes']} passes)")
+    for stage in ('per_arrow_png', 'vectorized_png', 'pass_network_png', 'cached_png'):
+        print(f"  {stage:<18} {results[stage]['ms']:>10} ms  pico {results[stage]['peak_mb']} MB")
+    plt.close('all')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.fixtures import ensure_fixtures, fixture_match_ids
+
+# Suíte de benchmarks dos caminhos mais usados do app, rodando offline sobre partidas gravadas:
+#   python -m benchmarks.run                      # mede e compara com benchmarks/baseline.json
+#   python -m benchmarks.run --save-baseline      # grava a linha de base
+#   python -m benchmarks.run --max-slowdown 0.3   # falha se algum caso ficar 30% mais lento
+# Os caches (armazenamento de eventos, cache HTTP e cache do LLM) ficam em um diretório temporário
+# para que cada execução parta do mesmo estado, e o LLM é substituído por um modelo falso.
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_REPEAT = 5
+DEFAULT_MAX_SLOWDOWN = 0.25
+# Diferenças abaixo deste valor (ms) são tratadas como ruído na comparação
+NOISE_FLOOR_MS = 1.0
+# Partidas simuladas na agregação da temporada (uma temporada de 20 times em pontos corridos)
+SEASON_MATCHES = 380
+
+FIXTURES_ROOT = ensure_fixtures()
+WORK_DIR = tempfile.mkdtemp(prefix='benchmarks_')
+os.environ.update({
+    'STATSBOMB_DATA_SOURCE': 'local',
+    'STATSBOMB_OPEN_DATA_DIR': FIXTURES_ROOT,
+    'STATSBOMB_CACHE_BACKEND': 'memory',
+    'EVENT_STORE_DIR': os.path.join(WORK_DIR, 'event_store'),
+    'LLM_CACHE_PATH': os.path.join(WORK_DIR, 'llm_cache.sqlite'),
+    'LLM_BACKEND': 'fake',
+})
+
+from langchain_core.language_models.fake import FakeListLLM  # noqa: E402
+
+from agent import create_match_agent  # noqa: E402
+from utils.dataprep import (GetMatchStats, get_player_stats_table, load_match_events,  # noqa: E402
+                            load_match_index, load_match_lineups)
+from utils.event_frame import EVENT_COLUMNS, compact_events  # noqa: E402
+from utils.event_store import event_store  # noqa: E402
+from utils.frame_cache import frame_cache  # noqa: E402
+from utils.key_moments import encode_key_moments, extract_key_moments  # noqa: E402
+from utils.match_index import MatchIndex, chronological  # noqa: E402
+from utils.match_retrieval import build_retrieval_index  # noqa: E402
+from utils.pass_map import _to_png, draw_pass_map, draw_pass_network, pass_arrays  # noqa: E402
+from utils.player_stats import compute_player_stats, player_profile_stats  # noqa: E402
+from utils.prompt_encoder import encode_events  # noqa: E402
+from utils.season_stats import SEASON_ROW_COLUMNS, aggregate_season, season_profile_stats  # noqa: E402
+
+# Respostas do LLM falso: duas chamadas de ferramenta e a resposta final, no formato ReAct
+FAKE_AGENT_RESPONSES = [
+    'Thought: I need the shots of the match\nAction: Match Events\n'
+    'Action Input: {"type": "Shot", "aggregate": true}',
+    'Thought: Now the best passers\nAction: Player Stats\n'
+    'Action Input: {"top_n": 3, "sort_by": "passes_completed"}',
+    'Thought: I have enough information\nFinal Answer: Benchmark answer.'
+]
+
+
+def _yaml_conversion():
+    '''tabs.yaml_conversion depende do Streamlit; o caso é pulado quando ele não está instalado'''
+    try:
+        from tabs import yaml_conversion
+    except ImportError as e:
+        return None, str(e)
+    return yaml_conversion, None
+
+
+def build_cases(match_id: int) -> dict:
+    '''
+    Monta os casos de benchmark para uma partida.
+    Args:
+        match_id (int): ID da partida das fixtures
+    Returns:
+        dict: Nome do caso -> função sem argumentos (ou texto com o motivo de o caso ser pulado)
+    '''
+    events = load_match_events(match_id)
+    match_index = load_match_index(match_id)
+    player_stats = get_player_stats_table(match_id)
+    lineups = load_match_lineups(match_id)
+    match_stats = GetMatchStats(match_id)
+    team, player = events[events['type'] == 'Pass'].groupby(['team', 'player'], observed=True).size().idxmax()
+    events_payload = json.loads(match_stats.get_events())
+    stored_events = chronological(event_store.get_events(match_id, columns=EVENT_COLUMNS))
+
+    # Linhas por partida de uma temporada inteira, repetindo a tabela da partida das fixtures
+    season_rows = pd.concat([player_stats.reset_index().assign(match_id=i) for i in range(SEASON_MATCHES)],
+                            ignore_index=True)[SEASON_ROW_COLUMNS]
+
+    retrieval_index = build_retrieval_index(match_index, player_stats, lineups)
+    agent = create_match_agent({'match_id': match_id}, match_index, player_stats, lineups,
+                               llm=FakeListLLM(responses=FAKE_AGENT_RESPONSES), retrieval_index=retrieval_index)
+    agent.verbose = False
+    tools = {tool.name: tool for tool in agent.tools}
+
+    def load_events_from_store():
+        frame_cache.invalidate(('events', match_id))
+        load_match_events(match_id)
+
+    def agent_tool_calls():
+        tools['Match Events'].run('{"type": "Shot", "team": "%s", "limit": 20}' % team)
+        tools['Match Events'].run('{"player": "%s", "aggregate": true}' % player)
+        tools['Match Events'].run('{"type": "Pass", "top_n": 5}')
+        tools['Match Events'].run('{"minute_from": 75, "minute_to": 89}')
+        tools['Player Stats'].run('{"team": "%s", "top_n": 5, "sort_by": "shots"}' % team)
+        tools['Team Lineups'].run('{"team": "%s"}' % team)
+
+    def retrieval_search():
+        tools['Search Match'].run('Who assisted the second goal?')
+        tools['Search Match'].run(f'{player} shots and passes')
+        tools['Search Match'].run(f'{team} yellow card in the second half')
+        tools['Search Match'].run('{"query": "substitution after minute 60", "top_k": 8}')
+
+    yaml_conversion, yaml_skip_reason = _yaml_conversion()
+
+    return {
+        'load_events_from_store': load_events_from_store,
+        'get_events_json': match_stats.get_events,
+        'get_player_stats_json': match_stats.get_player_stats,
+        'compute_player_stats': lambda: compute_player_stats(events),
+        'get_all_players': lambda: GetMatchStats.get_all_players(events),
+        'compact_events': lambda: compact_events(stored_events),
+        'build_match_index': lambda: MatchIndex(events),
+        'yaml_conversion_events': (lambda: yaml_conversion(events_payload)) if yaml_conversion
+        else f'skipped: {yaml_skip_reason}',
+        'encode_events': lambda: encode_events(events),
+        'key_moments': lambda: encode_key_moments(extract_key_moments(events, player_stats)),
+        'player_profile_metrics': lambda: player_profile_stats(player_stats, player),
+        'season_aggregate': lambda: season_profile_stats(aggregate_season(season_rows), player),
+        'pass_map_figure': lambda: _to_png(draw_pass_map(pass_arrays(match_index, team, player))),
+        'pass_network_figure': lambda: _to_png(draw_pass_network(pass_arrays(match_index, team))),
+        'build_retrieval_index': lambda: build_retrieval_index(match_index, player_stats, lineups),
+        'retrieval_search': retrieval_search,
+        'agent_tool_calls': agent_tool_calls,
+        'agent_invoke_fake_llm': lambda: agent.invoke({'input': 'Who shot the most?', 'context': 'benchmark'}),
+    }
+
+
+def measure(func, repeat: int = DEFAULT_REPEAT) -> dict:
+    '''
+    Mede uma função: uma execução de aquecimento, `repeat` execuções cronometradas e uma
+    execução com tracemalloc para o pico de memória.
+    Args:
+        func (callable): Função sem argumentos
+        repeat (int): Número de execuções cronometradas
+    Returns:
+        dict: Mediana e mínimo em ms e pico de memória alocada em MB
+    '''
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'peak_mb': round(peak / (1024 * 1024), 3)
+    }
+
+
+def run(match_id: int = None, repeat: int = DEFAULT_REPEAT, only: list = None) -> dict:
+    '''
+    Executa a suíte de benchmarks.
+    Args:
+        match_id (int): ID da partida (padrão: primeira partida das fixtures)
+        repeat (int): Execuções cronometradas por caso
+        only (list): Executa apenas os casos com estes nomes
+    Returns:
+        dict: Metadados da execução e resultados por caso
+    '''
+    match_id = match_id or fixture_match_ids(FIXTURES_ROOT)[0]
+    cases = build_cases(match_id)
+    results = {}
+    for name, func in cases.items():
+        if only and name not in only:
+            continue
+        results[name] = {'skipped': func} if isinstance(func, str) else measure(func, repeat)
+    return {
+        'meta': {
+            'match_id': match_id,
+            'events': len(load_match_events(match_id)),
+            'fixtures': os.path.relpath(FIXTURES_ROOT),
+            'repeat': repeat,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'cases': results
+    }
+
+
+def compare(results: dict, baseline: dict, max_slowdown: float = DEFAULT_MAX_SLOWDOWN,
+            max_memory_growth: float = None) -> list:
+    '''
+    Compara uma execução com a linha de base.
+    Args:
+        results (dict): Resultado de run
+        baseline (dict): Linha de base gravada
+        max_slowdown (float): Aumento máximo tolerado da mediana (0.25 = 25%)
+        max_memory_growth (float): Aumento máximo tolerado do pico de memória (None = não verifica)
+    Returns:
+        list: Descrição das regressões encontradas
+    '''
+    regressions = []
+    for name, current in results['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous or 'skipped' in current or 'skipped' in previous:
+            continue
+        current['baseline_median_ms'] = previous['median_ms']
+        current['change'] = round(current['median_ms'] / previous['median_ms'] - 1, 3) \
+            if previous['median_ms'] else 0.0
+        if current['change'] > max_slowdown and \
+                current['median_ms'] - previous['median_ms'] > NOISE_FLOOR_MS:
+            regressions.append(
+                f"{name}: {previous['median_ms']} ms -> {current['median_ms']} ms "
+                f"(+{current['change']:.0%}, limite +{max_slowdown:.0%})")
+        if max_memory_growth is not None and previous['peak_mb'] and \
+                current['peak_mb'] / previous['peak_mb'] - 1 > max_memory_growth:
+            regressions.append(
+                f"{name}: pico de memória {previous['peak_mb']} MB -> {current['peak_mb']} MB "
+                f"(limite +{max_memory_growth:.0%})")
+    return regressions
+
+
+def print_report(results: dict):
+    meta = results['meta']
+    print(f"Partida {meta['match_id']} ({meta['events']} eventos, fixtures em {meta['fixtures']}), "
+          f"{meta['repeat']} execuções por caso")
+    print(f"{'caso':<26}{'mediana ms':>12}{'mínimo ms':>12}{'pico MB':>10}{'base ms':>12}{'variação':>10}")
+    for name, case in results['cases'].items():
+        if 'skipped' in case:
+            print(f"{name:<26}{case['skipped']}")
+            continue
+        change = f"{case['change']:+.0%}" if 'change' in case else ''
+        print(f"{name:<26}{case['median_ms']:>12}{case['min_ms']:>12}{case['peak_mb']:>10}"
+              f"{case.get('baseline_median_ms', ''):>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks dos caminhos críticos do app')
+    parser.add_argument('--match-id', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--only', nargs='+', default=None, help='Nomes dos casos a executar')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Grava o resultado como nova linha de base')
+    parser.add_argument('--max-slowdown', type=float, default=DEFAULT_MAX_SLOWDOWN,
+                        help='Aumento máximo tolerado da mediana em relação à linha de base (0.25 = 25%%)')
+    parser.add_argument('--max-memory-growth', type=float, default=None,
+                        help='Aumento máximo tolerado do pico de memória (desligado por padrão)')
+    parser.add_argument('--output', default=None, help='Grava o resultado em JSON')
+    args = parser.parse_args()
+
+    results = run(args.match_id, args.repeat, args.only)
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.max_slowdown, args.max_memory_growth)
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f'Linha de base gravada em {args.baseline}')
+
+    if regressions:
+        print('\nRegressões:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# Perfil de inicialização do app: tempo de importação dos módulos carregados por main.py antes
+# da primeira renderização, medido em um processo novo com python -X importtime:
+#   python -m benchmarks.startup                    # importações de main.py, por pacote e por módulo
+#   python -m benchmarks.startup --max-seconds 2    # falha se a importação passar de 2 s
+#   python -m benchmarks.startup --log imports.log  # analisa um log já gravado, ex.:
+#       PYTHONPROFILEIMPORTTIME=1 streamlit run main.py 2> imports.log
+# Módulos carregados apenas no primeiro uso de uma aba (agente, mapa de passes) podem ser medidos
+# com --modules agent utils.pass_map.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Módulos importados por main.py
+MAIN_MODULES = ['streamlit', 'tabs', 'utils.cache_manager', 'utils.match_catalog', 'utils.narration']
+DEFAULT_TOP = 15
+
+
+def parse_importtime(lines) -> list:
+    '''
+    Lê a saída de python -X importtime.
+    Args:
+        lines (iterable): Linhas do log ("import time: self [us] | cumulative | imported package")
+    Returns:
+        list: Um dicionário por módulo com nome, nível de aninhamento e tempos próprio e acumulado em ms
+    '''
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000
+        })
+    return modules
+
+
+def summarize(modules: list, top: int = DEFAULT_TOP) -> dict:
+    '''
+    Resume o tempo de importação por pacote de primeiro nível e pelos módulos mais lentos.
+    Args:
+        modules (list): Resultado de parse_importtime
+        top (int): Número de pacotes e módulos listados
+    Returns:
+        dict: Tempo total, tempo próprio por pacote e módulos com maior tempo acumulado
+    '''
+    by_package = defaultdict(float)
+    for module in modules:
+        by_package[module['module'].split('.')[0]] += module['self_ms']
+    total_ms = sum(module['cumulative_ms'] for module in modules if module['depth'] == 0)
+    return {
+        'total_ms': round(total_ms, 1),
+        'modules': len(modules),
+        'packages': [{'package': name, 'self_ms': round(ms, 1)} for name, ms in
+                     sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]],
+        'slowest': [{'module': m['module'], 'cumulative_ms': round(m['cumulative_ms'], 1)} for m in
+                    sorted(modules, key=lambda m: m['cumulative_ms'], reverse=True)[:top]]
+    }
+
+
+def profile_imports(modules: list = MAIN_MODULES) -> tuple:
+    '''
+    Importa os módulos em um processo Python novo com -X importtime.
+    Args:
+        modules (list): Módulos importados, na ordem
+    Returns:
+        tuple: Módulos medidos (parse_importtime), tempo total do processo em ms e erro de importação (ou None)
+    '''
+    code = '\n'.join(f'import {module}' for module in modules)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.getenv('PYTHONPATH')])))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT_DIR,
+                            env=env, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    error = None
+    if result.returncode != 0:
+        error = [line for line in result.stderr.splitlines() if not line.startswith('import time:')][-1]
+    return parse_importtime(result.stderr.splitlines()), wall_ms, error
+
+
+def print_report(summary: dict):
+    print(f"Importação: {summary['total_ms']} ms em {summary['modules']} módulos")
+    print(f"\n{'pacote':<32}{'próprio ms':>12}")
+    for package in summary['packages']:
+        print(f"{package['package']:<32}{package['self_ms']:>12}")
+    print(f"\n{'módulo':<48}{'acumulado ms':>14}")
+    for module in summary['slowest']:
+        print(f"{module['module']:<48}{module['cumulative_ms']:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perfil do tempo de importação do app')
+    parser.add_argument('--modules', nargs='+', default=MAIN_MODULES,
+                        help='Módulos importados (padrão: os de main.py)')
+    parser.add_argument('--log', default=None, help='Analisa um log de -X importtime já gravado')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP)
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='Termina com erro se a importação demorar mais que este valor')
+    parser.add_argument('--output', default=None, help='Grava o resumo em JSON')
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, 'r', encoding='utf-8', errors='replace') as f:
+            modules = parse_importtime(f)
+        summary = summarize(modules, args.top)
+    else:
+        modules, wall_ms, error = profile_imports(args.modules)
+        summary = summarize(modules, args.top)
+        summary.update({'imported': args.modules, 'process_ms': round(wall_ms, 1), 'error': error})
+        if error:
+            print(f'Aviso: a importação falhou ({error}); o perfil vai até o erro.\n')
+
+    print_report(summary)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=4)
+    if args.max_seconds is not None and summary['total_ms'] > args.max_seconds * 1000:
+        print(f"\nImportação acima do limite: {summary['total_ms']} ms > {args.max_seconds * 1000:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
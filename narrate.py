@@ -0,0 +1,201 @@
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+from utils.analytics_service import AnalyticsClient, ServiceError
+from utils.cache_manager import cache_manager
+from utils.data_source import data_source
+from utils.llm import (FakeStreamingBackend, RateLimiter, cached_response, generate_response,
+                       set_llm_backend)
+from utils.llm_cache import llm_cache
+from utils.match_context import assemble_match_context
+from utils.narration import (BROADCAST_STYLES, build_match_info, build_narration_prompt,
+                             narration_scope)
+
+# Geração em lote das narrações de uma temporada inteira, sem a interface do Streamlit:
+#   python narrate.py --competition-id 11 --season-id 90 --concurrency 4 --rpm 15
+# As narrações são gravadas no cache de respostas do LLM (llm_cache), o mesmo lido pela aba de
+# visão geral, então a interface passa a exibi-las sem chamar o modelo. Narrações já em cache são
+# puladas. Com --backend fake nenhuma chamada de rede é feita ao LLM (útil para medir throughput).
+# Com --service-url as narrações são pedidas a um serviço de análise (serve.py), que grava no cache
+# dele e coalesce pedidos iguais de outros clientes; --rpm e --retries valem também para esses pedidos.
+
+
+def _call_with_retries(func, limiter: RateLimiter, retries: int, backoff: float):
+    '''
+    Executa uma chamada ao LLM (ou ao serviço) respeitando o limitador, com novas tentativas e espera
+    exponencial. Erros do serviço de análise com status 4xx (ex.: partida inexistente) não são repetidos.
+    Args:
+        func (callable): Chamada sem argumentos
+        limiter (RateLimiter): Limitador de requisições por minuto compartilhado
+        retries (int): Número máximo de tentativas
+        backoff (float): Espera inicial entre tentativas em segundos (dobra a cada falha)
+    Returns:
+        Resultado da chamada
+    '''
+    for attempt in range(1, retries + 1):
+        limiter.acquire()
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= retries or (isinstance(e, ServiceError) and e.status < 500):
+                raise
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+
+def narrate_match_remote(service, match_id: int, styles, competition_id: int, season_id: int,
+                         limiter: RateLimiter, retries: int = 3, backoff: float = 2.0,
+                         force: bool = False) -> dict:
+    '''
+    Pede as narrações de uma partida ao serviço de análise, com o mesmo limite de requisições por minuto
+    e as mesmas novas tentativas das narrações locais.
+    Args:
+        service (AnalyticsClient): Cliente do serviço de análise
+        match_id (int): ID da partida
+        styles (list): Estilos de narração
+        competition_id (int): ID da competição
+        season_id (int): ID da temporada
+        limiter (RateLimiter): Limitador de requisições por minuto compartilhado
+        retries (int): Tentativas por narração
+        backoff (float): Espera inicial entre tentativas em segundos (dobra a cada falha)
+        force (bool): Gera novamente narrações já presentes no cache
+    Returns:
+        dict: Estilo -> 'generated' ou 'cached'
+    '''
+    results = {}
+    for style in styles:
+        narration = _call_with_retries(
+            lambda: service.narration(match_id, style, regenerate=force,
+                                      competition_id=competition_id, season_id=season_id),
+            limiter, retries, backoff)
+        results[style] = 'cached' if narration['cached'] else 'generated'
+    return results
+
+
+def narrate_match(match_id: int, match_info: dict, styles, limiter: RateLimiter,
+                  retries: int = 3, backoff: float = 2.0, force: bool = False) -> dict:
+    '''
+    Gera as narrações de uma partida em cada estilo pedido.
+    Args:
+        match_id (int): ID da partida
+        match_info (dict): Informações gerais da partida (build_match_info)
+        styles (list): Estilos de narração
+        limiter (RateLimiter): Limitador de requisições por minuto compartilhado
+        retries (int): Tentativas por chamada ao LLM
+        backoff (float): Espera inicial entre tentativas em segundos (dobra a cada falha)
+        force (bool): Gera novamente narrações já presentes no cache
+    Returns:
+        dict: Estilo -> 'generated' ou 'cached'
+    '''
+    match_context = assemble_match_context(match_id)
+    results = {}
+    for style in styles:
+        prompt = build_narration_prompt(match_info, match_context, style)
+        scope = narration_scope(match_id, style)
+        if not force and cached_response(prompt, scope) is not None:
+            results[style] = 'cached'
+            continue
+        _call_with_retries(lambda: generate_response(prompt, scope, bypass_cache=True),
+                           limiter, retries, backoff)
+        results[style] = 'generated'
+    return results
+
+
+def narrate_season(competition_id: int, season_id: int, styles=BROADCAST_STYLES,
+                   concurrency: int = 4, requests_per_minute: float = 15, retries: int = 3,
+                   force: bool = False, service=None) -> dict:
+    '''
+    Gera as narrações de todas as partidas de uma competição/temporada em paralelo,
+    respeitando o limite de requisições por minuto ao LLM.
+    Args:
+        competition_id (int): ID da competição
+        season_id (int): ID da temporada
+        styles (list): Estilos de narração
+        concurrency (int): Número máximo de partidas processadas ao mesmo tempo
+        requests_per_minute (float): Limite de chamadas ao LLM por minuto (0 = sem limite)
+        retries (int): Tentativas por chamada ao LLM
+        force (bool): Gera novamente narrações já presentes no cache
+        service (AnalyticsClient): Serviço de análise que gera as narrações (opcional)
+    Returns:
+        dict: Narrações geradas, puladas, partidas com falha e throughput
+    '''
+    matches = data_source.matches(competition_id, season_id)
+    limiter = RateLimiter(requests_per_minute)
+    state = {'competition_id': competition_id, 'season_id': season_id,
+             'generated': 0, 'cached': 0, 'failed': {}}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if service is not None:
+            futures = {
+                executor.submit(narrate_match_remote, service, match_id, styles,
+                                competition_id, season_id, limiter, retries, force=force): match_id
+                for match_id in sorted(matches)
+            }
+        else:
+            futures = {
+                executor.submit(narrate_match, match_id, build_match_info(match), styles,
+                                limiter, retries, force=force): match_id
+                for match_id, match in sorted(matches.items())
+            }
+        with tqdm(total=len(futures), desc=f'Narrações {competition_id}/{season_id}', unit='partida') as progress:
+            for future in as_completed(futures):
+                match_id = futures[future]
+                try:
+                    for status in future.result().values():
+                        state[status] += 1
+                except Exception as e:
+                    state['failed'][str(match_id)] = str(e)
+                progress.update(1)
+
+    state['elapsed_seconds'] = round(time.perf_counter() - start, 2)
+    state['narrations_per_minute'] = round(
+        state['generated'] * 60 / state['elapsed_seconds'], 1) if state['elapsed_seconds'] else 0.0
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Gera em lote as narrações de uma competição/temporada do StatsBomb')
+    parser.add_argument('--competition-id', type=int, required=True)
+    parser.add_argument('--season-id', type=int, required=True)
+    parser.add_argument('--styles', nargs='+', default=list(BROADCAST_STYLES),
+                        choices=BROADCAST_STYLES)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rpm', type=float, default=15,
+                        help='Limite de chamadas ao LLM por minuto (0 = sem limite)')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--force', action='store_true',
+                        help='Gera novamente narrações já em cache')
+    parser.add_argument('--backend', choices=['gemini', 'fake'], default=None,
+                        help='Backend do LLM (padrão: variável LLM_BACKEND)')
+    parser.add_argument('--fake-delay', type=float, default=0.0,
+                        help='Atraso do backend fake antes da resposta, em segundos')
+    parser.add_argument('--service-url', default=None,
+                        help='Usa o serviço de análise neste endereço (ex.: http://127.0.0.1:8502)')
+    args = parser.parse_args()
+
+    if args.backend == 'fake':
+        set_llm_backend(FakeStreamingBackend(first_chunk_delay=args.fake_delay))
+
+    service = None
+    if args.service_url:
+        service = AnalyticsClient(args.service_url)
+
+    state = narrate_season(args.competition_id, args.season_id, styles=args.styles,
+                           concurrency=args.concurrency, requests_per_minute=args.rpm,
+                           retries=args.retries, force=args.force, service=service)
+    print(f"Geradas: {state['generated']} | Em cache: {state['cached']} | "
+          f"Falhas: {len(state['failed'])} | {state['elapsed_seconds']}s "
+          f"({state['narrations_per_minute']} narrações/min)")
+    for match_id, error in state['failed'].items():
+        print(f'  {match_id}: {error}')
+    if service is None:
+        print(f"Cache do LLM: {llm_cache.stats()['entries']} respostas em {llm_cache.path}")
+
+
+if __name__ == '__main__':
+    main()
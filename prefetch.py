@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+from utils.cache_manager import cache_manager
+from utils.data_source import data_source
+from utils.dataprep import get_player_stats_table, invalidate_match, load_match_events, read_player_stats_table
+from utils.event_store import event_store
+from utils.player_stats import PLAYER_STATS_SCHEMA
+from utils.season_stats import season_stats
+
+# Aquecimento dos caches de uma temporada inteira antes dos dias de jogo:
+#   python prefetch.py --competition-id 11 --season-id 90 --workers 8
+# Eventos e estatísticas dos jogadores vão para o armazenamento local (event_store) e as escalações
+# para o cache HTTP. Partidas já aquecidas são puladas, então uma execução interrompida pode ser retomada.
+# Ao final, as partidas novas são incluídas na tabela de estatísticas da temporada (season_stats).
+
+
+def is_prefetched(match_id: int) -> bool:
+    '''
+    Verifica se os dados derivados da partida já estão no armazenamento local.
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        bool: True se eventos e estatísticas dos jogadores já foram gravados
+    '''
+    return event_store.contains(match_id) and \
+        event_store.contains(match_id, kind='player_stats', schema=PLAYER_STATS_SCHEMA)
+
+
+def prefetch_match(match_id: int, retries: int = 3, backoff: float = 1.0, force: bool = False) -> int:
+    '''
+    Baixa e grava eventos, escalações e estatísticas dos jogadores de uma partida.
+    Args:
+        match_id (int): ID da partida
+        retries (int): Número de tentativas em caso de erro
+        backoff (float): Espera inicial entre tentativas em segundos (dobra a cada falha)
+        force (bool): Baixa novamente eventos e escalações (sem o cache HTTP) e substitui as tabelas gravadas
+    Returns:
+        int: Número de tentativas usadas
+    '''
+    for attempt in range(1, retries + 1):
+        try:
+            if force:
+                event_store.get_events(match_id, refresh=True)
+                data_source.lineups(match_id, refresh=True)
+                invalidate_match(match_id)
+                read_player_stats_table(match_id, refresh=True)
+            else:
+                load_match_events(match_id)
+                data_source.lineups(match_id)
+                get_player_stats_table(match_id)
+            return attempt
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+
+def prefetch_season(competition_id: int, season_id: int, workers: int = 8, retries: int = 3,
+                    force: bool = False, state_path: str = None) -> dict:
+    '''
+    Aquece os caches de todas as partidas de uma competição/temporada em paralelo.
+    Args:
+        competition_id (int): ID da competição
+        season_id (int): ID da temporada
+        workers (int): Número máximo de downloads simultâneos
+        retries (int): Tentativas por partida
+        force (bool): Baixa novamente partidas já presentes no armazenamento local
+        state_path (str): Arquivo JSON com o resultado da execução (padrão dentro do event_store)
+    Returns:
+        dict: Partidas concluídas, puladas, com falha e a atualização das estatísticas da temporada
+    '''
+    matches = data_source.matches(competition_id, season_id)
+    match_ids = sorted(matches)
+
+    state = {'competition_id': competition_id, 'season_id': season_id,
+             'done': [], 'skipped': [], 'failed': {}}
+    pending = []
+    for match_id in match_ids:
+        if not force and is_prefetched(match_id):
+            state['skipped'].append(match_id)
+        else:
+            pending.append(match_id)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(prefetch_match, match_id, retries, force=force): match_id
+                   for match_id in pending}
+        with tqdm(total=len(pending), desc=f'Prefetch {competition_id}/{season_id}', unit='partida') as progress:
+            for future in as_completed(futures):
+                match_id = futures[future]
+                try:
+                    future.result()
+                    state['done'].append(match_id)
+                except Exception as e:
+                    state['failed'][str(match_id)] = str(e)
+                progress.update(1)
+
+    # As estatísticas por partida já estão gravadas, então a agregação apenas lê as tabelas novas
+    season_update = season_stats.update(competition_id, season_id, match_ids=state['skipped'] + state['done'],
+                                        workers=workers, rebuild=force)
+    state['season_stats'] = {key: season_update[key] for key in ('added', 'players', 'elapsed_seconds')}
+
+    if state_path is None:
+        state_path = os.path.join(
+            event_store.root, f'prefetch_{competition_id}_{season_id}.json')
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=4)
+
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Aquece os caches locais de uma competição/temporada do StatsBomb')
+    parser.add_argument('--competition-id', type=int, required=True)
+    parser.add_argument('--season-id', type=int, required=True)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--force', action='store_true',
+                        help='Baixa novamente partidas já aquecidas')
+    args = parser.parse_args()
+
+    state = prefetch_season(args.competition_id, args.season_id, workers=args.workers,
+                            retries=args.retries, force=args.force)
+    print(f"Concluídas: {len(state['done'])} | Puladas: {len(state['skipped'])} | "
+          f"Falhas: {len(state['failed'])}")
+    print(f"Estatísticas da temporada: {len(state['season_stats']['added'])} partidas adicionadas, "
+          f"{state['season_stats']['players']} jogadores ({state['season_stats']['elapsed_seconds']}s)")
+    for match_id, error in state['failed'].items():
+        print(f'  {match_id}: {error}')
+
+
+if __name__ == '__main__':
+    main()
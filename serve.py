@@ -0,0 +1,45 @@
+import argparse
+
+from utils.analytics_service import ANALYTICS_WORKERS, AnalyticsServer, AnalyticsService
+from utils.llm import FakeStreamingBackend, set_llm_backend
+
+# Serviço HTTP de análise das partidas, independente da interface do Streamlit:
+#   python serve.py --port 8502 --workers 4
+#   ANALYTICS_SERVICE_URL=http://127.0.0.1:8502 streamlit run main.py
+# Dados da partida, narrações e perguntas ao agente são processados em um pool de workers, com
+# requisições idênticas em andamento coalescidas. Com --backend fake nenhuma chamada de rede é
+# feita ao LLM (narrações e agente usam modelos falsos), útil para testes locais.
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serviço HTTP de análise das partidas')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--workers', type=int, default=ANALYTICS_WORKERS)
+    parser.add_argument('--backend', choices=['gemini', 'fake'], default=None,
+                        help='Backend do LLM (padrão: variável LLM_BACKEND)')
+    parser.add_argument('--fake-delay', type=float, default=0.0,
+                        help='Atraso do backend fake antes da resposta, em segundos')
+    args = parser.parse_args()
+
+    chat_model = None
+    if args.backend == 'fake':
+        from agent import fake_chat_model
+
+        set_llm_backend(FakeStreamingBackend(first_chunk_delay=args.fake_delay))
+        chat_model = fake_chat_model()
+
+    service = AnalyticsService(workers=args.workers, chat_model=chat_model)
+    server = AnalyticsServer(service, host=args.host, port=args.port)
+    print(f'Serviço de análise em {server.url} ({args.workers} workers)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import time
+
+from utils.match_sync import SYNC_WORKERS, match_sync
+
+# Sincronização incremental de uma temporada com a fonte de dados, para rodar periodicamente:
+#   python sync.py --competition-id 11 --season-id 90               # uma sincronização
+#   python sync.py --competition-id 11 --season-id 90 --interval 3600   # a cada hora
+# A listagem de partidas é pedida com requisição condicional (ETag/Last-Modified); sem mudanças a
+# sincronização custa uma requisição. Apenas partidas novas ou com last_updated diferente são baixadas,
+# e a tabela de estatísticas da temporada é atualizada com elas.
+
+
+def print_result(result: dict):
+    print(f"[{time.strftime('%H:%M:%S')}] Listagem: {result['listing']} | Novas: {len(result['new'])} | "
+          f"Alteradas: {len(result['changed'])} | Removidas: {len(result['removed'])} | "
+          f"Falhas: {len(result['failed'])} | Requisições: {result['requests']} | "
+          f"Marca d'água: {result['watermark']} | {result['elapsed_seconds']}s")
+    for match_id, error in result['failed'].items():
+        print(f'  {match_id}: {error}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sincroniza as partidas novas ou alteradas de uma competição/temporada do StatsBomb')
+    parser.add_argument('--competition-id', type=int, required=True)
+    parser.add_argument('--season-id', type=int, required=True)
+    parser.add_argument('--workers', type=int, default=SYNC_WORKERS)
+    parser.add_argument('--force', action='store_true',
+                        help='Busca a listagem completa mesmo sem mudanças')
+    parser.add_argument('--interval', type=float, default=None,
+                        help='Repete a sincronização a cada N segundos')
+    args = parser.parse_args()
+
+    while True:
+        try:
+            print_result(match_sync.sync(args.competition_id, args.season_id,
+                                         workers=args.workers, force=args.force))
+        except Exception as e:
+            if args.interval is None:
+                raise
+            print(f"[{time.strftime('%H:%M:%S')}] Erro na sincronização: {e}")
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,20 @@
 import streamlit as st
 import os
-import json
-import yaml
+import time
 import pandas as pd
-from google import genai
-from google.genai import types
-from utils.dataprep import GetMatchStats
+from utils.dataprep import load_match_events, load_match_index, load_match_lineups, get_player_stats_table
+from utils.player_stats import player_profile_stats
+from utils.prompt_encoder import encode_events, encode_lineups, encode_mapping, estimate_tokens
+from utils.match_context import assemble_match_context
+from utils.narration import build_narration_prompt, narration_scope
 from dotenv import load_dotenv
-from statsbombpy import sb
-from mplsoccer import Pitch
-from agent import create_match_agent
 from utils.cache_manager import cache_manager
+from utils.llm import stream_response
+from utils.llm_cache import llm_cache
+from utils.frame_cache import frame_cache
+from utils.analytics_service import ANALYTICS_SERVICE_URL, get_analytics
+from utils.season_stats import season_stats
+from utils.instrumentation import text_size, tracer
 
 # Tentar carregar as variáveis de ambiente do arquivo .env, se não existir, configurar manualmente
 ENV_PATH = os.path.abspath(os.path.join('.env'))
@@ -23,16 +27,48 @@ if os.getenv('GEMINI_API_KEY') is None:
     except FileNotFoundError:
         print('Arquivo .env não encontrado. As variáveis de ambiente devem ser configuradas manualmente.')
 
-# Configuração do cliente com a chave da API
-client = genai.Client(
-    api_key=os.getenv('GEMINI_API_KEY')
-)
+
+# Dependências pesadas (langchain, mplsoccer/matplotlib, yaml) são importadas no primeiro uso da aba
+# que precisa delas, para que a barra lateral seja exibida sem esperar por elas.
+# As perguntas ao agente (e, com ANALYTICS_SERVICE_URL, as narrações) são processadas pelo
+# serviço de análise (utils/analytics_service.py), no próprio processo ou em um servidor separado.
 
 
 def yaml_conversion(data: dict) -> str:
+    import yaml
     return yaml.dump(data, allow_unicode=True)
 
 
+def render_stream(chunks) -> str:
+    '''
+    Renderiza progressivamente uma resposta em streaming do LLM.
+    Args:
+        chunks (generator): Pedaços do texto gerado
+    Returns:
+        str: Texto completo
+    '''
+    placeholder = st.empty()
+    text = ''
+    render_seconds = 0.0
+    for chunk in chunks:
+        text += chunk
+        start = time.perf_counter()
+        placeholder.markdown(
+            f'<div style="text-align: justify;">{text}</div>', unsafe_allow_html=True)
+        render_seconds += time.perf_counter() - start
+    tracer.record('render_stream', 'render', render_seconds * 1000, chars=len(text))
+    return text
+
+
+def render_answer(answer: str):
+    st.markdown(
+        f'<div style="background-color: #f0f2f6; padding: 20px; '
+        f'border-radius: 10px; border-left: 5px solid #1f77b4;">'
+        f'{answer}</div>',
+        unsafe_allow_html=True
+    )
+
+
 def tab_overview(mytab):
     '''
     Função que cria a aba de visão geral da partida e narração.
@@ -61,50 +97,48 @@ def tab_overview(mytab):
         col4.write(json_selected_match_info['stadium_name'])
 
         st.markdown("## Narração da Partida:studio_microphone:")
+        regenerate = st.checkbox(
+            'Gerar nova narração (ignorar cache)', key='regenerate_narration')
         if st.button('Gerar Narração'):
-            with st.spinner('Gerando narração sensacional...'):
-                match_id = st.session_state['selected_match_id']
-                lineups = GetMatchStats(match_id=match_id).get_lineups()
-                match_info = st.session_state['json_selected_match_info']
-                events = GetMatchStats(match_id=match_id).get_events()
-                player_stats = GetMatchStats(
-                    match_id=match_id).get_player_stats()
-                broadcast_style = st.session_state['selected_broadcast_style']
-
-                lineups_yaml = yaml_conversion(lineups)
-                match_info_yaml = yaml_conversion(match_info)
-                events_yaml = yaml_conversion(events)
-                player_stats_yaml = yaml_conversion(player_stats)
-
-                prompt = (f'''
-                Elabore um resumo envolvente e informativo do jogo descrito abaixo, em português, através do conteúdo dos YAML fornecidos:
-                - Lineups: {lineups_yaml} - contêm informações sobre as escalações dos times
-                - Match Info: {match_info_yaml} - contêm informações gerais da partida como data, estádio, times, placar, nome da competição.
-                - Events: {events_yaml} - contêm informações sobre os eventos da partida passes, faltas cometidas, faltas sofridas, interceptações, recuperação de bola, dribles e suas localizações.
-                - Player Stats: {player_stats_yaml} - contêm informações sobre os jogadores individuais com os jogadores e, junto com os eventos, irão dar a visão geral da partida.
-                - Broadcast Style: {broadcast_style} - contêm o estilo de narração escolhido pelo usuário. Podendo ser Formal(técnico e objetivo), Humorístico(descontraído e criativo) ou Técnico(análise detalhada dos eventos).
-                Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas, como por exemplo adivinhar a ordem dos eventos da partida.
-                O objetivo é criar um texto cativante e acessível, destacando os principais acontecimentos e aspectos interessantes da partida.
-                O resumo deve ter no máximo 250 palavras e ser escrito como um comentarista esportivo, com o tom escolhido pelo usuário.
-                Mencione a data da partida explicitamente, sem utilizar termos como 'hoje'.
-                Não use termos como de acordo com os dados que me foram fornecidos, ou algo do tipo.
-                Focalize os momentos-chave do jogo, não entre em detalhes excessivos sobre cada jogador.
-                ''')
-
-                response = client.models.generate_content(
-                    model='gemini-1.5-flash',
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        temperature=0.3,
-                        max_output_tokens=500,
-                        top_p=0.95,
-                        top_k=40
-                    ))
-
-                response = response.text
-
-                st.markdown(
-                    f'<div style="text-align: justify;">{response}</div>', unsafe_allow_html=True)
+            match_id = st.session_state['selected_match_id']
+            match_info = st.session_state['json_selected_match_info']
+            broadcast_style = st.session_state['selected_broadcast_style']
+
+            # Com um serviço de análise remoto, a narração é gerada (e coalescida entre
+            # sessões) por ele; a resposta chega completa, sem streaming
+            if ANALYTICS_SERVICE_URL:
+                with tracer.trace('narration', match_id=int(match_id), style=broadcast_style):
+                    with st.spinner('Gerando narração sensacional...'):
+                        try:
+                            narration = get_analytics().narration(
+                                match_id, broadcast_style, regenerate=regenerate,
+                                competition_id=st.session_state.get('selected_competition_id'),
+                                season_id=st.session_state.get('selected_season_id'))
+                        except Exception as e:
+                            st.error(f"Erro ao gerar narração: {str(e)}")
+                            return
+                    render_stream([narration['text']])
+                if narration['cached']:
+                    st.caption('Narração recuperada do cache do serviço de análise')
+                return
+
+            with tracer.trace('narration', match_id=int(match_id), style=broadcast_style):
+                with st.spinner('Gerando narração sensacional...'):
+                    match_context = assemble_match_context(match_id)
+                    key_moments_context = match_context.key_moments_context
+                    with tracer.span('narration_prompt', 'serialize') as span:
+                        prompt = build_narration_prompt(
+                            match_info, match_context, broadcast_style)
+                        span.update(text_size('prompt', prompt))
+
+                render_stream(stream_response(
+                    prompt,
+                    scope=narration_scope(match_id, broadcast_style),
+                    bypass_cache=regenerate))
+            st.caption(
+                f'Contexto de momentos-chave: {estimate_tokens(key_moments_context)} tokens estimados '
+                f'(resumo de {len(match_context.events)} eventos) | Etapas (s): ' +
+                ', '.join(f'{stage} {seconds}' for stage, seconds in match_context.timings.items()))
 
 
 def player_stats_tab(mytab):
@@ -117,110 +151,76 @@ def player_stats_tab(mytab):
 
         match_id = st.session_state['selected_match_id']
 
-        events = sb.events(match_id=int(match_id))
-
-        home_team = events[events['type'] == 'Starting XI'].iloc[0]['team']
-        away_team = [team for team in events['team'].unique()
-                     if team != home_team][0]
-
-        home_team_events = events[events['team'] == home_team]
-        away_team_events = events[events['team'] == away_team]
-
-        home_team_players = home_team_events['player'].dropna().unique()
-        away_team_players = away_team_events['player'].dropna().unique()
+        player_stats_table = get_player_stats_table(match_id)
 
-        all_players = list(
-            set(home_team_players).union(set(away_team_players)))
+        all_players = list(player_stats_table.index)
 
         selected_player = st.selectbox(
             'Selecione um jogador', all_players, index=None)
 
+        # Estatísticas da temporada (totais e por 90 minutos), lidas da tabela agregada; a atualização
+        # processa apenas as partidas da temporada ainda não incluídas
+        competition_id = st.session_state.get('selected_competition_id')
+        season_id = st.session_state.get('selected_season_id')
+        season_profile = None
+        if competition_id is not None and season_id is not None:
+            if st.button('Atualizar estatísticas da temporada'):
+                with st.spinner('Agregando as partidas da temporada...'):
+                    update = season_stats.update(competition_id, season_id)
+                st.caption(f"{len(update['added'])} partidas adicionadas, {len(update['failed'])} com falha "
+                           f"({update['elapsed_seconds']} s)")
+            if selected_player is not None:
+                season_profile = season_stats.player(competition_id, season_id, selected_player)
+            if season_profile is not None:
+                with st.expander(f"Temporada: {season_profile['Partidas']} partidas, "
+                                 f"{season_profile['Minutos']} minutos"):
+                    st.json(season_profile)
+
+        regenerate = st.checkbox(
+            'Gerar novo perfil (ignorar cache)', key='regenerate_profile')
         if st.button('Gerar Perfil do Jogador'):
             if selected_player is not None:
-                with st.spinner('Gerando um perfil impecável...'):
-                    player_events = events[events['player'] == selected_player]
-                    stats = {
-                        "Jogador": selected_player,
-                        "Passes Completos": player_events[
-                            (player_events['type'] == 'Pass') & (
-                                player_events['pass_outcome'].isna())
-                        ].shape[0],
-                        "Tentativas de Passes": player_events[player_events['type'] == 'Pass'].shape[0],
-                        "Chutes": player_events[player_events['type'] == 'Shot'].shape[0],
-                        "Chutes no Alvo": player_events[
-                            (player_events['type'] == 'Shot') & (
-                                player_events['shot_outcome'] == 'On Target')
-                        ].shape[0],
-                        "Faltas Cometidas": player_events[player_events['type'] == 'Foul Committed'].shape[0],
-                        "Faltas Sofridas": player_events[player_events['type'] == 'Foul Won'].shape[0],
-                        "Contestações de Bola": player_events[player_events['type'] == 'Tackle'].shape[0],
-                        "Interceptações": player_events[player_events['type'] == 'Interception'].shape[0],
-                        "Dribles Completados": player_events[
-                            (player_events['type'] == 'Dribble') & (
-                                player_events['dribble_outcome'] == 'Complete')
-                        ].shape[0],
-                        "Tentativas de Dribles": player_events[player_events['type'] == 'Dribble'].shape[0],
-                        "Gols (exceto pênaltis)": player_events[
-                            (player_events['type'] == 'Shot') &
-                            (player_events['shot_outcome'] == 'Goal') &
-                            (player_events['shot_type'] != 'Penalty')
-                        ].shape[0],
-                        "Gols de Pênalti": player_events[
-                            (player_events['type'] == 'Shot') &
-                            (player_events['shot_outcome'] == 'Goal') &
-                            (player_events['shot_type'] == 'Penalty')
-                        ].shape[0],
-                        "Recuperações de Bola": player_events[player_events['type'] == 'Ball Recovery'].shape[0],
-                        "Bloqueios": player_events[player_events['type'] == 'Block'].shape[0],
-                        "Paralisações por Lesão": player_events[player_events['type'] == 'Injury Stoppage'].shape[0],
-                        "Perda de Controle": player_events[player_events['type'] == 'Miscontrol'].shape[0],
-                        # Safeguard against missing 'foul_committed_card' column
-                        "Cartões Amarelos": player_events[
-                            (player_events['type'] == 'Foul Committed') &
-                            (player_events['foul_committed_card'].eq(
-                                'Yellow Card') if 'foul_committed_card' in player_events else False)
-                        ].shape[0],
-                        "Cartões Vermelhos": player_events[
-                            (player_events['type'] == 'Foul Committed') &
-                            (player_events['foul_committed_card'].eq(
-                                'Red Card') if 'foul_committed_card' in player_events else False)
-                        ].shape[0]
-                    }
-
-                    json_player_stats_yaml = yaml_conversion(stats)
-
-                    events = GetMatchStats(match_id=match_id).get_events()
-
-                    events_yaml = yaml_conversion(events)
-
-                    prompt = (f'''
-                    Elabore um resumo envolvente e informativo do jogador selecionado, em português, através do conteúdo dos YAML fornecidos:
-                            - Player_stats: {json_player_stats_yaml} - contêm informações sobre as estatísticas do jogador na partida. Como: passes completos,
-                            tentativas de passes, chutes, chutes no alvo, faltas cometidas, faltas sofridas, contestações de bola, interceptações, dribles completados,
-                            tentativas de dribles, gols (exceto pênaltis), gols de pênalti, recuperações de bola, bloqueios, cartões amarelos, cartões vermelhos,
-                            paralisações por lesão, perda de controle.
-                            - Events: {events_yaml} - contêm informações sobre os eventos gerais da partida, envolvendo todos os jogadores.
-                            Com a combinação das estatísticas do jogador e dos eventos da partida, você irá traçar o perfil do jogador na partida.
-                            Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas, como por exemplo adivinhar a ordem dos eventos da partida.
-                            Não use termos como de acordo com os dados que me foram fornecidos, ou algo do tipo.
-                            O objetivo é criar um texto cativante e acessível, destacando os principais acontecimentos e aspectos interessantes do jogador na partida.
-                            O resumo deve ter no máximo 250 palavras e ser escrito como um comentarista esportivo.
-                    ''')
-
-                    response = client.models.generate_content(
-                        model='gemini-1.5-flash',
-                        contents=prompt,
-                        config=types.GenerateContentConfig(
-                            temperature=0.3,
-                            max_output_tokens=500,
-                            top_p=0.95,
-                            top_k=40
-                        ))
-
-                    response = response.text
-
-                    st.markdown(
-                        f'<div style="text-align: justify;">{response}</div>', unsafe_allow_html=True)
+                with tracer.trace('player_profile', match_id=int(match_id), player=selected_player):
+                    with st.spinner('Gerando um perfil impecável...'):
+                        stats = player_profile_stats(
+                            player_stats_table, selected_player)
+
+                        player_stats_context = encode_mapping(stats)
+                        season_context = ''
+                        if season_profile is not None:
+                            season_context = (
+                                f"- Season_stats: {encode_mapping(season_profile)} - contêm os totais do jogador na temporada "
+                                f"e as taxas por 90 minutos; use-as para comparar a partida com o desempenho habitual dele.")
+
+                        with tracer.span('encode_events', 'serialize') as span:
+                            encoded_events = encode_events(
+                                load_match_events(match_id))
+                            span.update(text_size('prompt', encoded_events.text))
+
+                        prompt = (f'''
+                        Elabore um resumo envolvente e informativo do jogador selecionado, em português, através do conteúdo das tabelas fornecidas:
+                                - Player_stats: {player_stats_context} - contêm informações sobre as estatísticas do jogador na partida. Como: passes completos,
+                                tentativas de passes, chutes, chutes no alvo, faltas cometidas, faltas sofridas, contestações de bola, interceptações, dribles completados,
+                                tentativas de dribles, gols (exceto pênaltis), gols de pênalti, recuperações de bola, bloqueios, cartões amarelos, cartões vermelhos,
+                                paralisações por lesão, perda de controle.
+                                {season_context}
+                                - Events: {encoded_events.text} - contêm informações sobre os eventos gerais da partida, envolvendo todos os jogadores.
+                                Times, jogadores, tipos de evento e resultados estão codificados por números, conforme os dicionários no início da tabela de eventos.
+                                Com a combinação das estatísticas do jogador e dos eventos da partida, você irá traçar o perfil do jogador na partida.
+                                Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas, como por exemplo adivinhar a ordem dos eventos da partida.
+                                Não use termos como de acordo com os dados que me foram fornecidos, ou algo do tipo.
+                                O objetivo é criar um texto cativante e acessível, destacando os principais acontecimentos e aspectos interessantes do jogador na partida.
+                                O resumo deve ter no máximo 250 palavras e ser escrito como um comentarista esportivo.
+                        ''')
+
+                    render_stream(stream_response(
+                        prompt,
+                        scope={'kind': 'player_profile', 'match_id': int(match_id),
+                               'player': selected_player},
+                        bypass_cache=regenerate))
+                    st.caption(
+                        f'Contexto de eventos: {encoded_events.tokens_before} → {encoded_events.tokens_after} tokens estimados '
+                        f'({encoded_events.rows_kept} de {encoded_events.rows_total} eventos)')
 
 
 def pass_map_tab(mytab):
@@ -230,64 +230,37 @@ def pass_map_tab(mytab):
     with mytab:
         st.title('Mapa de Passe:man-running:')
         st.write(
-            'Selecione um jogador para visualizar o mapa de passe dele na partida')
+            'Selecione um jogador para visualizar o mapa de passe dele na partida, '
+            'ou um time para ver a rede de passes')
 
         match_id = st.session_state['selected_match_id']
-        events = sb.events(match_id=match_id)
-
-        home_team = events[events['type'] == 'Starting XI'].iloc[0]['team']
-        away_team = [team for team in events['team'].unique()
-                     if team != home_team][0]
+        match_index = load_match_index(match_id)
 
         selected_team = st.selectbox(
-            'Selecione time', [home_team, away_team], key='pass_team_selectbox', index=None)
+            'Selecione time', match_index.teams, key='pass_team_selectbox', index=None)
+
+        view = st.radio('Visualização', ('Mapa de passes do jogador', 'Rede de passes do time'),
+                        key='pass_view', horizontal=True)
 
         if selected_team is not None:
+            from utils.pass_map import render_pass_map, render_pass_network
+
+            if view == 'Rede de passes do time':
+                with st.spinner('Carregando rede de passes...'):
+                    st.image(render_pass_network(match_id, selected_team))
+                st.caption(
+                    'Posição média de cada jogador nos passes concluídos; a espessura das linhas '
+                    'indica o número de passes entre os jogadores.')
+                return
 
-            events = sb.events(match_id=match_id)
-            team_events = events[events['team'] == selected_team]
-            players = team_events['player'].unique()
-            players = players[~pd.isna(players)]
+            players = match_index.players(selected_team)
             selected_player = st.selectbox(
                 'Selecione jogador', players, key='pass_player_selectbox', index=None)
 
             if selected_player is not None:
                 with st.spinner('Carregando mapa de passes...'):
-                    player_events = team_events[team_events['player']
-                                                == selected_player]
-
-                    pitch = Pitch(pitch_color='grass',
-                                  line_color='white', line_zorder=2)
-                    fig, ax = pitch.draw()
-
-                    pass_events = player_events[player_events['type'] == 'Pass']
-
-                    for _, event in pass_events.iterrows():
-                        x = event['location'][0]
-                        y = event['location'][1]
-                        pass_end_location = event['pass_end_location']
-                        x_end = pass_end_location[0]
-                        y_end = pass_end_location[1]
-                        pass_outcome = event['pass_outcome']
-
-                        if pd.isna(pass_outcome):
-                            color = 'blue'
-                            alpha = 0.7
-                            label = 'Passes Concluídos'
-                        else:
-                            color = 'red'
-                            alpha = 0.5
-                            label = 'Passes Incompletos'
-
-                        pitch.arrows(x, y, x_end, y_end, color=color,
-                                     alpha=alpha, ax=ax, width=2, label=label)
-
-                    handles, labels = ax.get_legend_handles_labels()
-                    by_label = dict(zip(labels, handles))
-                    ax.legend(by_label.values(), by_label.keys(),
-                              loc='upper left', fontsize='small')
-
-                    st.pyplot(fig)
+                    st.image(render_pass_map(
+                        match_id, selected_team, selected_player))
 
 
 def match_qa_tab(mytab):
@@ -304,87 +277,7 @@ def match_qa_tab(mytab):
             return
 
         match_id = st.session_state['selected_match_id']
-        match_info = st.session_state['json_selected_match_info']
-        match_stats = GetMatchStats(match_id=match_id)
-
-        # Limpar agente se a partida selecionada mudar
-        if 'current_match_id' not in st.session_state or st.session_state['current_match_id'] != match_id:
-            if 'match_agent' in st.session_state:
-                del st.session_state['match_agent']
-            st.session_state['current_match_id'] = match_id
-
-        # Inicializa o agente se ainda não estiver no session state
-        if 'match_agent' not in st.session_state:
-            with st.spinner('Inicializando agente de análise...'):
-                try:
-                    # Pega as strings JSON dos dados da partida
-                    events = match_stats.get_events()
-                    player_stats = match_stats.get_player_stats()
-                    lineups = match_stats.get_lineups()
-
-                    # Debug: Mostra os dados carregados
-                    with st.expander("Debug: Dados Carregados"):
-                        st.write("Match Info:")
-                        st.write(match_info)
-
-                        st.write("\nEvents (raw):")
-                        st.text(events[:1000] +
-                                "..." if len(events) > 1000 else events)
-
-                        st.write("\nPlayer Stats (raw):")
-                        st.text(
-                            player_stats[:1000] + "..." if len(player_stats) > 1000 else player_stats)
-
-                        st.write("\nLineups (raw):")
-                        st.text(
-                            lineups[:1000] + "..." if len(lineups) > 1000 else lineups)
-
-                        # Tenta parsear cada string JSON
-                        st.write("\nValidating data formats:")
-                        try:
-                            events_dict = json.loads(events)
-                            st.success("Events: Valid JSON")
-                        except json.JSONDecodeError as e:
-                            st.error(f"Events: Invalid JSON - {str(e)}")
-                            events_dict = {"error": "Invalid JSON"}
-
-                        try:
-                            player_stats_dict = json.loads(player_stats)
-                            st.success("Player Stats: Valid JSON")
-                        except json.JSONDecodeError as e:
-                            st.error(f"Player Stats: Invalid JSON - {str(e)}")
-                            player_stats_dict = {"error": "Invalid JSON"}
-
-                        try:
-                            lineups_dict = json.loads(lineups)
-                            st.success("Lineups: Valid JSON")
-                        except json.JSONDecodeError as e:
-                            st.error(f"Lineups: Invalid JSON - {str(e)}")
-                            lineups_dict = {"error": "Invalid JSON"}
-
-                    # Criação do contexto da partida
-                    match_context = (
-                        f"{match_info['home_team_name']} vs {match_info['away_team_name']} "
-                        f"({match_info['match_date']})"
-                    )
-
-                    # Criação do agente com dados válidos
-                    st.session_state['match_agent'] = create_match_agent(
-                        match_info=match_info,
-                        events=events_dict if isinstance(
-                            events_dict, dict) else events,
-                        player_stats=player_stats_dict if isinstance(
-                            player_stats_dict, dict) else player_stats,
-                        lineups=lineups_dict if isinstance(
-                            lineups_dict, dict) else lineups
-                    )
-
-                    st.session_state['match_context'] = match_context
-
-                except Exception as e:
-                    st.error(f"Erro ao carregar dados da partida: {str(e)}")
-                    st.exception(e)
-                    return
+        history = st.session_state.setdefault('qa_history', {}).setdefault(match_id, [])
 
         # Criando o input da questão do usuário
         user_question = st.text_input(
@@ -396,30 +289,92 @@ def match_qa_tab(mytab):
         # Botão de submissão da pergunta
         submit_button = st.button("Analisar", key="submit_question")
 
-        # Processa a pergunta quando submetida
+        # Processa a pergunta quando submetida. A pergunta é respondida pelo serviço de análise:
+        # o agente (e o langchain) só é carregado na primeira pergunta e é compartilhado entre
+        # sessões, apenas o histórico da conversa fica na sessão do usuário
         if submit_button and user_question:
             with st.spinner('Analisando a partida...'):
                 try:
-                    response = st.session_state['match_agent'].invoke(
-                        {
-                            "input": user_question,
-                            "context": st.session_state['match_context']
-                        }
-                    )
-
-                    # Mostra a resposta
-                    st.markdown("### Resposta:")
-                    if isinstance(response, dict) and "output" in response:
-                        st.markdown(
-                            f'<div style="background-color: #f0f2f6; padding: 20px; '
-                            f'border-radius: 10px; border-left: 5px solid #1f77b4;">'
-                            f'{response["output"]}</div>',
-                            unsafe_allow_html=True
-                        )
-                    else:
-                        st.error("Formato de resposta inesperado")
-                        st.json(response)
+                    with tracer.trace('qa', match_id=int(match_id)):
+                        response = get_analytics().ask(
+                            match_id, user_question,
+                            competition_id=st.session_state.get('selected_competition_id'),
+                            season_id=st.session_state.get('selected_season_id'))
+                    history.append((user_question, response['answer']))
 
                 except Exception as e:
                     st.error(f"Erro ao processar pergunta: {str(e)}")
                     st.error("Por favor, tente reformular sua pergunta.")
+
+        # Mostra a última resposta e, abaixo, as anteriores desta sessão
+        if history:
+            st.markdown("### Resposta:")
+            render_answer(history[-1][1])
+        if len(history) > 1:
+            with st.expander("Perguntas anteriores"):
+                for question, answer in reversed(history[:-1]):
+                    st.markdown(f"**{question}**")
+                    render_answer(answer)
+
+
+def diagnostics_panel(match_id: int = None):
+    '''
+    Painel opcional de diagnóstico: tempos e tamanhos das etapas instrumentadas (busca,
+    transformação, serialização, LLM e renderização), estado dos caches e exportação das métricas.
+    Args:
+        match_id (int): ID da partida selecionada (filtra os spans exibidos)
+    '''
+    st.title('Diagnóstico')
+    if not tracer.enabled:
+        st.info('Instrumentação desligada (INSTRUMENTATION_ENABLED=0).')
+        return
+
+    filters = {'match_id': int(match_id)} if match_id is not None else {}
+    spans = tracer.spans(**filters)
+    if spans:
+        # Totais por etapa do último trace (narração, perfil do jogador ou pergunta)
+        last_trace = next((span['trace_id'] for span in reversed(spans) if 'trace_id' in span), None)
+        if last_trace is not None:
+            trace_spans = pd.DataFrame([span for span in spans if span.get('trace_id') == last_trace])
+            st.subheader(f"Última ação: {trace_spans['trace'].iat[0]}")
+            stages = trace_spans.groupby('stage')['duration_ms'].agg(['count', 'sum']).round(1)
+            st.dataframe(stages.rename(columns={'count': 'spans', 'sum': 'total ms'}))
+
+        st.subheader('Spans recentes')
+        st.dataframe(pd.DataFrame(spans[-200:][::-1]), use_container_width=True)
+    else:
+        st.write('Nenhuma etapa registrada ainda para esta partida.')
+
+    startup = tracer.spans(name='main_script')
+    if startup:
+        st.subheader('Inicialização')
+        # A execução mais lenta costuma ser a primeira do processo (cold start, com as importações)
+        slowest = max(startup, key=lambda span: span['duration_ms'])
+        st.write({'execução mais lenta (ms)': slowest['duration_ms'],
+                  'importações nessa execução (ms)': slowest['imports_ms'],
+                  'última execução (ms)': startup[-1]['duration_ms']})
+
+    st.subheader('Caches')
+    st.write({'frames': frame_cache.stats(), 'llm': llm_cache.stats()})
+
+    if match_id is not None:
+        st.subheader('Dados carregados')
+        events = load_match_events(match_id)
+        st.write({
+            'eventos': len(events),
+            'memória dos eventos (MB)': round(events.memory_usage(deep=True).sum() / 1024 ** 2, 2),
+            'jogadores com estatísticas': len(get_player_stats_table(match_id)),
+            'tokens das escalações': estimate_tokens(encode_lineups(load_match_lineups(match_id)))
+        })
+        # Economia de memória da compactação dos eventos (registrada quando a partida foi carregada)
+        compaction = tracer.spans(limit=1, name='compact_events', match_id=int(match_id))
+        if compaction:
+            st.write({key: compaction[0][key] for key in (
+                'columns_before', 'columns_after', 'bytes_before', 'bytes_after', 'saved_pct')
+                if key in compaction[0]})
+
+    col1, col2 = st.columns(2)
+    col1.download_button('Exportar spans (JSONL)', tracer.export_jsonl(**filters),
+                         file_name='spans.jsonl', mime='application/x-ndjson')
+    col2.download_button('Exportar métricas (Prometheus)', tracer.prometheus_text(),
+                         file_name='metrics.prom', mime='text/plain')
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+# Os testes rodam offline: fonte de dados local sobre partidas sintéticas, cache HTTP em memória e
+# LLM falso. As variáveis de ambiente são definidas antes de importar os módulos do projeto, cujos
+# singletons (event_store, data_source, llm_cache...) são configurados na importação.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import SYNTHETIC_COMPETITION_ID, SYNTHETIC_SEASON_ID, synthetic_fixtures  # noqa: E402
+
+WORK_DIR = tempfile.mkdtemp(prefix='tests_')
+OPEN_DATA_DIR = os.path.join(WORK_DIR, 'open-data')
+# Partidas menores que as dos benchmarks, suficientes para os testes
+TEST_EVENTS_PER_MATCH = 600
+
+synthetic_fixtures(OPEN_DATA_DIR, events_per_match=TEST_EVENTS_PER_MATCH)
+os.environ.update({
+    'STATSBOMB_DATA_SOURCE': 'local',
+    'STATSBOMB_OPEN_DATA_DIR': OPEN_DATA_DIR,
+    'STATSBOMB_CACHE_BACKEND': 'memory',
+    'EVENT_STORE_DIR': os.path.join(WORK_DIR, 'event_store'),
+    'LLM_CACHE_PATH': os.path.join(WORK_DIR, 'llm_cache.sqlite'),
+    'LLM_BACKEND': 'fake',
+})
+
+COMPETITION_ID = SYNTHETIC_COMPETITION_ID
+SEASON_ID = SYNTHETIC_SEASON_ID
+MATCH_ID = 1001
@@ -0,0 +1,43 @@
+import pytest
+
+import agent
+from utils import llm
+from utils.llm import FakeStreamingBackend, get_llm_backend_name, set_llm_backend
+
+
+class _GeminiLikeBackend:
+    '''Backend com o nome do Gemini, sem criar o cliente da API'''
+    name = 'gemini'
+
+
+@pytest.fixture(autouse=True)
+def restore_backends(monkeypatch):
+    # monkeypatch restaura o backend e o modelo dos agentes ao final de cada teste
+    for module, names in ((llm, ('_backend', 'LLM_BACKEND')), (agent, ('_chat_model', '_chat_model_backend'))):
+        for name in names:
+            monkeypatch.setattr(module, name, getattr(module, name))
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+
+
+def test_chat_model_follows_backend_set_after_import():
+    assert get_llm_backend_name() == 'fake'
+    fake_model = agent.get_chat_model()
+    assert type(fake_model).__name__ == 'FakeListLLM'
+    assert agent.get_chat_model() is fake_model
+
+    set_llm_backend(_GeminiLikeBackend())
+    assert get_llm_backend_name() == 'gemini'
+    assert type(agent.get_chat_model()).__name__ == 'ChatGoogleGenerativeAI'
+
+    set_llm_backend(FakeStreamingBackend())
+    assert type(agent.get_chat_model()).__name__ == 'FakeListLLM'
+
+
+def test_chat_model_set_explicitly_lasts_until_the_backend_changes():
+    model = agent.fake_chat_model()
+    agent.set_chat_model(model)
+    set_llm_backend(FakeStreamingBackend(words=10))
+    assert agent.get_chat_model() is model
+
+    set_llm_backend(_GeminiLikeBackend())
+    assert agent.get_chat_model() is not model
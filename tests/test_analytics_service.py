@@ -0,0 +1,104 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+import agent
+from conftest import COMPETITION_ID, MATCH_ID, SEASON_ID
+from utils.analytics_service import AnalyticsClient, AnalyticsServer, AnalyticsService, ServiceError
+from utils.llm import FakeStreamingBackend
+from utils.narration import BROADCAST_STYLES
+
+SEASON = {'competition_id': COMPETITION_ID, 'season_id': SEASON_ID}
+
+
+@pytest.fixture
+def service():
+    service = AnalyticsService(workers=4, chat_model=agent.fake_chat_model(),
+                               llm_backend=FakeStreamingBackend(words=40, first_chunk_delay=0.3))
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def server(service):
+    with AnalyticsServer(service) as server:
+        yield server
+
+
+def _status(server, path: str, body: bytes = None) -> int:
+    request = Request(server.url + path, data=body, method='POST' if body is not None else 'GET',
+                      headers={'Content-Type': 'application/json'})
+    try:
+        with urlopen(request) as response:
+            return response.status
+    except HTTPError as e:
+        return e.code
+
+
+def test_identical_narrations_share_one_llm_call(service):
+    # Estilo exclusivo deste teste: a narração não está no cache do LLM
+    style = BROADCAST_STYLES[1]
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda _: service.narration(MATCH_ID, style, **SEASON), range(6)))
+
+    assert service.llm_backend.calls == 1
+    assert len({result['text'] for result in results}) == 1
+    assert service.stats()['coalesced'] >= 1
+
+
+def test_concurrent_questions_build_one_agent(service, monkeypatch):
+    builds = []
+    create_match_agent = agent.create_match_agent
+
+    def counting_create_match_agent(*args, **kwargs):
+        builds.append(kwargs.get('match_info'))
+        return create_match_agent(*args, **kwargs)
+
+    monkeypatch.setattr(agent, 'create_match_agent', counting_create_match_agent)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        answers = list(executor.map(lambda i: service.ask(MATCH_ID, f'question {i}', **SEASON), range(4)))
+
+    assert len(builds) == 1
+    assert all(answer['answer'] for answer in answers)
+
+
+def test_http_routes_and_error_codes(server):
+    assert _status(server, '/health') == 200
+    assert _status(server, f'/matches/{MATCH_ID}/events') == 200
+    assert _status(server, '/unknown') == 404
+    assert _status(server, '/matches/999999/events') == 404
+    assert _status(server, f'/matches/{MATCH_ID}/narration') == 405
+    assert _status(server, f'/matches/{MATCH_ID}/narration_prompt?style=Unknown') == 400
+    assert _status(server, f'/matches/{MATCH_ID}/narration_prompt?style=Formal'
+                           f'&competition_id=abc&season_id={SEASON_ID}') == 400
+    assert _status(server, f'/matches/{MATCH_ID}/ask', b'not json') == 400
+    assert _status(server, f'/matches/{MATCH_ID}/ask', b'[1, 2]') == 400
+    assert _status(server, f'/matches/{MATCH_ID}/ask', json.dumps({'question': ['list']}).encode()) == 400
+
+
+def test_client_matches_service(server, service):
+    client = AnalyticsClient(server.url)
+    assert client.player_stats(MATCH_ID) == service.player_stats(MATCH_ID)
+    prompt = client.narration_prompt(MATCH_ID, BROADCAST_STYLES[0], **SEASON)
+    assert prompt == service.narration_prompt(MATCH_ID, BROADCAST_STYLES[0], **SEASON)
+    with pytest.raises(ServiceError) as error:
+        client.events(999999)
+    assert error.value.status == 404
+
+
+def test_internal_errors_are_500_and_invalid_input_is_400(server, service, monkeypatch):
+    def broken_events(match_id):
+        raise KeyError('column missing after a pandas bug')
+
+    monkeypatch.setattr(service, '_events', broken_events)
+    assert _status(server, f'/matches/{MATCH_ID}/events') == 500
+    with pytest.raises(KeyError):
+        service.events(MATCH_ID)
+
+    assert _status(server, f'/matches/{MATCH_ID}/ask', json.dumps({'question': '  '}).encode()) == 400
+    with pytest.raises(ServiceError) as error:
+        service.ask(MATCH_ID, '', **SEASON)
+    assert error.value.status == 400
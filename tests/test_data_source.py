@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from conftest import COMPETITION_ID, MATCH_ID, OPEN_DATA_DIR, SEASON_ID
+from utils.cache_manager import cache_manager
+from utils.data_source import DataSourceError, LocalOpenDataSource, StatsBombSource
+from utils.open_data_server import LocalOpenDataServer
+
+# Sem credenciais o statsbombpy avisa que usa apenas os dados abertos
+pytestmark = pytest.mark.filterwarnings('ignore:credentials were not supplied')
+
+
+@pytest.fixture(scope='module')
+def statsbomb():
+    '''statsbombpy lendo a mesma cópia do open-data por HTTP; o cache em memória é refeito ao final'''
+    with LocalOpenDataServer(OPEN_DATA_DIR) as server:
+        cache_manager.configure(backend='memory', base_url=server.url)
+        try:
+            yield StatsBombSource()
+        finally:
+            cache_manager.configure(backend='memory')
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values('id').reset_index(drop=True).sort_index(axis=1)
+
+
+def test_local_source_reproduces_statsbombpy_formats(statsbomb):
+    local = LocalOpenDataSource(OPEN_DATA_DIR)
+
+    assert local.competitions() == statsbomb.competitions()
+    assert local.matches(COMPETITION_ID, SEASON_ID) == statsbomb.matches(COMPETITION_ID, SEASON_ID)
+    pd.testing.assert_frame_equal(_sorted(local.events(MATCH_ID)), _sorted(statsbomb.events(MATCH_ID)))
+
+    local_lineups, remote_lineups = local.lineups(MATCH_ID), statsbomb.lineups(MATCH_ID)
+    assert local_lineups.keys() == remote_lineups.keys()
+    for team, lineup in local_lineups.items():
+        pd.testing.assert_frame_equal(lineup, remote_lineups[team])
+
+
+def test_missing_file_raises_data_source_error():
+    with pytest.raises(DataSourceError):
+        LocalOpenDataSource(OPEN_DATA_DIR).events(999999)
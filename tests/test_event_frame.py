@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from conftest import MATCH_ID
+from utils.data_source import data_source
+from utils.event_frame import CATEGORICAL_COLUMNS, EVENT_COLUMNS, compact_events, event_locations, \
+    memory_report
+from utils.player_stats import compute_player_stats
+
+
+def test_compact_events_keep_values_with_less_memory():
+    events = data_source.events(MATCH_ID)
+    compact = compact_events(events)
+
+    assert set(compact.columns) <= set(EVENT_COLUMNS) | {'x', 'y', 'end_x', 'end_y'}
+    assert all(isinstance(compact[col].dtype, pd.CategoricalDtype) for col in CATEGORICAL_COLUMNS)
+    assert compact['minute'].dtype.itemsize < events['minute'].dtype.itemsize
+    for col in ['team', 'type', 'player', 'minute', 'period']:
+        assert compact[col].astype(object).equals(events[col].astype(object))
+    assert memory_report(events, compact)['bytes_saved'] > 0
+
+
+def test_locations_round_trip_to_statsbomb_lists():
+    events = data_source.events(MATCH_ID)
+    rebuilt = event_locations(compact_events(events), 'pass_end_location')
+
+    for original, location in zip(events['pass_end_location'], rebuilt):
+        if isinstance(original, list):
+            np.testing.assert_allclose(location, original, atol=0.01)
+        else:
+            assert np.isnan(location)
+
+
+def test_player_stats_are_the_same_on_compact_events():
+    events = data_source.events(MATCH_ID)
+    pd.testing.assert_frame_equal(compute_player_stats(compact_events(events)), compute_player_stats(events))
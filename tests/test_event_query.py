@@ -0,0 +1,69 @@
+import pytest
+
+import agent
+from conftest import MATCH_ID
+from utils.dataprep import get_player_stats_table, load_match_index, load_match_lineups
+from utils.event_query import MAX_LIMIT, EventQueryError, EventTable, parse_filters
+
+
+@pytest.fixture(scope='module')
+def index():
+    return load_match_index(MATCH_ID)
+
+
+def test_parse_filters_accepts_json_and_key_value_pairs():
+    assert parse_filters('{"player": "A", "type": "Shot"}') == {'player': 'A', 'type': 'Shot'}
+    assert parse_filters('player=A; type="Shot"') == {'player': 'A', 'type': 'Shot'}
+    assert parse_filters('`team=X, limit=5`') == {'team': 'X', 'limit': '5'}
+    assert parse_filters('') == parse_filters('all') == {}
+    with pytest.raises(EventQueryError):
+        parse_filters('{"colour": "red"}')
+    with pytest.raises(EventQueryError):
+        parse_filters('[1, 2]')
+
+
+def test_select_intersects_indexes_like_a_dataframe_filter(index):
+    events = index.events
+    team = index.home_team
+    player = index.players(team)[0]
+    expected = events.index[(events['team'] == team) & (events['player'] == player) &
+                            (events['type'] == 'Pass') & events['minute'].between(10, 60)]
+
+    positions = EventTable(index).select(player=player, team=team, type='pass',
+                                         minute_from=10, minute_to=60)
+    assert positions.tolist() == expected.tolist()
+
+
+def test_query_modes(index):
+    events, table = index.events, EventTable(index)
+    shots = int((events['type'] == 'Shot').sum())
+
+    page = table.query({'type': 'Shot', 'limit': 2, 'offset': 1})
+    assert page.startswith(f'matching_events: {shots} | showing 2-3')
+    assert len(page.split('\n')) == 2 + 2
+
+    aggregate = table.query({'team': index.home_team, 'aggregate': 'true'})
+    passes = int(((events['team'] == index.home_team) & (events['type'] == 'Pass')).sum())
+    assert f'Pass | {index.home_team}: {passes}' in aggregate
+
+    ranking = table.query({'type': 'Pass', 'top_n': 1})
+    top = events[events['type'] == 'Pass'].groupby('player', observed=True).size().max()
+    assert ranking.split('\n')[-1].endswith(f': {top}')
+
+    capped = table.query({'limit': 1000})
+    assert len(capped.split('\n')) == 2 + MAX_LIMIT
+
+    with pytest.raises(EventQueryError, match='No player matching'):
+        table.query({'player': 'Nobody'})
+
+
+def test_agent_tools_answer_filtered_slices(index):
+    executor = agent.create_match_agent({'home_team': index.home_team}, index, get_player_stats_table(MATCH_ID),
+                                        load_match_lineups(MATCH_ID), llm=agent.fake_chat_model())
+    tools = {tool.name: tool for tool in executor.tools}
+
+    assert tools['Match Events'].run('{"type": "Shot", "limit": 1}').startswith('matching_events:')
+    assert tools['Match Events'].run('{"colour": "red"}').startswith('Invalid input: Unknown filters')
+    stats = tools['Player Stats'].run('{"top_n": 2, "sort_by": "passes_completed"}')
+    assert stats.startswith('player_stats(') and len(stats.split('\n')) == 3
+    assert tools['Team Lineups'].run(f'team={index.away_team}').startswith(index.away_team)
@@ -0,0 +1,71 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+from utils.event_store import EventStore, EventStoreError
+
+
+def _table(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({'minute': range(rows), 'player': [f'Player {i}' for i in range(rows)],
+                         'location': [[float(i), 1.5] for i in range(rows)],
+                         'tactics': [{'formation': 433} if i == 0 else None for i in range(rows)]})
+
+
+def _write(root: str, match_id: int):
+    EventStore(root).write(match_id, _table(3))
+
+
+def test_round_trip_keeps_lists_and_nested_objects(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.write(1, _table(4))
+
+    df = store.read(1)
+    assert df['location'].iat[1] == [1.0, 1.5]
+    assert df['tactics'].iat[0] == {'formation': 433}
+    assert list(store.read(1, columns=['minute', 'missing']).columns) == ['minute']
+    with pytest.raises(EventStoreError):
+        store.read(2)
+
+
+def test_two_instances_see_and_keep_each_others_matches(tmp_path):
+    first, second = EventStore(str(tmp_path)), EventStore(str(tmp_path))
+    first.write(1, _table(2))
+    assert not first.contains(2)
+
+    second.write(2, _table(2))
+    assert first.contains(2)
+    first.write(3, _table(2))
+    assert all(EventStore(str(tmp_path)).contains(match_id) for match_id in (1, 2, 3))
+
+    second.remove(1)
+    assert not first.contains(1)
+    assert first.contains(2) and first.contains(3)
+
+
+def test_concurrent_processes_do_not_lose_manifest_entries(tmp_path):
+    match_ids = range(100, 132)
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_write, [str(tmp_path)] * len(match_ids), match_ids))
+    store = EventStore(str(tmp_path))
+    assert all(store.contains(match_id) for match_id in match_ids)
+
+
+def test_version_changes_when_another_instance_rewrites(tmp_path):
+    reader, writer = EventStore(str(tmp_path)), EventStore(str(tmp_path))
+    assert reader.version(1) is None
+    writer.write(1, _table(2))
+    version = reader.version(1)
+    assert version is not None
+
+    writer.write(1, _table(5))
+    assert reader.version(1) != version
+    assert len(reader.read(1)) == 5
+
+
+def test_schema_mismatch_is_not_contained(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.write(1, _table(2), kind='player_stats', schema=1)
+    assert store.contains(1, kind='player_stats')
+    assert store.contains(1, kind='player_stats', schema=1)
+    assert not store.contains(1, kind='player_stats', schema=2)
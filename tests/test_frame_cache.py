@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.frame_cache import FrameCache
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({'value': np.arange(rows, dtype='int64')})
+
+
+def test_lru_evicts_least_recently_used_under_memory_cap():
+    size_mb = _frame(10_000).memory_usage(deep=True).sum() / (1024 * 1024)
+    cache = FrameCache(max_mb=size_mb * 2.5)
+    cache.put('a', _frame(10_000))
+    cache.put('b', _frame(10_000))
+    assert cache.get('a') is not None
+
+    cache.put('c', _frame(10_000))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_value_larger_than_cap_is_not_stored():
+    cache = FrameCache(max_mb=0.001)
+    cache.put('big', _frame(10_000))
+    assert cache.get('big') is None and cache.stats()['entries'] == 0
+
+
+def test_concurrent_get_or_load_runs_loader_once():
+    cache = FrameCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return _frame(10)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: cache.get_or_load('key', loader), range(8)))
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_get_or_load_reloads_when_version_changes():
+    cache = FrameCache()
+    version = ['v1']
+    first = cache.get_or_load('key', lambda: _frame(1), version=lambda: version[0])
+    assert cache.get_or_load('key', lambda: _frame(2), version=lambda: version[0]) is first
+
+    version[0] = 'v2'
+    second = cache.get_or_load('key', lambda: _frame(2), version=lambda: version[0])
+    assert second is not first and len(second) == 2
+
+
+def test_failed_load_is_not_cached():
+    cache = FrameCache()
+
+    def failing():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load('key', failing)
+    assert cache.get_or_load('key', lambda: _frame(3)).shape == (3, 1)
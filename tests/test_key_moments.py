@@ -0,0 +1,71 @@
+import pandas as pd
+
+from conftest import MATCH_ID
+from utils.dataprep import get_player_stats_table, load_match_events
+from utils.key_moments import MAX_TIMELINE_EVENTS, encode_key_moments, extract_key_moments, \
+    key_event_timeline, window_aggregates
+from utils.player_stats import compute_player_stats
+
+
+def _event(period, minute, team, event_type, player=None, **columns) -> dict:
+    return {'period': period, 'minute': minute, 'second': 0, 'team': team, 'type': event_type,
+            'player': player, **columns}
+
+
+def _shootout_match() -> pd.DataFrame:
+    '''1 a 1 no tempo de jogo, prorrogação sem gols e seis cobranças na disputa de pênaltis'''
+    events = [_event(1, minute, team, 'Pass', f'{team} 1')
+              for minute in range(0, 120, 3) for team in ('X', 'Y')]
+    events = [{**event, 'period': 1 if event['minute'] < 45 else 2 if event['minute'] < 90 else
+               3 if event['minute'] < 105 else 4} for event in events]
+    events += [
+        _event(1, 20, 'X', 'Shot', 'X 9', shot_outcome='Goal', shot_statsbomb_xg=0.4),
+        _event(2, 70, 'Y', 'Shot', 'Y 9', shot_outcome='Goal', shot_statsbomb_xg=0.3),
+        _event(3, 100, 'X', 'Shot', 'X 9', shot_outcome='Saved', shot_statsbomb_xg=0.1),
+    ]
+    events += [_event(5, 121 + kick, 'X' if kick % 2 == 0 else 'Y', 'Shot', f'Kicker {kick}',
+                      shot_outcome='Goal' if kick < 4 else 'Saved', shot_type='Penalty',
+                      shot_statsbomb_xg=0.78)
+               for kick in range(6)]
+    return pd.DataFrame(events)
+
+
+def test_shootout_kicks_are_not_goals():
+    timeline = key_event_timeline(_shootout_match())
+
+    assert (timeline['kind'] == 'Goal').sum() == 2
+    shootout = timeline[timeline['kind'] == 'Shootout']
+    assert len(shootout) == 6
+    assert shootout['detail'].tolist() == ['Goal'] * 4 + ['Saved'] * 2
+
+
+def test_extra_time_has_its_own_windows_and_shootout_is_left_out():
+    events = _shootout_match()
+    windows = window_aggregates(events)
+
+    assert windows['window'].unique().tolist() == ['0-15', '15-30', '30-45', '45-60', '60-75', '75+',
+                                                    '90-105', '105+']
+    assert windows['shots'].sum() == 3
+    in_play = events[events['period'] != 5]
+    assert windows['events'].sum() == len(in_play)
+
+
+def test_regular_match_summary_is_bounded():
+    events = load_match_events(MATCH_ID)
+    moments = extract_key_moments(events, get_player_stats_table(MATCH_ID))
+
+    assert len(moments['timeline']) <= MAX_TIMELINE_EVENTS
+    assert moments['windows']['window'].iloc[-1] == '75+'
+    assert moments['windows']['events'].sum() == len(events)
+    goals = int(((events['type'] == 'Shot') & (events['shot_outcome'] == 'Goal')).sum())
+    assert (moments['timeline']['kind'] == 'Goal').sum() == goals
+    assert 'key_events(' in encode_key_moments(moments)
+
+
+def test_top_performers_ignore_shootout_goals():
+    events = _shootout_match()
+    moments = extract_key_moments(events, compute_player_stats(events))
+
+    top = moments['top_performers']
+    assert top.index[0] == 'X 9' and top.loc['X 9', 'goals'] == 1
+    assert top['goals'].sum() == 2
@@ -0,0 +1,83 @@
+import pytest
+
+from utils.instrumentation import tracer
+from utils.llm import FakeStreamingBackend, cached_response, generate_response, split_chunks, stream_response
+
+
+class _ScriptedBackend:
+    '''Backend com pedaços e motivo de término fixos, como o GeminiBackend os informa'''
+
+    def __init__(self, chunks: list, finish_reason: str = None):
+        self.chunks = chunks
+        self.finish_reason = finish_reason
+
+    def stream(self, prompt, model, config):
+        yield from self.chunks
+        if self.finish_reason is not None:
+            tracer.annotate(finish_reason=self.finish_reason)
+
+
+class _FailingBackend:
+    '''Backend que entrega alguns pedaços e falha no meio do streaming (ex.: conexão interrompida)'''
+
+    def __init__(self, chunks: list):
+        self.chunks = chunks
+
+    def stream(self, prompt, model, config):
+        yield from self.chunks
+        raise ConnectionError('stream interrupted')
+
+
+def test_chunks_arrive_in_order_before_generation_ends():
+    backend = FakeStreamingBackend(words=30, chunk_words=4, delay=0.01)
+    scope = {'kind': 'test', 'case': 'order'}
+    stream = stream_response('prompt', scope, backend=backend)
+
+    first = next(stream)
+    # O primeiro pedaço chega antes do fim da geração: nada foi gravado no cache ainda
+    assert cached_response('prompt', scope) is None
+    chunks = [first, *stream]
+    assert chunks == list(split_chunks(backend._text('prompt'), 4))
+    assert cached_response('prompt', scope) == ''.join(chunks)
+
+
+def test_response_is_cached_and_replayed():
+    backend = FakeStreamingBackend(words=30)
+    scope = {'kind': 'test', 'case': 'replay'}
+    text = generate_response('prompt', scope, backend=backend)
+
+    assert cached_response('prompt', scope) == text
+    assert ''.join(stream_response('prompt', scope, backend=backend)) == text
+    assert backend.calls == 1
+
+
+def test_empty_or_incomplete_responses_are_not_cached():
+    cases = {
+        'empty': _ScriptedBackend([]),
+        'blank': _ScriptedBackend(['  '], 'STOP'),
+        'safety': _ScriptedBackend(['Partial'], 'SAFETY'),
+        'blocked': _ScriptedBackend([], 'BLOCKED_SAFETY'),
+    }
+    for case, backend in cases.items():
+        scope = {'kind': 'test', 'case': case}
+        generate_response('prompt', scope, backend=backend)
+        assert cached_response('prompt', scope) is None, case
+
+    scope = {'kind': 'test', 'case': 'truncated_by_limit'}
+    generate_response('prompt', scope, backend=_ScriptedBackend(['Complete'], 'MAX_TOKENS'))
+    assert cached_response('prompt', scope) == 'Complete'
+
+
+def test_mid_stream_error_propagates_and_is_not_cached():
+    scope = {'kind': 'test', 'case': 'mid_stream_error'}
+    received = []
+    with pytest.raises(ConnectionError):
+        for chunk in stream_response('prompt', scope, backend=_FailingBackend(['Partial ', 'text'])):
+            received.append(chunk)
+
+    assert received == ['Partial ', 'text']
+    assert cached_response('prompt', scope) is None
+    # A próxima chamada gera a resposta de novo
+    backend = FakeStreamingBackend(words=10)
+    assert generate_response('prompt', scope, backend=backend) == cached_response('prompt', scope)
+    assert backend.calls == 1
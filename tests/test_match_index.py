@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from conftest import MATCH_ID
+from utils.data_source import data_source
+from utils.dataprep import load_match_events
+from utils.match_index import MatchIndex, chronological
+
+
+@pytest.fixture(scope='module')
+def index():
+    return MatchIndex(load_match_events(MATCH_ID))
+
+
+def _expected(events: pd.DataFrame, team=None, player=None, type=None, minute_from=None, minute_to=None):
+    mask = pd.Series(True, index=events.index)
+    for column, value in (('team', team), ('player', player), ('type', type)):
+        if value is not None:
+            mask &= events[column] == value
+    if minute_from is not None:
+        mask &= events['minute'] >= minute_from
+    if minute_to is not None:
+        mask &= events['minute'] <= minute_to
+    return events.index[mask].tolist()
+
+
+@pytest.mark.parametrize('minutes', [(None, None), (15, 44), (10, 50), (None, 30), (80, None)])
+def test_rows_match_a_dataframe_filter(index, minutes):
+    team = index.home_team
+    player = index.players(team)[1]
+    for filters in ({'team': team}, {'team': team, 'type': 'Pass'}, {'player': player, 'type': 'Pass'}, {}):
+        assert index.rows(**filters, minute_from=minutes[0], minute_to=minutes[1]).tolist() == \
+            _expected(index.events, **filters, minute_from=minutes[0], minute_to=minutes[1])
+
+
+def test_unknown_values_and_team_resolution(index):
+    assert index.rows(player='Nobody').size == 0
+    assert index.rows(team=index.home_team, player='Nobody').size == 0
+
+    events = index.events
+    assert index.home_team == events.loc[events['type'] == 'Starting XI', 'team'].iloc[0]
+    assert set(index.teams) == set(events['team'].dropna().unique())
+    assert set(index.players()) == set(events['player'].dropna().unique())
+
+
+def test_chronological_orders_by_statsbomb_index():
+    events = data_source.events(MATCH_ID).sample(frac=1, random_state=0)
+    ordered = chronological(events)
+    assert ordered['index'].is_monotonic_increasing and ordered.index.tolist() == list(range(len(events)))
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from conftest import MATCH_ID
+from utils.dataprep import load_match_events, load_retrieval_index
+from utils.match_index import MatchIndex
+from utils.match_retrieval import RETRIEVAL_MAX_CHUNK_CHARS, RETRIEVAL_MAX_TOP_K, build_retrieval_index, \
+    tokenize
+from utils.player_stats import compute_player_stats
+
+
+@pytest.fixture(scope='module')
+def index():
+    return load_retrieval_index(MATCH_ID)
+
+
+def _goals(events: pd.DataFrame) -> pd.DataFrame:
+    return events[(events['type'] == 'Shot') & (events['shot_outcome'] == 'Goal')]
+
+
+def test_tokenize_normalizes_accents_stopwords_and_suffixes():
+    assert tokenize('Who assisted the Goals of Müller?') == ['assist', 'goal', 'muller']
+
+
+def test_ordinal_goal_question_finds_that_goal(index):
+    second = _goals(load_match_events(MATCH_ID)).iloc[1]
+    _, chunk = index.search('who scored the second goal of the match', top_k=1)[0]
+
+    assert chunk.kind == 'goal' and chunk.title.startswith('second goal of the match')
+    assert f"Goal scored by {second['player']} ({second['team']})" in chunk.text
+
+
+def test_named_player_is_pinned_and_filters_the_results(index):
+    # 'Barcelona Player 1' está contido no nome citado e não conta como citação
+    results = index.search('passes by Barcelona Player 10', top_k=5)
+
+    assert results[0][1].kind == 'player' and results[0][1].title.startswith('Barcelona Player 10 (')
+    assert all('Barcelona Player 10' in chunk.entities for _, chunk in results)
+
+
+def test_render_is_bounded(index):
+    text = index.render('pass shot foul minute', top_k=100)
+    passages = text.split('\n\n')
+
+    assert len(passages) == RETRIEVAL_MAX_TOP_K
+    assert all(len(passage.split('\n', 1)[1]) <= RETRIEVAL_MAX_CHUNK_CHARS + 4 for passage in passages)
+    assert index.render('zzzz qqqq').startswith('No matching passages')
+
+
+def test_shootout_kicks_get_their_own_chunk():
+    events = [{'index': i, 'period': 1 if minute < 45 else 2, 'minute': minute, 'second': 0,
+               'team': team, 'type': 'Pass', 'player': f'{team} Midfielder'}
+              for i, (minute, team) in enumerate((m, t) for m in range(0, 90, 5) for t in ('Home', 'Away'))]
+    events[0]['type'] = 'Starting XI'
+    events += [
+        {'index': 100, 'period': 1, 'minute': 30, 'second': 0, 'team': 'Home', 'type': 'Shot',
+         'player': 'Home Striker', 'shot_outcome': 'Goal'},
+        {'index': 101, 'period': 2, 'minute': 80, 'second': 0, 'team': 'Away', 'type': 'Shot',
+         'player': 'Away Striker', 'shot_outcome': 'Goal'},
+    ]
+    events += [{'index': 200 + kick, 'period': 5, 'minute': 120, 'second': kick, 'team': team,
+                'type': 'Shot', 'player': f'{team} Kicker {kick}', 'shot_outcome': outcome}
+               for kick, (team, outcome) in enumerate([('Home', 'Goal'), ('Away', 'Saved'),
+                                                       ('Home', 'Goal'), ('Away', 'Goal')])]
+    events = pd.DataFrame(events)
+    retrieval = build_retrieval_index(MatchIndex(events), compute_player_stats(events), {})
+
+    goals = [chunk for chunk in retrieval.chunks if chunk.kind == 'goal']
+    assert len(goals) == 2
+    assert 'Score after the goal: Home 1 - 1 Away' in goals[-1].text
+    shootout = next(chunk for chunk in retrieval.chunks if chunk.kind == 'shootout')
+    assert shootout.text.startswith('Penalty shootout (not counted in the match score): Home 2 - 1 Away')
+    assert retrieval.search('penalty shootout', top_k=1)[0][1] is shootout
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import COMPETITION_ID, OPEN_DATA_DIR, SEASON_ID
+from utils.cache_manager import cache_manager
+from utils.data_source import data_source
+from utils.dataprep import load_match_events, load_match_index
+from utils.event_store import EventStore, event_store
+from utils.match_sync import MatchSync
+from utils.pass_map import render_pass_map, render_pass_network
+from utils.season_stats import SeasonStats
+
+
+class _OpenDataHandler(BaseHTTPRequestHandler):
+    '''Servidor do open-data com ETag: responde 304 quando If-None-Match confere'''
+
+    def __init__(self, *args, requests: list, **kwargs):
+        self.requests = requests
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = os.path.join(OPEN_DATA_DIR, *self.path.lstrip('/').split('/'))
+        if not os.path.exists(path):
+            self.send_response(404)
+            self.end_headers()
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        self.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def http_source():
+    '''Fonte 'statsbomb' apontada para o servidor local; a fonte local é restaurada ao final'''
+    requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), partial(_OpenDataHandler, requests=requests))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address[:2]
+    cache_manager.configure(backend='memory', base_url=f'http://{host}:{port}')
+    data_source.configure('statsbomb')
+    try:
+        yield requests
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        data_source.configure('local', OPEN_DATA_DIR)
+        cache_manager.configure(backend='memory')
+
+
+def test_local_listing_unchanged_costs_one_read(tmp_path):
+    sync = MatchSync(root=str(tmp_path))
+    first = sync.sync(COMPETITION_ID, SEASON_ID, workers=2)
+    assert first['listing'] == 'modified'
+    assert first['new'] and not first['failed']
+
+    second = sync.sync(COMPETITION_ID, SEASON_ID, workers=2)
+    assert second['listing'] == 'not_modified'
+    assert second['requests'] == 1
+    assert not (second['new'] or second['changed'] or second['removed'])
+
+
+def test_http_listing_not_modified_returns_304(tmp_path, http_source):
+    sync = MatchSync(root=str(tmp_path))
+    state = sync.state(COMPETITION_ID, SEASON_ID)
+
+    matches, validators = sync.fetch_listing(COMPETITION_ID, SEASON_ID, state)
+    assert matches and validators['etag']
+
+    state.update(validators)
+    matches, _ = sync.fetch_listing(COMPETITION_ID, SEASON_ID, state)
+    assert matches is None
+    listing_path = f'/data/matches/{COMPETITION_ID}/{SEASON_ID}.json'
+    assert http_source[-1] == (listing_path, validators['etag'])
+
+    # force ignora os validadores e busca a listagem completa
+    matches, _ = sync.fetch_listing(COMPETITION_ID, SEASON_ID, state, force=True)
+    assert matches and http_source[-1] == (listing_path, None)
+
+
+def test_app_cache_reloads_match_rewritten_by_another_process():
+    match_id = 1002
+    events = load_match_events(match_id)
+    assert load_match_events(match_id) is events
+
+    # Outro processo (ex.: sync.py) grava a partida de novo no mesmo diretório
+    other = EventStore(event_store.root)
+    other.write(match_id, other.read(match_id).head(100))
+    reloaded = load_match_events(match_id)
+    assert reloaded is not events and len(reloaded) == 100
+
+    other.write(match_id, data_source.events(match_id))
+    assert len(load_match_events(match_id)) == len(events)
+
+
+def test_pass_maps_are_redrawn_after_another_process_rewrites_the_match():
+    match_id = 1003
+    index = load_match_index(match_id)
+    team = index.home_team
+    player = index.players(team)[0]
+    image, network = render_pass_map(match_id, team, player), render_pass_network(match_id, team)
+    assert render_pass_map(match_id, team, player) is image
+
+    other = EventStore(event_store.root)
+    other.write(match_id, other.read(match_id).head(200))
+    assert render_pass_map(match_id, team, player) is not image
+    assert render_pass_network(match_id, team) is not network
+
+
+def _update_season(root: str, match_ids: list):
+    SeasonStats(root).update(COMPETITION_ID, SEASON_ID, match_ids=match_ids, workers=1)
+
+
+def test_season_table_reloads_after_another_process_updates_it(tmp_path):
+    app = SeasonStats(str(tmp_path))
+    app.update(COMPETITION_ID, SEASON_ID, match_ids=[1001], workers=1)
+    table = app.table(COMPETITION_ID, SEASON_ID)
+    assert app.table(COMPETITION_ID, SEASON_ID) is table and table['matches'].max() == 1
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        executor.submit(_update_season, str(tmp_path), [1001, 1002]).result()
+    reloaded = app.table(COMPETITION_ID, SEASON_ID)
+    assert reloaded is not table and reloaded['matches'].max() == 2
@@ -0,0 +1,61 @@
+import pytest
+
+import narrate
+from conftest import COMPETITION_ID, MATCH_ID, SEASON_ID
+from utils.analytics_service import ServiceError
+from utils.llm import RateLimiter
+
+
+class _CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(0)
+        self.acquired = 0
+
+    def acquire(self) -> float:
+        self.acquired += 1
+        return 0.0
+
+
+class _FlakyService:
+    '''Serviço remoto que falha com 503 nas primeiras chamadas de cada narração (partida e estilo)'''
+
+    def __init__(self, failures: int = 1, status: int = 503):
+        self.failures = failures
+        self.status = status
+        self.calls = []
+
+    def narration(self, match_id, style, regenerate=False, competition_id=None, season_id=None):
+        self.calls.append((match_id, style))
+        if self.calls.count((match_id, style)) <= self.failures:
+            raise ServiceError('temporarily unavailable', status=self.status)
+        return {'match_id': match_id, 'style': style, 'text': 'ok', 'cached': False}
+
+
+def test_remote_narrations_use_the_rate_limiter_and_retry():
+    service, limiter = _FlakyService(failures=1), _CountingLimiter()
+    results = narrate.narrate_match_remote(service, MATCH_ID, ['Formal', 'Técnico'], COMPETITION_ID,
+                                           SEASON_ID, limiter, retries=3, backoff=0)
+
+    assert results == {'Formal': 'generated', 'Técnico': 'generated'}
+    assert len(service.calls) == limiter.acquired == 4
+
+
+def test_remote_client_errors_are_not_retried():
+    service, limiter = _FlakyService(failures=5, status=404), _CountingLimiter()
+    with pytest.raises(ServiceError):
+        narrate.narrate_match_remote(service, MATCH_ID, ['Formal'], COMPETITION_ID, SEASON_ID,
+                                     limiter, retries=3, backoff=0)
+    assert limiter.acquired == 1
+
+
+def test_season_passes_rpm_and_retries_to_the_service(monkeypatch):
+    service = _FlakyService(failures=2)
+    waits = []
+    monkeypatch.setattr(narrate.RateLimiter, 'acquire', lambda self: waits.append(self.interval) or 0.0)
+    monkeypatch.setattr(narrate.time, 'sleep', lambda seconds: None)
+    state = narrate.narrate_season(COMPETITION_ID, SEASON_ID, styles=['Formal'], concurrency=2,
+                                   requests_per_minute=600, retries=3, service=service)
+
+    assert not state['failed'] and state['generated'] > 0
+    assert len(waits) == len(service.calls) == state['generated'] * 3
+    assert set(waits) == {0.1}
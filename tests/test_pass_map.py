@@ -0,0 +1,51 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from conftest import MATCH_ID
+from utils.dataprep import load_match_index
+from utils.event_frame import event_xy
+from utils.pass_map import draw_pass_network, pass_arrays, render_pass_map, render_pass_network
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+@pytest.fixture(scope='module')
+def index():
+    return load_match_index(MATCH_ID)
+
+
+def test_pass_arrays_match_the_player_passes(index):
+    team = index.home_team
+    player = index.players(team)[0]
+    passes = pass_arrays(index, team, player)
+
+    events = index.events
+    expected = events[(events['team'] == team) & (events['player'] == player) & (events['type'] == 'Pass')]
+    x, y = event_xy(expected, 'location')
+    np.testing.assert_array_equal(passes['x'], x.to_numpy())
+    np.testing.assert_array_equal(passes['y'], y.to_numpy())
+    np.testing.assert_array_equal(passes['completed'], expected['pass_outcome'].isna().to_numpy())
+    assert set(passes['player']) == {player}
+
+
+def test_pass_network_links_players_by_completed_passes(index):
+    passes = pass_arrays(index, index.home_team)
+    fig = draw_pass_network(passes, min_passes=1)
+    # Um ponto por passador com passe concluído para um companheiro identificado
+    passers = {player for player, recipient, completed in
+               zip(passes['player'], passes['recipient'], passes['completed'])
+               if completed and isinstance(recipient, str)}
+    assert len(fig.axes[0].texts) == len(passers)
+    plt.close(fig)
+
+
+def test_renders_are_png_and_generated_once(index):
+    team = index.home_team
+    player = index.players(team)[0]
+    image = render_pass_map(MATCH_ID, team, player)
+    assert image.startswith(PNG_SIGNATURE)
+    assert render_pass_map(MATCH_ID, team, player) is image
+
+    network = render_pass_network(MATCH_ID, team)
+    assert network.startswith(PNG_SIGNATURE) and render_pass_network(MATCH_ID, team) is network
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from conftest import MATCH_ID
+from utils.data_source import data_source
+from utils.player_stats import METRICS, compute_player_stats, player_stats_records
+
+
+def _baseline_statistics(events: pd.DataFrame) -> dict:
+    '''Cálculo original, jogador por jogador, de get_player_stats (sem minutes_played)'''
+    stats = {}
+    for player in events['player'].dropna().unique():
+        player_events = events[events['player'] == player]
+        stats[player] = {
+            "passes_completed": int(player_events[(player_events['type'] == 'Pass') & (player_events['pass_outcome'].isna())].shape[0]),
+            "passes_attempted": int(player_events[player_events['type'] == 'Pass'].shape[0]),
+            "shots": int(player_events[player_events['type'] == 'Shot'].shape[0]),
+            "shots_on_target": int(player_events[(player_events['type'] == 'Shot') & (player_events['shot_outcome'] == 'On Target')].shape[0]),
+            "goals": int(player_events[(player_events['type'] == 'Shot') & (player_events['shot_outcome'] == 'Goal')].shape[0]),
+            "assists": int(player_events[player_events['pass_goal_assist'] == True].shape[0]),  # noqa: E712
+            "fouls_committed": int(player_events[player_events['type'] == 'Foul Committed'].shape[0]),
+            "fouls_won": int(player_events[player_events['type'] == 'Foul Won'].shape[0]),
+            "tackles": int(player_events[player_events['type'] == 'Tackle'].shape[0]),
+            "interceptions": int(player_events[player_events['type'] == 'Interception'].shape[0]),
+        }
+    return stats
+
+
+def test_records_match_the_per_player_baseline():
+    events = data_source.events(MATCH_ID)
+    # As partidas sintéticas não têm assistências: alguns passes viram assistência
+    passes = events.index[events['type'] == 'Pass']
+    events = events.assign(pass_goal_assist=pd.Series(True, index=passes[::50]))
+    records = player_stats_records(compute_player_stats(events))
+    baseline = _baseline_statistics(events)
+
+    assert sorted(record['player'] for record in records) == sorted(baseline)
+    for record in records:
+        statistics = dict(record['statistics'])
+        assert statistics.pop('minutes_played') >= 0
+        assert statistics == baseline[record['player']]
+        assert record['team'] == events.loc[events['player'] == record['player'], 'team'].iloc[0]
+
+
+def test_missing_optional_columns_count_as_zero():
+    events = pd.DataFrame([
+        {'period': 1, 'minute': 1, 'second': 0, 'type': 'Pass', 'team': 'X', 'player': 'A'},
+        {'period': 1, 'minute': 2, 'second': 0, 'type': 'Shot', 'team': 'X', 'player': 'A'},
+    ])
+    table = compute_player_stats(events)
+
+    assert table.loc['A', 'passes_completed'] == 1 and table.loc['A', 'shots'] == 1
+    assert all(table.loc['A', metric.key] == 0 for metric in METRICS
+               if metric.key not in ('passes_completed', 'passes_attempted', 'shots'))
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from conftest import MATCH_ID
+from utils.dataprep import load_match_events
+from utils.prompt_encoder import encode_events, encode_table
+
+
+def _decode(text: str) -> tuple:
+    '''Lê o texto de encode_events de volta: dicionários e linhas de eventos'''
+    header, rows = text.split('events(minute,second,team,player,type,outcome,x,y,end_x,end_y):\n')
+    dictionaries = {}
+    for line in header.strip().split('\n'):
+        name, values = line.split(': ', 1)
+        dictionaries[name] = [value.split('=', 1)[1] for value in values.split('|')] if values else []
+    return dictionaries, [row.split(',') for row in rows.split('\n')]
+
+
+def test_encoded_events_decode_back_to_the_events():
+    events = load_match_events(MATCH_ID)
+    encoded = encode_events(events, budget_tokens=10 ** 7)
+    dictionaries, rows = _decode(encoded.text)
+
+    assert encoded.rows_kept == encoded.rows_total == len(events) == len(rows)
+    assert encoded.tokens_after < encoded.tokens_before
+    events = events.sort_values(['period', 'minute', 'second']).reset_index(drop=True)
+    for (_, event), row in zip(events.iterrows(), rows):
+        minute, second, team, player, event_type = row[:5]
+        assert int(minute) == event['minute'] and int(second) == event['second']
+        assert dictionaries['teams'][int(team)] == event['team']
+        assert dictionaries['types'][int(event_type)] == event['type']
+        if pd.isna(event['player']):
+            assert player == ''
+        else:
+            assert dictionaries['players'][int(player)] == event['player']
+
+
+def test_budget_drops_low_priority_events_first_and_keeps_order():
+    events = load_match_events(MATCH_ID)
+    full = encode_events(events, budget_tokens=10 ** 7)
+    budget = full.tokens_after // 4
+    encoded = encode_events(events, budget_tokens=budget)
+    dictionaries, rows = _decode(encoded.text)
+
+    assert encoded.tokens_after <= budget
+    assert 0 < encoded.rows_kept < encoded.rows_total
+    kept_types = [dictionaries['types'][int(row[4])] for row in rows]
+    assert kept_types.count('Shot') == int((events['type'] == 'Shot').sum())
+    assert 'Ball Receipt*' not in kept_types
+    clock = [(int(row[0]), int(row[1])) for row in rows]
+    assert clock == sorted(clock)
+
+
+def test_encode_table_drops_all_zero_columns():
+    table = pd.DataFrame({'goals': [1, 0], 'red_cards': [0, 0]}, index=pd.Index(['A', 'B'], name='player'))
+    assert encode_table('stats', table) == 'stats(player,goals):\nA,1\nB,0'
@@ -0,0 +1,78 @@
+import pandas as pd
+
+from conftest import COMPETITION_ID, SEASON_ID
+from utils.player_stats import METRICS, PLAYER_STATS_COLUMNS, compute_player_stats, minutes_played
+from utils.season_stats import SEASON_ROW_COLUMNS, SeasonStats, aggregate_season, season_profile_stats
+
+
+def _rows(records: list) -> pd.DataFrame:
+    rows = pd.DataFrame(records)
+    for column in PLAYER_STATS_COLUMNS:
+        if column not in rows:
+            rows[column] = 0
+    return rows[SEASON_ROW_COLUMNS]
+
+
+def test_aggregate_season_sums_matches_and_computes_per90():
+    rows = _rows([
+        {'match_id': 1, 'player': 'A', 'team': 'X', 'minutes_played': 90, 'shots': 3, 'goals': 1},
+        {'match_id': 2, 'player': 'A', 'team': 'Y', 'minutes_played': 45, 'shots': 1, 'goals': 1},
+        {'match_id': 2, 'player': 'B', 'team': 'Y', 'minutes_played': 30, 'shots': 2},
+    ])
+    table = aggregate_season(rows, min_minutes=90)
+
+    assert table.loc['A', 'matches'] == 2
+    assert table.loc['A', 'minutes_played'] == 135
+    assert table.loc['A', 'shots'] == 4
+    # Time da última partida do jogador
+    assert table.loc['A', 'team'] == 'Y'
+    assert table.loc['A', 'shots_per90'] == round(4 / 135 * 90, 2)
+    # Abaixo do mínimo de minutos as taxas ficam nulas
+    assert pd.isna(table.loc['B', 'shots_per90'])
+
+
+def test_aggregate_season_empty_and_profile_labels():
+    empty = aggregate_season(pd.DataFrame(columns=SEASON_ROW_COLUMNS))
+    assert empty.empty and 'shots_per90' in empty
+
+    table = aggregate_season(_rows([{'match_id': 1, 'player': 'A', 'team': 'X',
+                                     'minutes_played': 180, 'shots': 4}]))
+    stats = season_profile_stats(table, 'A')
+    shots = next(metric.label for metric in METRICS if metric.key == 'shots')
+    assert stats['Minutos'] == 180 and stats[shots] == 4 and stats[f'{shots} por 90'] == 2.0
+    assert season_profile_stats(table, 'Missing') is None
+
+
+def test_minutes_played_follows_substitutions_and_sending_offs():
+    lineup = {'lineup': [{'player': {'name': name}} for name in ('A', 'B', 'C')]}
+    events = pd.DataFrame([
+        {'period': 1, 'minute': 0, 'second': 0, 'type': 'Starting XI', 'team': 'X', 'tactics': lineup},
+        {'period': 1, 'minute': 10, 'second': 0, 'type': 'Pass', 'team': 'X', 'player': 'A'},
+        {'period': 1, 'minute': 40, 'second': 0, 'type': 'Pass', 'team': 'X', 'player': 'B'},
+        {'period': 2, 'minute': 60, 'second': 0, 'type': 'Substitution', 'team': 'X', 'player': 'B',
+         'substitution_replacement': 'D'},
+        {'period': 2, 'minute': 70, 'second': 0, 'type': 'Foul Committed', 'team': 'X', 'player': 'C',
+         'foul_committed_card': 'Red Card'},
+        {'period': 2, 'minute': 75, 'second': 0, 'type': 'Pass', 'team': 'X', 'player': 'D'},
+        {'period': 2, 'minute': 90, 'second': 0, 'type': 'Pass', 'team': 'X', 'player': 'A'},
+        # Disputa de pênaltis não conta como tempo de jogo
+        {'period': 5, 'minute': 125, 'second': 0, 'type': 'Shot', 'team': 'X', 'player': 'A'},
+    ])
+
+    assert minutes_played(events).to_dict() == {'A': 90, 'B': 60, 'C': 70, 'D': 30}
+    assert compute_player_stats(events).loc['D', 'minutes_played'] == 30
+
+
+def test_update_is_incremental(tmp_path):
+    stats = SeasonStats(str(tmp_path))
+    first = stats.update(COMPETITION_ID, SEASON_ID, match_ids=[1001, 1002], workers=2)
+    assert first['added'] == [1001, 1002] and first['skipped'] == 0 and not first['failed']
+
+    second = stats.update(COMPETITION_ID, SEASON_ID, match_ids=[1001, 1002, 1003], workers=2)
+    assert second['added'] == [1003] and second['skipped'] == 2
+    assert stats.ingested(COMPETITION_ID, SEASON_ID) == {1001, 1002, 1003}
+
+    rows = stats.rows(COMPETITION_ID, SEASON_ID)
+    table = stats.table(COMPETITION_ID, SEASON_ID)
+    assert sorted(rows['match_id'].unique()) == [1001, 1002, 1003]
+    assert table['matches'].max() == 3 and table['minutes_played'].sum() == rows['minutes_played'].sum()
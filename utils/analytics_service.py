@@ -0,0 +1,457 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import Request, urlopen
+
+from utils.data_source import DataSourceError
+from utils.dataprep import GetMatchStats, get_player_stats_table, load_match_index, load_match_lineups, \
+    load_retrieval_index
+from utils.event_store import EventStoreError
+from utils.instrumentation import propagate_context, tracer
+from utils.llm import cached_response, generate_response
+from utils.match_catalog import match_catalog
+from utils.match_context import assemble_match_context
+from utils.narration import BROADCAST_STYLES, build_narration_prompt, narration_scope
+
+# Serviço de análise das partidas, independente do Streamlit: dados da partida (GetMatchStats),
+# prompt e texto da narração e perguntas ao agente, executados em um pool de workers.
+# Pode ser usado no próprio processo (analytics_service) ou via HTTP (serve.py + AnalyticsClient).
+
+# Número de workers que executam as operações (cálculos do pandas e chamadas ao LLM)
+ANALYTICS_WORKERS = int(os.getenv('ANALYTICS_WORKERS', '4'))
+# Se definido, o app e os jobs em lote usam o serviço remoto neste endereço (ex.: http://127.0.0.1:8502)
+ANALYTICS_SERVICE_URL = os.getenv('ANALYTICS_SERVICE_URL')
+# Tempo máximo de espera por uma operação, em segundos
+ANALYTICS_TIMEOUT = float(os.getenv('ANALYTICS_TIMEOUT', '180'))
+# Agentes de Q&A mantidos em memória (por partida)
+AGENT_CACHE_MAX_MATCHES = int(os.getenv('AGENT_CACHE_MAX_MATCHES', '16'))
+
+
+class ServiceError(Exception):
+    def __init__(self, message, status: int = 500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class AnalyticsService:
+    '''
+    API de análise das partidas com pool de workers e coalescência de requisições.
+
+    Requisições idênticas em andamento (mesma operação e mesmos parâmetros) compartilham uma
+    única execução: dez sessões pedindo a mesma narração ao mesmo tempo geram uma chamada ao LLM.
+    Os dados usam os caches do processo (frame_cache, event_store) e o cache persistente do LLM.
+    '''
+
+    OPERATIONS = ('events', 'lineups', 'player_stats', 'narration_prompt', 'narration', 'ask')
+
+    def __init__(self, workers: int = ANALYTICS_WORKERS, chat_model=None, llm_backend=None,
+                 max_agents: int = AGENT_CACHE_MAX_MATCHES):
+        '''
+        Args:
+            workers (int): Número de workers
+            chat_model: LLM dos agentes (padrão: agent.get_chat_model())
+            llm_backend: Backend das narrações (padrão: utils.llm.get_llm_backend())
+            max_agents (int): Número de agentes de Q&A mantidos em memória
+        '''
+        self.workers = workers
+        self.chat_model = chat_model
+        self.llm_backend = llm_backend
+        self.max_agents = max_agents
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analytics')
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._agents = OrderedDict()
+        self._agent_lock = threading.Lock()
+        # Um lock por partida em construção: perguntas simultâneas sobre a mesma partida aguardam um único agente
+        self._agent_builds = {}
+        self.counters = {'submitted': 0, 'coalesced': 0, 'completed': 0, 'failed': 0}
+
+    def submit(self, operation: str, **params):
+        '''
+        Agenda uma operação no pool de workers, reaproveitando uma execução idêntica em andamento.
+        Args:
+            operation (str): Nome da operação (OPERATIONS)
+            **params: Parâmetros da operação
+        Returns:
+            concurrent.futures.Future: Resultado da operação
+        '''
+        if operation not in self.OPERATIONS:
+            raise ServiceError(f'Unknown operation: {operation}', status=404)
+        key = (operation, tuple(sorted(params.items())))
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counters['coalesced'] += 1
+                return future
+            self.counters['submitted'] += 1
+            future = self._executor.submit(propagate_context(self._run), operation, params)
+            self._inflight[key] = future
+        future.add_done_callback(partial(self._done, key))
+        return future
+
+    def call(self, operation: str, timeout: float = ANALYTICS_TIMEOUT, **params):
+        '''Executa uma operação e aguarda o resultado (ver submit)'''
+        return self.submit(operation, **params).result(timeout=timeout)
+
+    def _done(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            self.counters['failed' if future.exception() else 'completed'] += 1
+
+    def _run(self, operation: str, params: dict):
+        # Dados ausentes viram 404; o status 400 vem apenas da validação explícita da entrada (_match_params,
+        # estilo e pergunta) e os demais erros chegam aos clientes HTTP como falhas do serviço (500)
+        with tracer.trace(f'service_{operation}', match_id=params.get('match_id')):
+            try:
+                return getattr(self, f'_{operation}')(**params)
+            except (DataSourceError, EventStoreError, FileNotFoundError) as e:
+                raise ServiceError(getattr(e, 'message', str(e)), status=404) from e
+
+    # Operações (executadas nos workers). Dados da partida retornam o JSON de GetMatchStats.
+
+    def _events(self, match_id: int) -> str:
+        return GetMatchStats(match_id, raise_errors=True).get_events()
+
+    def _lineups(self, match_id: int) -> str:
+        return GetMatchStats(match_id, raise_errors=True).get_lineups()
+
+    def _player_stats(self, match_id: int) -> str:
+        return GetMatchStats(match_id, raise_errors=True).get_player_stats()
+
+    def _narration_prompt(self, match_id: int, style: str, competition_id: int = None,
+                          season_id: int = None) -> str:
+        if style not in BROADCAST_STYLES:
+            raise ServiceError(f"Unknown style: {style}. Valid styles: {', '.join(BROADCAST_STYLES)}",
+                               status=400)
+        match_info = self._match_info(match_id, competition_id, season_id)
+        return build_narration_prompt(match_info, assemble_match_context(match_id), style)
+
+    def _narration(self, match_id: int, style: str, regenerate: bool = False,
+                   competition_id: int = None, season_id: int = None) -> dict:
+        prompt = self._narration_prompt(match_id, style, competition_id, season_id)
+        scope = narration_scope(match_id, style)
+        cached = None if regenerate else cached_response(prompt, scope)
+        text = cached if cached is not None else generate_response(
+            prompt, scope, bypass_cache=True, backend=self.llm_backend)
+        return {'match_id': match_id, 'style': style, 'text': text, 'cached': cached is not None}
+
+    def _ask(self, match_id: int, question: str, competition_id: int = None,
+             season_id: int = None) -> dict:
+        from agent import LLMSpanHandler
+
+        if not question.strip():
+            raise ServiceError('question must not be empty', status=400)
+        match_info = self._match_info(match_id, competition_id, season_id)
+        context = (f"{match_info['home_team_name']} vs {match_info['away_team_name']} "
+                   f"({match_info['match_date']})")
+        response = self._agent(match_id, match_info).invoke(
+            {'input': question, 'context': context}, config={'callbacks': [LLMSpanHandler()]})
+        return {'match_id': match_id, 'question': question, 'answer': response['output']}
+
+    def _match_info(self, match_id: int, competition_id: int = None, season_id: int = None) -> dict:
+        '''Informações da partida pelo catálogo, carregando a temporada se ela for informada'''
+        match_info = match_catalog.match_info(match_id)
+        if match_info is None and competition_id is not None and season_id is not None:
+            match_info = match_catalog.season_matches(competition_id, season_id).infos.get(match_id)
+        if match_info is None:
+            raise ServiceError(f'Match {match_id} not found in the loaded seasons; '
+                               f'pass competition_id and season_id', status=404)
+        return match_info
+
+    def _agent(self, match_id: int, match_info: dict):
+        '''
+        Agente de Q&A da partida, criado uma única vez e compartilhado entre requisições. O agente é
+        refeito quando os dados da partida mudam (o índice de busca em cache passa a ser outro objeto).
+        '''
+        from agent import create_match_agent, get_chat_model
+
+        retrieval_index = load_retrieval_index(match_id)
+        with self._agent_lock:
+            entry = self._agents.get(match_id)
+            if entry is not None and entry[0] is retrieval_index:
+                self._agents.move_to_end(match_id)
+                return entry[1]
+            build_lock = self._agent_builds.setdefault(match_id, threading.Lock())
+
+        with build_lock:
+            with self._agent_lock:
+                entry = self._agents.get(match_id)
+                if entry is not None and entry[0] is retrieval_index:
+                    self._agents.move_to_end(match_id)
+                    return entry[1]
+            try:
+                agent = create_match_agent(
+                    match_info=match_info,
+                    match_index=load_match_index(match_id),
+                    player_stats=get_player_stats_table(match_id),
+                    lineups=load_match_lineups(match_id),
+                    llm=self.chat_model or get_chat_model(),
+                    retrieval_index=retrieval_index
+                )
+                agent.verbose = False
+                with self._agent_lock:
+                    self._agents[match_id] = (retrieval_index, agent)
+                    while len(self._agents) > self.max_agents:
+                        self._agents.popitem(last=False)
+            finally:
+                with self._agent_lock:
+                    self._agent_builds.pop(match_id, None)
+        return agent
+
+    # API pública: mesmos métodos de AnalyticsClient
+
+    def events(self, match_id: int) -> list:
+        return json.loads(self.call('events', match_id=int(match_id)))
+
+    def lineups(self, match_id: int) -> dict:
+        return json.loads(self.call('lineups', match_id=int(match_id)))
+
+    def player_stats(self, match_id: int) -> list:
+        return json.loads(self.call('player_stats', match_id=int(match_id)))
+
+    def narration_prompt(self, match_id: int, style: str, competition_id: int = None,
+                         season_id: int = None) -> str:
+        return self.call('narration_prompt', **_match_params(match_id, competition_id, season_id),
+                         style=style)
+
+    def narration(self, match_id: int, style: str, regenerate: bool = False,
+                  competition_id: int = None, season_id: int = None) -> dict:
+        '''
+        Retorna a narração da partida no estilo pedido, gerando-a apenas se não estiver em cache.
+        Returns:
+            dict: match_id, style, text e cached (se veio do cache do LLM)
+        '''
+        return self.call('narration', **_match_params(match_id, competition_id, season_id),
+                         style=style, regenerate=bool(regenerate))
+
+    def ask(self, match_id: int, question: str, competition_id: int = None,
+            season_id: int = None) -> dict:
+        '''
+        Responde uma pergunta sobre a partida com o agente de Q&A.
+        Returns:
+            dict: match_id, question e answer
+        '''
+        return self.call('ask', **_match_params(match_id, competition_id, season_id),
+                         question=str(question))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'workers': self.workers, 'inflight': len(self._inflight),
+                    'agents': len(self._agents), **self.counters}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def _match_params(match_id, competition_id=None, season_id=None) -> dict:
+    '''IDs da partida e da temporada como inteiros; valores inválidos viram ServiceError 400'''
+    try:
+        params = {'match_id': int(match_id)}
+        if competition_id is not None and season_id is not None:
+            params.update(competition_id=int(competition_id), season_id=int(season_id))
+    except (ValueError, TypeError) as e:
+        raise ServiceError(f'Invalid match parameters: {e}', status=400) from e
+    return params
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    '''
+    Rotas HTTP do serviço:
+        GET  /health, /metrics
+        GET  /matches/<id>/events | lineups | player_stats
+        GET  /matches/<id>/narration_prompt?style=...&competition_id=...&season_id=...
+        POST /matches/<id>/narration  {"style": ..., "regenerate": false, "competition_id": ..., "season_id": ...}
+        POST /matches/<id>/ask        {"question": ..., "competition_id": ..., "season_id": ...}
+    '''
+
+    ROUTE = re.compile(r'^/matches/(\d+)/(events|lineups|player_stats|narration_prompt|narration|ask)/?$')
+    POST_OPERATIONS = ('narration', 'ask')
+
+    def __init__(self, *args, service: AnalyticsService, **kwargs):
+        self.service = service
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            return self._send(200, json.dumps({'status': 'ok', **self.service.stats()}))
+        if url.path == '/metrics':
+            return self._send(200, tracer.prometheus_text(), 'text/plain; version=0.0.4')
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self._dispatch(url.path, params, method='GET')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            params = json.loads(self.rfile.read(length) or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return self._error(400, 'Body must be a JSON object')
+        if not isinstance(params, dict):
+            return self._error(400, 'Body must be a JSON object')
+        self._dispatch(urlparse(self.path).path, params, method='POST')
+
+    def _dispatch(self, path: str, params: dict, method: str):
+        match = self.ROUTE.match(path)
+        if match is None:
+            return self._error(404, f'Unknown route: {path}')
+        match_id, operation = int(match.group(1)), match.group(2)
+        if (operation in self.POST_OPERATIONS) != (method == 'POST'):
+            return self._error(405, f'Use {"POST" if operation in self.POST_OPERATIONS else "GET"} for {operation}')
+        try:
+            params = _match_params(match_id, params.get('competition_id'), params.get('season_id')) | {
+                key: value for key, value in params.items() if key in ('style', 'question', 'regenerate')}
+            for key in ('style', 'question'):
+                if key in params and not isinstance(params[key], str):
+                    raise ServiceError(f'{key} must be a string', status=400)
+            if 'regenerate' in params:
+                params['regenerate'] = str(params['regenerate']).lower() in ('1', 'true', 'yes')
+            result = self.service.call(operation, **params)
+        except ServiceError as e:
+            return self._error(e.status, e.message)
+        except Exception as e:
+            return self._error(500, f'{type(e).__name__}: {e}')
+        if operation == 'narration_prompt':
+            result = {'match_id': match_id, 'style': params.get('style'), 'prompt': result}
+        self._send(200, result if isinstance(result, str) else json.dumps(result, ensure_ascii=False))
+
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({'error': message}, ensure_ascii=False))
+
+    def _send(self, status: int, body: str, content_type: str = 'application/json; charset=utf-8'):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class AnalyticsServer:
+    '''
+    Servidor HTTP local do serviço de análise. As threads do servidor apenas aguardam o
+    resultado; o processamento acontece no pool de workers do AnalyticsService.
+
+    Exemplo:
+        with AnalyticsServer(AnalyticsService(workers=4), port=8502) as server:
+            client = AnalyticsClient(server.url)
+    '''
+
+    def __init__(self, service: AnalyticsService, host: str = '127.0.0.1', port: int = 0):
+        self.service = service
+        self.httpd = ThreadingHTTPServer((host, port), partial(_ServiceHandler, service=service))
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class AnalyticsClient:
+    '''
+    Cliente HTTP do serviço de análise, com os mesmos métodos de AnalyticsService.
+    Usa urllib: o statsbombpy instala o requests_cache globalmente, e as respostas do serviço
+    não devem passar por esse cache.
+    '''
+
+    def __init__(self, base_url: str = ANALYTICS_SERVICE_URL, timeout: float = ANALYTICS_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, params: dict = None, json_body: dict = None):
+        url = f'{self.base_url}{path}'
+        if params:
+            url += '?' + urlencode(params)
+        data = json.dumps(json_body).encode('utf-8') if json_body is not None else None
+        request = Request(url, data=data, method=method,
+                          headers={'Content-Type': 'application/json'} if data else {})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            body = e.read().decode('utf-8', errors='replace')
+            try:
+                message = json.loads(body).get('error', body)
+            except ValueError:
+                message = body
+            raise ServiceError(message, status=e.code) from None
+
+    def events(self, match_id: int) -> list:
+        return self._request('GET', f'/matches/{int(match_id)}/events')
+
+    def lineups(self, match_id: int) -> dict:
+        return self._request('GET', f'/matches/{int(match_id)}/lineups')
+
+    def player_stats(self, match_id: int) -> list:
+        return self._request('GET', f'/matches/{int(match_id)}/player_stats')
+
+    def narration_prompt(self, match_id: int, style: str, competition_id: int = None,
+                         season_id: int = None) -> str:
+        params = {'style': style, 'competition_id': competition_id, 'season_id': season_id}
+        return self._request('GET', f'/matches/{int(match_id)}/narration_prompt',
+                             params={k: v for k, v in params.items() if v is not None})['prompt']
+
+    def narration(self, match_id: int, style: str, regenerate: bool = False,
+                  competition_id: int = None, season_id: int = None) -> dict:
+        return self._request('POST', f'/matches/{int(match_id)}/narration', json_body={
+            'style': style, 'regenerate': regenerate,
+            'competition_id': competition_id, 'season_id': season_id})
+
+    def ask(self, match_id: int, question: str, competition_id: int = None,
+            season_id: int = None) -> dict:
+        return self._request('POST', f'/matches/{int(match_id)}/ask', json_body={
+            'question': question, 'competition_id': competition_id, 'season_id': season_id})
+
+    def stats(self) -> dict:
+        return self._request('GET', '/health')
+
+
+analytics_service = AnalyticsService()
+_client = None
+
+
+def get_analytics():
+    '''
+    Retorna o serviço usado pelo app e pelos jobs em lote: o serviço remoto, se
+    ANALYTICS_SERVICE_URL estiver definido, ou o serviço do próprio processo.
+    Returns:
+        AnalyticsClient | AnalyticsService: Serviço de análise
+    '''
+    global _client
+    if not ANALYTICS_SERVICE_URL:
+        return analytics_service
+    if _client is None:
+        _client = AnalyticsClient(ANALYTICS_SERVICE_URL)
+    return _client
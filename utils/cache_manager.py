@@ -1,6 +1,61 @@
-import requests_cache
+import os
 from contextlib import contextmanager
+
+import requests
 import requests_cache
+from requests.adapters import HTTPAdapter
+from requests_cache import NEVER_EXPIRE
+from urllib3.util.retry import Retry
+
+import statsbombpy.public
+
+# Endereço público dos dados abertos do StatsBomb (o mesmo usado pelo statsbombpy)
+OPEN_DATA_URL = 'https://raw.githubusercontent.com/statsbomb/open-data/master'
+
+# Configurações do cache HTTP, ajustáveis por variáveis de ambiente
+CACHE_NAME = os.getenv('STATSBOMB_CACHE_NAME', 'statsbomb_cache')
+CACHE_BACKEND = os.getenv('STATSBOMB_CACHE_BACKEND', 'sqlite')
+LISTING_TTL = int(os.getenv('STATSBOMB_LISTING_TTL', '600'))
+POOL_SIZE = int(os.getenv('STATSBOMB_POOL_SIZE', '16'))
+
+
+def expire_rules(listing_ttl: int = LISTING_TTL) -> dict:
+    '''
+    Regras de expiração por URL.
+    Eventos, escalações e frames 360 de partidas encerradas não mudam, então ficam em cache para sempre.
+    Listagens de competições e partidas expiram rápido e são revalidadas em segundo plano.
+    Args:
+        listing_ttl (int): Tempo de vida das listagens em segundos
+    Returns:
+        dict: Padrões de URL e respectivos tempos de expiração
+    '''
+    return {
+        '*/data/events/*': NEVER_EXPIRE,
+        '*/data/lineups/*': NEVER_EXPIRE,
+        '*/data/three-sixty/*': NEVER_EXPIRE,
+        '*/data/matches/*': listing_ttl,
+        '*/data/competitions.json': listing_ttl,
+    }
+
+
+class StatsBombRequests:
+    '''
+    Substituto do módulo requests dentro do statsbombpy.
+    Encaminha as chamadas .get para a sessão com cache e, se configurado,
+    redireciona o endereço dos dados abertos para um servidor local.
+    '''
+
+    def __init__(self, session, base_url: str = None):
+        self.session = session
+        self.base_url = base_url.rstrip('/') if base_url else None
+
+    def get(self, url, **kwargs):
+        if self.base_url is not None and url.startswith(OPEN_DATA_URL):
+            url = self.base_url + url[len(OPEN_DATA_URL):]
+        return self.session.get(url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
 
 
 class CacheManager:
@@ -12,13 +67,46 @@ class CacheManager:
             cls._instance.initialize()
         return cls._instance
 
-    def initialize(self):
-        """Inicializa o cache"""
+    def initialize(self, backend: str = CACHE_BACKEND, cache_name: str = CACHE_NAME,
+                   listing_ttl: int = LISTING_TTL, base_url: str = None):
+        """Inicializa o cache e conecta a sessão às requisições do statsbombpy"""
         self.session = requests_cache.CachedSession(
-            'statsbomb_cache',
-            backend='sqlite',
-            expire_after=3600
+            cache_name,
+            backend=backend,
+            expire_after=listing_ttl,
+            urls_expire_after=expire_rules(listing_ttl),
+            stale_while_revalidate=True,
+            allowable_codes=(200,)
+        )
+        # Um único pool de conexões keep-alive compartilhado por todas as requisições
+        adapter = HTTPAdapter(
+            pool_connections=POOL_SIZE,
+            pool_maxsize=POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=(429, 500, 502, 503, 504))
         )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.base_url = base_url or os.getenv('STATSBOMB_OPEN_DATA_URL')
+        statsbombpy.public.req = StatsBombRequests(self.session, self.base_url)
+
+    def configure(self, **kwargs):
+        """Recria a sessão com outras configurações (ex.: backend 'memory' e servidor local nos testes)"""
+        self.session.close()
+        self.initialize(**kwargs)
+
+    def data_url(self, path: str) -> str:
+        '''Endereço de um arquivo do open-data como pedido pelo statsbombpy (e chave do cache HTTP)'''
+        return f"{(self.base_url.rstrip('/') if self.base_url else OPEN_DATA_URL)}/data/{path}"
+
+    def forget(self, paths: list):
+        '''
+        Remove arquivos do open-data do cache HTTP, para que a próxima leitura vá ao servidor.
+        Args:
+            paths (list): Caminhos dentro de data/ (ex.: 'events/3773386.json')
+        '''
+        self.session.cache.delete(urls=[self.data_url(path) for path in paths])
 
     @contextmanager
     def get_session(self):
@@ -0,0 +1,145 @@
+import os
+
+import pandas as pd
+from statsbombpy import sb
+import statsbombpy.entities as ents
+from statsbombpy.helpers import filter_and_group_events
+
+from utils.cache_manager import cache_manager
+
+try:
+    import orjson
+
+    def _loads(data: bytes):
+        return orjson.loads(data)
+except ImportError:
+    import json
+
+    def _loads(data: bytes):
+        return json.loads(data)
+
+# Fonte de dados: 'statsbomb' (API/GitHub via statsbombpy) ou 'local' (cópia local do open-data)
+DATA_SOURCE = os.getenv('STATSBOMB_DATA_SOURCE', 'statsbomb')
+OPEN_DATA_DIR = os.getenv('STATSBOMB_OPEN_DATA_DIR', 'open-data')
+
+
+class DataSourceError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class StatsBombSource:
+    '''
+    Fonte de dados padrão, que usa o statsbombpy (e, por ele, o cache HTTP do CacheManager).
+    '''
+
+    def competitions(self) -> dict:
+        return sb.competitions(fmt='dict')
+
+    def matches(self, competition_id: int, season_id: int) -> dict:
+        return sb.matches(competition_id=competition_id, season_id=season_id, fmt='dict')
+
+    def events(self, match_id: int, refresh: bool = False) -> pd.DataFrame:
+        if refresh:
+            cache_manager.forget([f'events/{int(match_id)}.json'])
+        return sb.events(match_id=int(match_id))
+
+    def lineups(self, match_id: int, refresh: bool = False) -> dict:
+        if refresh:
+            cache_manager.forget([f'lineups/{int(match_id)}.json'])
+        return sb.lineups(match_id=int(match_id))
+
+
+class LocalOpenDataSource:
+    '''
+    Fonte de dados offline que lê diretamente uma cópia local do repositório open-data do StatsBomb
+    (<root>/data/competitions.json, matches/, events/, lineups/).
+
+    Os JSONs são lidos com orjson (quando disponível) e convertidos com as mesmas funções do
+    statsbombpy, reproduzindo exatamente os formatos retornados por sb.competitions(fmt='dict'),
+    sb.matches(fmt='dict'), sb.events e sb.lineups. O parâmetro refresh é aceito por compatibilidade:
+    a cópia local é sempre lida do disco.
+    '''
+
+    def __init__(self, root: str = OPEN_DATA_DIR):
+        self.root = root
+
+    def _read(self, *parts):
+        path = os.path.join(self.root, 'data', *parts)
+        if not os.path.exists(path):
+            raise DataSourceError(f"File not found in local open-data: {path}")
+        with open(path, 'rb') as f:
+            return _loads(f.read())
+
+    def competitions(self) -> dict:
+        return ents.competitions(self._read('competitions.json'))
+
+    def matches(self, competition_id: int, season_id: int) -> dict:
+        return ents.matches(self._read('matches', str(int(competition_id)), f'{int(season_id)}.json'))
+
+    def events(self, match_id: int, refresh: bool = False) -> pd.DataFrame:
+        match_id = int(match_id)
+        events = ents.events(self._read('events', f'{match_id}.json'), match_id)
+        events = filter_and_group_events(events, {}, 'dataframe', True)
+        return pd.concat([pd.DataFrame(evs) for evs in events.values()],
+                         axis=0, ignore_index=True, sort=True)
+
+    def lineups(self, match_id: int, refresh: bool = False) -> dict:
+        lineups = ents.lineups(self._read('lineups', f'{int(match_id)}.json'))
+        lineups_ = {}
+        for lineup in lineups.values():
+            lineup_ = pd.DataFrame(lineup['lineup'])
+            lineup_['country'] = lineup_.country.apply(
+                lambda c: c['name'] if isinstance(c, dict) else 'Unknown'
+            )
+            lineups_[lineup['team_name']] = lineup_
+        return lineups_
+
+
+def get_data_source(name: str = DATA_SOURCE, root: str = OPEN_DATA_DIR):
+    '''
+    Cria a fonte de dados pelo nome.
+    Args:
+        name (str): 'statsbomb' ou 'local'
+        root (str): Diretório da cópia local do open-data (usado apenas por 'local')
+    Returns:
+        StatsBombSource | LocalOpenDataSource: Fonte de dados
+    '''
+    if name == 'statsbomb':
+        return StatsBombSource()
+    if name == 'local':
+        return LocalOpenDataSource(root)
+    raise DataSourceError(f"Unknown data source: {name}")
+
+
+class DataSource:
+    '''
+    Fonte de dados usada por todo o projeto. Delega para o backend configurado por
+    STATSBOMB_DATA_SOURCE/STATSBOMB_OPEN_DATA_DIR ou por configure().
+    '''
+
+    def __init__(self, name: str = DATA_SOURCE, root: str = OPEN_DATA_DIR):
+        self.configure(name, root)
+
+    def configure(self, name: str = DATA_SOURCE, root: str = OPEN_DATA_DIR):
+        """Troca o backend (ex.: 'local' nos testes, sem nenhum acesso à rede)"""
+        self.name = name
+        self.backend = get_data_source(name, root)
+
+    def competitions(self) -> dict:
+        return self.backend.competitions()
+
+    def matches(self, competition_id: int, season_id: int) -> dict:
+        return self.backend.matches(competition_id, season_id)
+
+    def events(self, match_id: int, refresh: bool = False) -> pd.DataFrame:
+        """refresh: ignora o cache HTTP e busca os eventos novamente na fonte"""
+        return self.backend.events(match_id, refresh=refresh)
+
+    def lineups(self, match_id: int, refresh: bool = False) -> dict:
+        """refresh: ignora o cache HTTP e busca as escalações novamente na fonte"""
+        return self.backend.lineups(match_id, refresh=refresh)
+
+
+data_source = DataSource()
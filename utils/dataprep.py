@@ -1,8 +1,16 @@
-from statsbombpy import sb
 import json
+import pandas as pd
 from copy import copy
 from utils.cache_manager import cache_manager
-import requests_cache
+from utils.data_source import data_source
+from utils.event_frame import EVENT_COLUMNS, compact_events, event_locations, memory_report
+from utils.event_store import event_store
+from utils.frame_cache import frame_cache
+from utils.instrumentation import tracer
+from utils.match_index import MatchIndex, chronological
+from utils.match_retrieval import MatchRetrievalIndex, build_retrieval_index
+from utils.player_stats import PLAYER_STATS_COLUMNS, PLAYER_STATS_SCHEMA, compute_player_stats, \
+    player_stats_records
 
 
 class PlayerStatsError(Exception):
@@ -10,17 +18,183 @@ class PlayerStatsError(Exception):
         super().__init__(message)
         self.message = message
 
+
+def load_match_events(match_id) -> pd.DataFrame:
+    '''
+    Função que retorna o DataFrame de eventos de uma partida a partir do cache em processo,
+    carregando do armazenamento local apenas quando a partida não estiver em memória.
+    Os eventos ficam em ordem cronológica e na representação compacta (compact_events: apenas as colunas
+    usadas pelo app, time/tipo/jogador categóricos e localizações em colunas x/y).
+    O DataFrame é compartilhado entre sessões e não deve ser modificado.
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        pd.DataFrame: DataFrame com os eventos da partida
+    '''
+    match_id = int(match_id)
+    return frame_cache.get_or_load(('events', match_id), lambda: _load_events(match_id),
+                                   version=lambda: match_version(match_id))
+
+
+def match_version(match_id: int):
+    '''
+    Versão dos eventos gravados de uma partida. As entradas do cache em processo derivadas da partida
+    são recarregadas quando ela muda (ex.: partida baixada novamente por sync.py em outro processo).
+    '''
+    return event_store.version(match_id)
+
+
+def _stats_version(match_id: int):
+    '''Versão dos eventos e da tabela de estatísticas gravada de uma partida (None se faltar alguma)'''
+    versions = event_store.version(match_id), event_store.version(match_id, kind='player_stats')
+    return versions if None not in versions else None
+
+
+def _load_events(match_id: int) -> pd.DataFrame:
+    with tracer.span('load_events', 'fetch', match_id=match_id) as span:
+        span['source'] = 'event_store' if event_store.contains(match_id) else 'data_source'
+        events = event_store.get_events(match_id, columns=EVENT_COLUMNS)
+        span['rows'] = len(events)
+    with tracer.span('sort_events', 'transform', match_id=match_id):
+        events = chronological(events)
+    with tracer.span('compact_events', 'transform', match_id=match_id) as span:
+        compact = compact_events(events)
+        span.update(memory_report(events, compact) if tracer.enabled else {})
+    return compact
+
+
+def load_match_index(match_id) -> MatchIndex:
+    '''
+    Função que retorna os índices por time, jogador, tipo de evento e minuto de uma partida,
+    construídos uma única vez sobre os eventos em cache.
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        MatchIndex: Índices da partida
+    '''
+    match_id = int(match_id)
+    return frame_cache.get_or_load(('match_index', match_id), lambda: _build_match_index(match_id),
+                                   version=lambda: match_version(match_id))
+
+
+def _build_match_index(match_id: int) -> MatchIndex:
+    events = load_match_events(match_id)
+    with tracer.span('build_match_index', 'transform', match_id=match_id, rows=len(events)):
+        return MatchIndex(events)
+
+
+def load_retrieval_index(match_id) -> MatchRetrievalIndex:
+    '''
+    Função que retorna o índice de busca (BM25) sobre eventos, estatísticas e escalações de uma partida,
+    usado pela ferramenta de busca do agente e construído uma única vez por partida.
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        MatchRetrievalIndex: Índice de busca da partida
+    '''
+    match_id = int(match_id)
+    return frame_cache.get_or_load(('retrieval_index', match_id), lambda: _build_retrieval_index(match_id),
+                                   version=lambda: _stats_version(match_id))
+
+
+def _build_retrieval_index(match_id: int) -> MatchRetrievalIndex:
+    match_index = load_match_index(match_id)
+    player_stats = get_player_stats_table(match_id)
+    lineups = load_match_lineups(match_id)
+    with tracer.span('build_retrieval_index', 'transform', match_id=match_id) as span:
+        index = build_retrieval_index(match_index, player_stats, lineups)
+        span['chunks'] = len(index.chunks)
+    return index
+
+
+# Entradas do cache em processo derivadas de uma partida
+MATCH_CACHE_KEYS = ['events', 'match_index', 'lineups', 'player_stats', 'retrieval_index']
+
+
+def invalidate_match(match_id):
+    '''
+    Função que remove do cache em processo todas as entradas de uma partida (ex.: dados baixados novamente).
+    Args:
+        match_id (int): ID da partida
+    '''
+    for key in MATCH_CACHE_KEYS:
+        frame_cache.invalidate((key, int(match_id)))
+
+
+def load_match_lineups(match_id) -> dict:
+    '''
+    Função que retorna as escalações de uma partida (time -> DataFrame) a partir do cache em processo.
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        dict: Escalações no formato do statsbombpy
+    '''
+    match_id = int(match_id)
+    return frame_cache.get_or_load(('lineups', match_id), lambda: _load_lineups(match_id),
+                                   version=lambda: match_version(match_id))
+
+
+def _load_lineups(match_id: int) -> dict:
+    with tracer.span('load_lineups', 'fetch', match_id=match_id):
+        return data_source.lineups(match_id)
+
+
+def get_player_stats_table(match_id) -> pd.DataFrame:
+    '''
+    Função que retorna a tabela de estatísticas dos jogadores de uma partida, calculada uma única vez
+    sobre os eventos e mantida no cache em processo.
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        pd.DataFrame: Tabela de estatísticas indexada pelo nome do jogador
+    '''
+    match_id = int(match_id)
+    return frame_cache.get_or_load(('player_stats', match_id),
+                                   lambda: _load_player_stats_table(match_id),
+                                   version=lambda: _stats_version(match_id))
+
+
+def read_player_stats_table(match_id, refresh: bool = False) -> pd.DataFrame:
+    '''
+    Função que retorna a tabela de estatísticas dos jogadores de uma partida sem passar pelo cache em
+    processo, para jobs que percorrem muitas partidas (ex.: agregação da temporada) sem tirar do cache
+    as partidas abertas no app.
+    Args:
+        match_id (int): ID da partida
+        refresh (bool): Recalcula a tabela a partir dos eventos gravados e substitui a tabela gravada
+    Returns:
+        pd.DataFrame: Tabela de estatísticas indexada pelo nome do jogador
+    '''
+    return _load_player_stats_table(int(match_id), load_events=_load_events, refresh=refresh)
+
+
+def _load_player_stats_table(match_id: int, load_events=load_match_events,
+                             refresh: bool = False) -> pd.DataFrame:
+    '''Lê a tabela gravada no armazenamento local (ex.: pelo prefetch) ou a calcula e grava'''
+    if not refresh and event_store.contains(match_id, kind='player_stats', schema=PLAYER_STATS_SCHEMA):
+        with tracer.span('load_player_stats', 'fetch', match_id=match_id):
+            table = event_store.read(match_id, kind='player_stats').set_index('player')
+        if list(table.columns) == PLAYER_STATS_COLUMNS:
+            return table
+
+    events = load_events(match_id)
+    with tracer.span('compute_player_stats', 'transform', match_id=match_id, rows=len(events)):
+        table = compute_player_stats(events)
+    event_store.write(match_id, table.reset_index(), kind='player_stats', schema=PLAYER_STATS_SCHEMA)
+    return table
+
 # Classe com funções para recuperar os dados de uma partida específica a partir de um match_id e retornar uma string JSON
 
 
 class GetMatchStats:
-    def __init__(self, match_id):
+    def __init__(self, match_id, raise_errors: bool = False):
+        '''
+        Args:
+            match_id (int): ID da partida
+            raise_errors (bool): Propaga as exceções em vez de retornar um JSON com o erro
+        '''
         self.match_id = int(match_id)
-        self.session = requests_cache.CachedSession(
-            'statsbomb_cache',
-            backend='sqlite',
-            expire_after=3600
-        )
+        self.raise_errors = raise_errors
 
     def get_events(self) -> str:
         '''Função que retorna os eventos de uma partida em formato JSON
@@ -30,12 +204,23 @@ class GetMatchStats:
             str: JSON com os eventos da partida
         '''
         try:
-            events = sb.events(match_id=self.match_id)
-            events = events[['timestamp', 'team', 'type',
-                             'minute', 'location', 'pass_end_location', 'player']]
-            events = events.sort_values(['minute', 'timestamp'])
-            return json.dumps(events.to_dict('records'), indent=4)
+            events = load_match_events(self.match_id).sort_values(['minute', 'timestamp'])
+            events = pd.DataFrame({
+                'timestamp': events['timestamp'],
+                'team': events['team'].astype(object),
+                'type': events['type'].astype(object),
+                'minute': events['minute'].astype('int64'),
+                'location': event_locations(events, 'location'),
+                'pass_end_location': event_locations(events, 'pass_end_location'),
+                'player': events['player'].astype(object)
+            })
+            with tracer.span('events_json', 'serialize', match_id=self.match_id) as span:
+                payload = json.dumps(events.to_dict('records'), indent=4)
+                span['chars'] = len(payload)
+            return payload
         except Exception as e:
+            if self.raise_errors:
+                raise
             return json.dumps({"error": f"Error getting events: {str(e)}"}, indent=4)
 
     def get_lineups(self) -> str:
@@ -47,9 +232,16 @@ class GetMatchStats:
             str: JSON com as escalações da partida
         '''
         try:
-            lineups = sb.lineups(match_id=self.match_id)
-            return json.dumps(lineups, indent=4)
+            lineups = load_match_lineups(self.match_id)
+            lineups = {team: lineup.to_dict('records')
+                       for team, lineup in lineups.items()}
+            with tracer.span('lineups_json', 'serialize', match_id=self.match_id) as span:
+                payload = json.dumps(lineups, indent=4, default=str)
+                span['chars'] = len(payload)
+            return payload
         except Exception as e:
+            if self.raise_errors:
+                raise
             return json.dumps({"error": f"Error getting lineups: {str(e)}"}, indent=4)
 
     def get_player_stats(self) -> str:
@@ -61,33 +253,14 @@ class GetMatchStats:
             str: JSON com as estatísticas dos jogadores da partida
         '''
         try:
-            events = sb.events(match_id=self.match_id)
-            all_players = self.get_all_players(events)
-
-            all_stats = []
-            for player_name in all_players:
-                player_events = events[events['player'] == player_name]
-                stats = {
-                    "player": player_name,
-                    "team": player_events['team'].iloc[0] if not player_events.empty else None,
-                    "statistics": {
-                        "passes_completed": int(player_events[(player_events['type'] == 'Pass') & (player_events['pass_outcome'].isna())].shape[0]),
-                        "passes_attempted": int(player_events[player_events['type'] == 'Pass'].shape[0]),
-                        "shots": int(player_events[player_events['type'] == 'Shot'].shape[0]),
-                        "shots_on_target": int(player_events[(player_events['type'] == 'Shot') & (player_events['shot_outcome'] == 'On Target')].shape[0]),
-                        "goals": int(player_events[(player_events['type'] == 'Shot') & (player_events['shot_outcome'] == 'Goal')].shape[0]),
-                        "assists": int(player_events[player_events['pass_goal_assist'] == True].shape[0]),
-                        "fouls_committed": int(player_events[player_events['type'] == 'Foul Committed'].shape[0]),
-                        "fouls_won": int(player_events[player_events['type'] == 'Foul Won'].shape[0]),
-                        "tackles": int(player_events[player_events['type'] == 'Tackle'].shape[0]),
-                        "interceptions": int(player_events[player_events['type'] == 'Interception'].shape[0]),
-                        "minutes_played": int(player_events['minute'].max() if not player_events.empty else 0)
-                    }
-                }
-                all_stats.append(stats)
-
-            return json.dumps(all_stats, indent=4)
+            table = get_player_stats_table(self.match_id)
+            with tracer.span('player_stats_json', 'serialize', match_id=self.match_id) as span:
+                payload = json.dumps(player_stats_records(table), indent=4)
+                span['chars'] = len(payload)
+            return payload
         except Exception as e:
+            if self.raise_errors:
+                raise
             return json.dumps({"error": f"Error getting player stats: {str(e)}"}, indent=4)
 
     @staticmethod
@@ -95,22 +268,12 @@ class GetMatchStats:
         '''
         Função que retorna uma lista com todos os jogadores que participaram de uma partida
         Args:
-            events_df (pd.DataFrame): DataFrame com os eventos da partida
+            events_df (pd.DataFrame | MatchIndex): DataFrame com os eventos da partida ou seus índices
         Returns:
             list: Lista com os nomes de todos os jogadores que participaram da partida
         '''
         try:
-            home_team = events_df[events_df['type']
-                                  == 'Starting XI'].iloc[0]['team']
-            away_team = [team for team in events_df['team'].unique()
-                         if team != home_team][0]
-
-            home_team_events = events_df[events_df['team'] == home_team]
-            away_team_events = events_df[events_df['team'] == away_team]
-
-            home_team_players = home_team_events['player'].dropna().unique()
-            away_team_players = away_team_events['player'].dropna().unique()
-
-            return list(set(home_team_players).union(set(away_team_players)))
+            index = events_df if isinstance(events_df, MatchIndex) else MatchIndex(events_df)
+            return index.players()
         except Exception as e:
             raise PlayerStatsError(f"Error getting players: {str(e)}")
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# Colunas dos eventos usadas pelo app (GetMatchStats, abas, agente, narração e mapas de passe).
+# As demais colunas do statsbombpy (táticas, freeze frames, eventos relacionados...) são descartadas.
+EVENT_COLUMNS = [
+    'index', 'period', 'timestamp', 'minute', 'second', 'team', 'player', 'type',
+    'location', 'pass_end_location', 'pass_recipient', 'pass_outcome', 'pass_goal_assist',
+    'shot_outcome', 'shot_type', 'shot_statsbomb_xg', 'dribble_outcome', 'duel_outcome',
+    'interception_outcome', 'foul_committed_card', 'bad_behaviour_card', 'substitution_replacement',
+    'tactics'
+]
+# Colunas de texto com poucos valores distintos, guardadas como categóricas
+CATEGORICAL_COLUMNS = ['team', 'type', 'player']
+# Colunas inteiras reduzidas ao menor tipo que comporta os valores
+INTEGER_COLUMNS = ['index', 'period', 'minute', 'second']
+# Colunas de localização [x, y] e as colunas float32 que as substituem
+LOCATION_COLUMNS = {'location': ('x', 'y'), 'pass_end_location': ('end_x', 'end_y')}
+
+
+def split_xy(locations: pd.Series):
+    '''
+    Separa uma coluna de localizações [x, y] em duas Series de float.
+    Args:
+        locations (pd.Series): Coluna com listas [x, y] ou valores nulos
+    Returns:
+        tuple: Series x e Series y
+    '''
+    valid = locations.map(lambda v: isinstance(v, (list, tuple, np.ndarray)) and len(v) >= 2)
+    xy = np.full((len(locations), 2), np.nan)
+    if valid.any():
+        xy[valid.to_numpy()] = np.array([v[:2] for v in locations[valid]], dtype=float)
+    return (pd.Series(xy[:, 0], index=locations.index),
+            pd.Series(xy[:, 1], index=locations.index))
+
+
+def compact_events(events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Função que converte os eventos do statsbombpy em uma representação compacta em memória:
+    apenas as colunas usadas pelo app, time/tipo/jogador categóricos, inteiros reduzidos e
+    localizações separadas em colunas x/y float32 (x, y, end_x, end_y).
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+    Returns:
+        pd.DataFrame: Eventos compactos, na mesma ordem e com o mesmo índice
+    '''
+    compact = {}
+    for col in EVENT_COLUMNS:
+        if col not in events:
+            continue
+        if col in LOCATION_COLUMNS:
+            x_col, y_col = LOCATION_COLUMNS[col]
+            x, y = split_xy(events[col])
+            compact[x_col] = x.astype(np.float32)
+            compact[y_col] = y.astype(np.float32)
+        elif col in CATEGORICAL_COLUMNS:
+            compact[col] = events[col].astype('category')
+        elif col in INTEGER_COLUMNS and pd.api.types.is_integer_dtype(events[col]):
+            compact[col] = pd.to_numeric(events[col], downcast='integer')
+        else:
+            compact[col] = events[col]
+    return pd.DataFrame(compact, index=events.index)
+
+
+def event_xy(events: pd.DataFrame, column: str = 'location'):
+    '''
+    Retorna as coordenadas de uma coluna de localização como duas Series de float,
+    usando as colunas x/y dos eventos compactos ou separando as listas [x, y].
+    Args:
+        events (pd.DataFrame): Eventos (compactos ou no formato do statsbombpy)
+        column (str): 'location' ou 'pass_end_location'
+    Returns:
+        tuple: Series x e Series y (NaN quando não há localização)
+    '''
+    x_col, y_col = LOCATION_COLUMNS[column]
+    if x_col in events and y_col in events:
+        return events[x_col].astype(float), events[y_col].astype(float)
+    if column in events:
+        return split_xy(events[column])
+    return pd.Series(np.nan, index=events.index), pd.Series(np.nan, index=events.index)
+
+
+def event_locations(events: pd.DataFrame, column: str = 'location', decimals: int = 2) -> list:
+    '''
+    Reconstrói as localizações [x, y] (ou NaN) no formato do statsbombpy, para o JSON da API.
+    Args:
+        events (pd.DataFrame): Eventos (compactos ou no formato do statsbombpy)
+        column (str): 'location' ou 'pass_end_location'
+        decimals (int): Casas decimais (as coordenadas float32 são arredondadas)
+    Returns:
+        list: Uma localização por evento
+    '''
+    x, y = event_xy(events, column)
+    x, y = x.round(decimals).tolist(), y.round(decimals).tolist()
+    return [np.nan if np.isnan(x_value) else [x_value, y_value] for x_value, y_value in zip(x, y)]
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> dict:
+    '''
+    Compara a memória ocupada pelos eventos antes e depois da compactação.
+    Args:
+        before (pd.DataFrame): Eventos no formato original
+        after (pd.DataFrame): Eventos compactos
+    Returns:
+        dict: Colunas e bytes antes/depois, bytes economizados e redução percentual
+    '''
+    bytes_before = int(before.memory_usage(deep=True).sum())
+    bytes_after = int(after.memory_usage(deep=True).sum())
+    return {
+        'columns_before': len(before.columns),
+        'columns_after': len(after.columns),
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'bytes_saved': bytes_before - bytes_after,
+        'saved_pct': round(100 * (1 - bytes_after / bytes_before), 1) if bytes_before else 0.0
+    }
@@ -0,0 +1,161 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils.match_index import MatchIndex
+from utils.event_frame import event_xy
+
+# Limites das respostas das ferramentas do agente
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+FILTER_KEYS = ['player', 'team', 'type', 'minute_from', 'minute_to',
+               'limit', 'offset', 'top_n', 'aggregate', 'sort_by']
+
+
+class EventQueryError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def parse_filters(input_str: str) -> dict:
+    '''
+    Converte a entrada de uma ferramenta do agente em filtros.
+    Aceita um objeto JSON ({"player": "Messi", "type": "Shot"}) ou pares chave=valor
+    separados por vírgula ou ponto e vírgula (player=Messi; type=Shot).
+    Args:
+        input_str (str): Texto enviado pelo agente como Action Input
+    Returns:
+        dict: Filtros reconhecidos
+    '''
+    input_str = (input_str or '').strip().strip('`').strip()
+    if not input_str or input_str in ('get_data', 'all', 'none'):
+        return {}
+    try:
+        filters = json.loads(input_str)
+        if not isinstance(filters, dict):
+            raise EventQueryError('Input must be a JSON object')
+    except json.JSONDecodeError:
+        filters = {}
+        separator = ';' if ';' in input_str else ','
+        for part in input_str.split(separator):
+            if '=' not in part:
+                continue
+            key, value = part.split('=', 1)
+            filters[key.strip().lower()] = value.strip().strip('"\'')
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise EventQueryError(
+            f"Unknown filters: {', '.join(sorted(unknown))}. Valid filters: {', '.join(FILTER_KEYS)}")
+    return filters
+
+
+def _as_bool(value) -> bool:
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'sim')
+
+
+class EventTable:
+    '''
+    Consultas das ferramentas do agente sobre os índices da partida (MatchIndex), respondendo
+    com fatias pequenas e paginadas. Nomes de jogador, time e tipo aceitam correspondência parcial.
+    '''
+
+    def __init__(self, index: MatchIndex):
+        self.index = index
+        self.events = index.events
+        events = index.events
+        x, y = event_xy(events, 'location')
+        self.x = x.round().astype('Int64')
+        self.y = y.round().astype('Int64')
+        outcome = pd.Series(np.nan, index=events.index, dtype=object)
+        for col in ['shot_outcome', 'pass_outcome', 'dribble_outcome', 'duel_outcome',
+                    'foul_committed_card', 'bad_behaviour_card']:
+            if col in events:
+                outcome = outcome.fillna(events[col])
+        self.outcome = outcome
+
+    @staticmethod
+    def _resolve(index: dict, value: str, label: str) -> np.ndarray:
+        '''Posições dos valores que contêm o texto buscado (sem diferenciar maiúsculas)'''
+        value = str(value).strip().lower()
+        exact = [key for key in index if str(key).lower() == value]
+        names = exact or [key for key in index if value in str(key).lower()]
+        if not names:
+            raise EventQueryError(
+                f"No {label} matching '{value}'. Available: {', '.join(map(str, list(index)[:30]))}")
+        if len(names) == 1:
+            return index[names[0]]
+        return np.unique(np.concatenate([index[name] for name in names]))
+
+    def select(self, player=None, team=None, type=None, minute_from=None, minute_to=None) -> np.ndarray:
+        '''
+        Retorna as posições dos eventos que atendem aos filtros, combinando os índices.
+        Args:
+            player (str): Nome (ou parte do nome) do jogador
+            team (str): Nome (ou parte do nome) do time
+            type (str): Tipo de evento (ex.: Shot, Pass, Foul Committed)
+            minute_from (int): Minuto inicial (inclusive)
+            minute_to (int): Minuto final (inclusive)
+        Returns:
+            np.ndarray: Posições dos eventos em ordem cronológica
+        '''
+        positions = None
+        for value, index, label in ((player, self.index.by_player, 'player'),
+                                    (team, self.index.by_team, 'team'),
+                                    (type, self.index.by_type, 'event type')):
+            if value is None or value == '':
+                continue
+            found = self._resolve(index, value, label)
+            positions = found if positions is None else np.intersect1d(
+                positions, found, assume_unique=True)
+
+        return self.index.in_minutes(positions,
+                                     None if minute_from in (None, '') else minute_from,
+                                     None if minute_to in (None, '') else minute_to)
+
+    def query(self, filters: dict) -> str:
+        '''
+        Executa uma consulta das ferramentas do agente e retorna um texto curto.
+        Modos: linhas paginadas (limit/offset), agregado por tipo e time (aggregate=true)
+        ou ranking de jogadores com mais eventos (top_n=N).
+        Args:
+            filters (dict): Filtros produzidos por parse_filters
+        Returns:
+            str: Resultado da consulta
+        '''
+        positions = self.select(filters.get('player'), filters.get('team'), filters.get('type'),
+                                filters.get('minute_from'), filters.get('minute_to'))
+        selected = self.events.iloc[positions]
+        total = len(positions)
+
+        if filters.get('top_n'):
+            top_n = min(int(filters['top_n']), MAX_LIMIT)
+            ranking = selected.groupby(['player', 'team'], observed=True).size() \
+                .sort_values(ascending=False).head(top_n)
+            lines = [f'{player} ({team}): {count}' for (player, team), count in ranking.items()]
+            return f'matching_events: {total}\ntop_players(player (team): events):\n' + '\n'.join(lines)
+
+        if _as_bool(filters.get('aggregate', False)):
+            counts = selected.groupby(['type', 'team'], observed=True).size()
+            lines = [f'{event_type} | {team}: {count}' for (event_type, team), count in counts.items()]
+            return f'matching_events: {total}\ncounts(type | team: events):\n' + '\n'.join(lines)
+
+        limit = min(int(filters.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        offset = int(filters.get('offset', 0))
+        page = positions[offset:offset + limit]
+        rows = self.events.iloc[page]
+        lines = [
+            f"{minute},{second},{team},{player},{event_type},{outcome},{x},{y}"
+            for minute, second, team, player, event_type, outcome, x, y in zip(
+                rows['minute'], rows['second'] if 'second' in rows else [''] * len(rows),
+                rows['team'], rows['player'].astype(object).fillna(''), rows['type'],
+                self.outcome.iloc[page].fillna(''),
+                self.x.iloc[page].astype(str).replace('<NA>', ''),
+                self.y.iloc[page].astype(str).replace('<NA>', ''))
+        ]
+        header = f'matching_events: {total} | showing {offset + 1 if lines else 0}-{offset + len(lines)}'
+        if offset + limit < total:
+            header += f' | next page: offset={offset + limit}'
+        return header + '\nevents(minute,second,team,player,type,outcome,x,y):\n' + '\n'.join(lines)
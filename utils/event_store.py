@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data_source import data_source
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows) o manifesto é protegido apenas entre threads do mesmo processo
+    fcntl = None
+
+# Diretório padrão do armazenamento local de eventos (um arquivo Parquet por partida)
+EVENT_STORE_DIR = os.getenv('EVENT_STORE_DIR', 'event_store')
+MANIFEST_FILE = 'manifest.json'
+
+
+class EventStoreError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class EventStore:
+    '''
+    Armazenamento colunar em disco dos eventos das partidas.
+
+    Cada partida é gravada uma única vez em Parquet (events/<match_id>.parquet) e
+    registrada em um manifesto. As leituras seguintes são feitas com memory-map,
+    sem nova requisição à API do StatsBomb nem normalização pelo pandas.
+
+    O diretório pode ser compartilhado por vários processos (app, prefetch.py, sync.py): o manifesto
+    é relido quando o arquivo muda em disco, e cada gravação relê o manifesto e o atualiza sob um
+    lock de arquivo (manifest.json.lock), sem sobrescrever as partidas gravadas pelos outros processos.
+    '''
+
+    def __init__(self, root: str = EVENT_STORE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        self._lock = threading.RLock()
+        self._manifest = None
+        self._manifest_stamp = None
+
+    def _stamp(self):
+        '''Data de modificação e tamanho do manifesto em disco (None se ele não existir)'''
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_manifest(self, force: bool = False) -> dict:
+        '''Retorna o manifesto, relendo o arquivo se ele foi alterado (ex.: por outro processo)'''
+        stamp = self._stamp()
+        if force or self._manifest is None or stamp != self._manifest_stamp:
+            if stamp is not None:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = {}
+            self._manifest_stamp = stamp
+        return self._manifest
+
+    @contextmanager
+    def _update_manifest(self):
+        '''
+        Relê o manifesto em disco sob o lock de arquivo, entrega-o para alteração e o grava ao final,
+        preservando as entradas gravadas por outros processos desde a última leitura.
+        '''
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(f'{self.manifest_path}.lock', 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    manifest = self._load_manifest(force=True)
+                    yield manifest
+                    self._save_manifest(manifest)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_manifest(self, manifest: dict):
+        tmp_path = f'{self.manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_stamp = self._stamp()
+
+    def _path(self, kind: str, match_id: int) -> str:
+        return os.path.join(self.root, kind, f'{int(match_id)}.parquet')
+
+    def contains(self, match_id: int, kind: str = 'events', schema: int = None) -> bool:
+        '''
+        Verifica se a partida já está gravada no armazenamento local.
+        Args:
+            match_id (int): ID da partida
+            kind (str): Tipo de tabela armazenada
+            schema (int): Exige a tabela gravada com esta versão do cálculo (ver write)
+        Returns:
+            bool: True se a tabela da partida estiver no manifesto e em disco
+        '''
+        with self._lock:
+            entry = self._load_manifest().get(kind, {}).get(str(int(match_id)))
+        return entry is not None and os.path.exists(entry['path']) and \
+            (schema is None or entry.get('schema') == schema)
+
+    def version(self, match_id: int, kind: str = 'events') -> str:
+        '''
+        Retorna a versão gravada da tabela de uma partida (data da gravação), relendo o manifesto se outro
+        processo o alterou. Caches em memória comparam a versão para descartar dados substituídos em disco
+        (ex.: por sync.py ou prefetch.py --force).
+        Args:
+            match_id (int): ID da partida
+            kind (str): Tipo de tabela armazenada
+        Returns:
+            str: Versão da tabela ou None se ela não estiver gravada
+        '''
+        with self._lock:
+            entry = self._load_manifest().get(kind, {}).get(str(int(match_id)))
+        return entry['stored_at'] if entry is not None else None
+
+    def write(self, match_id: int, df: pd.DataFrame, kind: str = 'events', schema: int = None):
+        '''
+        Grava a tabela de uma partida em Parquet e atualiza o manifesto.
+        Args:
+            match_id (int): ID da partida
+            df (pd.DataFrame): Tabela a ser gravada
+            kind (str): Tipo de tabela armazenada
+            schema (int): Versão do cálculo de tabelas derivadas, registrada no manifesto
+        '''
+        df = df.reset_index(drop=True)
+        json_columns = [col for col in df.columns
+                        if df[col].dtype == object and _has_nested_objects(df[col])]
+        encoded = df.copy()
+        for col in json_columns:
+            encoded[col] = encoded[col].map(_json_or_none)
+
+        path = self._path(kind, match_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(encoded, preserve_index=False)
+        # Arquivo temporário por processo e thread: gravações simultâneas da mesma partida não colidem
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._update_manifest() as manifest:
+            manifest.setdefault(kind, {})[str(int(match_id))] = {
+                'path': path,
+                'rows': int(len(df)),
+                'json_columns': json_columns,
+                'list_columns': [field.name for field in table.schema
+                                 if pa.types.is_list(field.type)],
+                'schema': schema,
+                'stored_at': datetime.now(timezone.utc).isoformat()
+            }
+
+    def remove(self, match_id: int, kind: str = 'events'):
+        '''
+        Remove a tabela de uma partida do armazenamento local (ex.: partida atualizada na fonte).
+        Args:
+            match_id (int): ID da partida
+            kind (str): Tipo de tabela armazenada
+        '''
+        with self._update_manifest() as manifest:
+            entry = manifest.get(kind, {}).pop(str(int(match_id)), None)
+        if entry is not None and os.path.exists(entry['path']):
+            os.remove(entry['path'])
+
+    def read(self, match_id: int, kind: str = 'events', columns: list = None) -> pd.DataFrame:
+        '''
+        Lê a tabela de uma partida do armazenamento local usando memory-map.
+        Args:
+            match_id (int): ID da partida
+            kind (str): Tipo de tabela armazenada
+            columns (list): Lê apenas estas colunas (as ausentes na partida são ignoradas)
+        Returns:
+            pd.DataFrame: Tabela da partida
+        '''
+        with self._lock:
+            entry = self._load_manifest().get(kind, {}).get(str(int(match_id)))
+        if entry is None:
+            raise EventStoreError(
+                f"Match {match_id} not found in event store ({kind})")
+
+        if columns is not None:
+            available = set(pq.read_schema(entry['path']).names)
+            columns = [col for col in columns if col in available]
+        df = pq.read_table(entry['path'], columns=columns, memory_map=True).to_pandas()
+        # Colunas de listas voltam como arrays numpy; convertidas para listas para manter o formato do statsbombpy
+        for col in entry['list_columns']:
+            if col in df:
+                df[col] = df[col].map(
+                    lambda v: v.tolist() if isinstance(v, np.ndarray) else v)
+        for col in entry['json_columns']:
+            if col in df:
+                df[col] = df[col].map(
+                    lambda v: json.loads(v) if isinstance(v, str) else v)
+        return df
+
+    def get_events(self, match_id: int, columns: list = None, refresh: bool = False) -> pd.DataFrame:
+        '''
+        Retorna os eventos de uma partida, buscando na fonte de dados apenas na primeira vez.
+        A partida é sempre gravada com todas as colunas.
+        Args:
+            match_id (int): ID da partida
+            columns (list): Retorna apenas estas colunas (padrão: todas)
+            refresh (bool): Busca os eventos novamente na fonte (sem o cache HTTP) e substitui o arquivo
+        Returns:
+            pd.DataFrame: DataFrame com os eventos da partida
+        '''
+        match_id = int(match_id)
+        if not refresh and self.contains(match_id):
+            return self.read(match_id, columns=columns)
+
+        events = data_source.events(match_id, refresh=refresh)
+        self.write(match_id, events)
+        if columns is not None:
+            events = events[[col for col in columns if col in events]]
+        return events
+
+
+def _has_nested_objects(column: pd.Series) -> bool:
+    '''Verifica se a coluna contém dicionários ou listas de dicionários, que não têm esquema fixo em Arrow'''
+    for value in column.dropna():
+        if isinstance(value, dict):
+            return True
+        if isinstance(value, list) and any(isinstance(v, dict) for v in value):
+            return True
+    return False
+
+
+def _json_or_none(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return None if value is None or (isinstance(value, float) and np.isnan(value)) else json.dumps(value)
+
+
+event_store = EventStore()
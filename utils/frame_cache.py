@@ -0,0 +1,162 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Teto de memória do cache em MB, configurável por variável de ambiente
+FRAME_CACHE_MAX_MB = float(os.getenv('FRAME_CACHE_MAX_MB', '512'))
+
+
+class FrameCache:
+    '''
+    Cache LRU em processo para DataFrames já processados (ex.: eventos de uma partida).
+
+    O cache é compartilhado por todas as sessões do Streamlit no mesmo processo, então
+    várias sessões olhando a mesma partida usam uma única cópia. Os valores retornados
+    são compartilhados e não devem ser modificados por quem os recebe.
+
+    Entradas carregadas com uma versão (get_or_load(..., version=...)) são recarregadas quando a
+    versão dos dados de origem muda, inclusive por gravações de outros processos.
+    '''
+
+    def __init__(self, max_mb: float = FRAME_CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._versions = {}
+        self._lock = threading.RLock()
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def current_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, key):
+        '''
+        Retorna o valor armazenado para a chave ou None, atualizando a ordem LRU.
+        Args:
+            key: Chave do cache
+        Returns:
+            Valor armazenado ou None
+        '''
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version=None):
+        '''
+        Armazena um valor e remove os menos usados recentemente até respeitar o teto de memória.
+        Args:
+            key: Chave do cache
+            value: Valor a ser armazenado
+            version: Versão dos dados de origem do valor (ver get_or_load)
+        '''
+        size = _estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._versions[key] = version
+            while self.current_bytes > self.max_bytes:
+                old_key = next(iter(self._entries))
+                self._remove(old_key)
+                self.evictions += 1
+
+    def _remove(self, key):
+        del self._entries[key]
+        del self._sizes[key]
+        self._versions.pop(key, None)
+
+    def get_or_load(self, key, loader, version=None):
+        '''
+        Retorna o valor em cache ou o carrega com a função fornecida.
+        Sessões concorrentes pedindo a mesma chave aguardam um único carregamento.
+        Args:
+            key: Chave do cache
+            loader (callable): Função sem argumentos que produz o valor
+            version (callable): Função sem argumentos que retorna a versão atual dos dados de origem
+                (ex.: event_store.version); um valor guardado com outra versão é carregado de novo
+        Returns:
+            Valor armazenado ou recém carregado
+        '''
+        current = version() if version is not None else None
+        with self._lock:
+            if key in self._entries and self._versions.get(key) == current:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Dados gravados pelo carregamento que estava em andamento (ex.: primeira leitura da partida)
+            # já têm versão
+            if version is not None and current is None:
+                current = version()
+            with self._lock:
+                if key in self._entries and self._versions.get(key) == current:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+            try:
+                value = loader()
+                if version is not None and current is None:
+                    current = version()
+                self.put(key, value, version=current)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._versions.clear()
+
+    def stats(self) -> dict:
+        '''
+        Retorna os contadores do cache.
+        Returns:
+            dict: Acertos, falhas, remoções, número de entradas e memória usada em MB
+        '''
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_mb': round(self.current_bytes / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2)
+            }
+
+
+def _estimate_size(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(v) for v in value.values())
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+frame_cache = FrameCache()
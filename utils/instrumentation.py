@@ -0,0 +1,205 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from utils.prompt_encoder import estimate_tokens
+
+# Instrumentação das etapas do app (busca, transformação, serialização, LLM e renderização)
+INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', '1') == '1'
+# Número de spans recentes mantidos em memória para o painel de diagnóstico
+INSTRUMENTATION_MAX_SPANS = int(os.getenv('INSTRUMENTATION_MAX_SPANS', '2000'))
+# Se definido, cada span finalizado é gravado neste arquivo em JSON lines
+INSTRUMENTATION_EXPORT_PATH = os.getenv('INSTRUMENTATION_EXPORT_PATH')
+
+STAGES = ('fetch', 'transform', 'serialize', 'llm', 'render')
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Tracer:
+    '''
+    Registro leve de spans (etapas cronometradas) em processo.
+
+    Cada span tem nome, etapa, duração e atributos (tamanho do prompt e da resposta, tokens,
+    partida...). Spans abertos dentro de trace() compartilham o mesmo trace_id, o que permite
+    ver quanto de uma narração foi busca de dados, pandas, serialização, LLM ou renderização.
+    Os spans recentes ficam em um buffer circular; totais por nome e etapa são acumulados para
+    exportação no formato de texto do Prometheus.
+    '''
+
+    def __init__(self, enabled: bool = INSTRUMENTATION_ENABLED, max_spans: int = INSTRUMENTATION_MAX_SPANS,
+                 export_path: str = INSTRUMENTATION_EXPORT_PATH):
+        self.enabled = enabled
+        self.export_path = export_path
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: [0, 0.0])
+        self._tokens = defaultdict(int)
+
+    @contextmanager
+    def trace(self, name: str, **attrs):
+        '''
+        Agrupa os spans de uma ação do usuário (ex.: gerar uma narração) sob um mesmo trace_id.
+        Args:
+            name (str): Nome da ação
+            **attrs: Atributos herdados por todos os spans do trace (ex.: match_id)
+        '''
+        trace = {'trace_id': uuid.uuid4().hex[:12], 'trace': name, **attrs}
+        token = _current_trace.set(trace)
+        try:
+            with self.span(name, 'total'):
+                yield trace
+        finally:
+            _current_trace.reset(token)
+
+    @contextmanager
+    def span(self, name: str, stage: str, **attrs):
+        '''
+        Cronometra um bloco de código. O dicionário retornado pode receber atributos
+        durante a execução (ou via annotate).
+        Args:
+            name (str): Nome do span
+            stage (str): Etapa (fetch, transform, serialize, llm, render ou total)
+            **attrs: Atributos do span
+        '''
+        if not self.enabled:
+            yield attrs
+            return
+        start = time.perf_counter()
+        error = None
+        try:
+            with self.active(attrs):
+                yield attrs
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if error:
+                attrs['error'] = error
+            self.record(name, stage, (time.perf_counter() - start) * 1000, **attrs)
+
+    @contextmanager
+    def active(self, attrs: dict):
+        '''Torna os atributos o span atual do contexto, para que annotate os atualize'''
+        token = _current_span.set(attrs)
+        try:
+            yield attrs
+        finally:
+            _current_span.reset(token)
+
+    def annotate(self, **attrs):
+        '''Adiciona atributos ao span aberto mais interno do contexto atual'''
+        current = _current_span.get()
+        if current is not None:
+            current.update(attrs)
+
+    def record(self, name: str, stage: str, duration_ms: float, **attrs):
+        '''
+        Registra um span já medido.
+        Args:
+            name (str): Nome do span
+            stage (str): Etapa
+            duration_ms (float): Duração em milissegundos
+            **attrs: Atributos do span
+        '''
+        if not self.enabled:
+            return
+        trace = _current_trace.get() or {}
+        span = {
+            'name': name,
+            'stage': stage,
+            'duration_ms': round(duration_ms, 3),
+            'timestamp': time.time(),
+            **trace,
+            **attrs
+        }
+        with self._lock:
+            self._spans.append(span)
+            totals = self._durations[(name, stage)]
+            totals[0] += 1
+            totals[1] += duration_ms / 1000
+            for direction in ('prompt', 'response'):
+                if f'{direction}_tokens' in attrs:
+                    self._tokens[(name, direction)] += int(attrs[f'{direction}_tokens'])
+        if self.export_path:
+            with self._lock, open(self.export_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(span, ensure_ascii=False, default=str) + '\n')
+
+    def spans(self, limit: int = None, **filters) -> list:
+        '''
+        Retorna os spans recentes, do mais antigo ao mais novo.
+        Args:
+            limit (int): Número máximo de spans
+            **filters: Atributos que os spans devem ter (ex.: match_id=123)
+        Returns:
+            list: Spans
+        '''
+        with self._lock:
+            spans = [span for span in self._spans
+                     if all(span.get(key) == value for key, value in filters.items())]
+        return spans[-limit:] if limit else spans
+
+    def export_jsonl(self, **filters) -> str:
+        '''Spans recentes em JSON lines'''
+        return ''.join(json.dumps(span, ensure_ascii=False, default=str) + '\n'
+                       for span in self.spans(**filters))
+
+    def prometheus_text(self, prefix: str = 'futebol') -> str:
+        '''
+        Totais acumulados no formato de texto do Prometheus.
+        Returns:
+            str: Métricas de duração por span/etapa e de tokens por span/direção
+        '''
+        def label(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+        with self._lock:
+            durations = dict(self._durations)
+            tokens = dict(self._tokens)
+        lines = [f'# HELP {prefix}_span_duration_seconds Duração das etapas instrumentadas',
+                 f'# TYPE {prefix}_span_duration_seconds summary']
+        for (name, stage), (count, total) in sorted(durations.items()):
+            labels = f'name="{label(name)}",stage="{label(stage)}"'
+            lines.append(f'{prefix}_span_duration_seconds_count{{{labels}}} {count}')
+            lines.append(f'{prefix}_span_duration_seconds_sum{{{labels}}} {total:.6f}')
+        lines += [f'# HELP {prefix}_tokens_total Tokens estimados de prompts e respostas',
+                  f'# TYPE {prefix}_tokens_total counter']
+        for (name, direction), count in sorted(tokens.items()):
+            lines.append(f'{prefix}_tokens_total{{name="{label(name)}",direction="{direction}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._durations.clear()
+            self._tokens.clear()
+
+
+def text_size(prefix: str, text: str) -> dict:
+    '''
+    Atributos de tamanho de um texto para os spans.
+    Args:
+        prefix (str): 'prompt' ou 'response'
+        text (str): Texto medido
+    Returns:
+        dict: Caracteres e tokens estimados
+    '''
+    return {f'{prefix}_chars': len(text), f'{prefix}_tokens': estimate_tokens(text)}
+
+
+def propagate_context(func):
+    '''
+    Envolve uma função para rodar em outra thread com o trace atual (contextvars não são
+    herdados pelas threads de um ThreadPoolExecutor).
+    '''
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+
+tracer = Tracer()
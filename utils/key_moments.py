@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+from utils.player_stats import SHOOTOUT_PERIOD
+from utils.prompt_encoder import encode_table
+
+# Tamanho das janelas de agregação por time, em minutos
+WINDOW_MINUTES = 15
+# Primeiro período da prorrogação (3 e 4), agregada em janelas próprias depois do minuto 90
+EXTRA_TIME_PERIOD = 3
+# Limites para manter o resumo com tamanho aproximadamente constante por partida
+MAX_TIMELINE_EVENTS = 60
+TOP_PERFORMERS = 5
+
+
+def _column(events: pd.DataFrame, name: str) -> pd.Series:
+    if name in events:
+        return events[name]
+    return pd.Series(np.nan, index=events.index, dtype=object)
+
+
+def key_event_timeline(events: pd.DataFrame, max_events: int = MAX_TIMELINE_EVENTS) -> pd.DataFrame:
+    '''
+    Função que extrai a linha do tempo dos eventos-chave: gols, chutes, cartões e substituições.
+    As cobranças da disputa de pênaltis entram como 'Shootout' (com o resultado no detalhe), não como
+    chutes ou gols, pois não contam no placar da partida.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+        max_events (int): Número máximo de eventos na linha do tempo (gols e cartões têm prioridade)
+    Returns:
+        pd.DataFrame: Eventos-chave com minuto, segundo, time, jogador, tipo e detalhe
+    '''
+    event_type = events['type']
+    shot_outcome = _column(events, 'shot_outcome')
+    card = _column(events, 'foul_committed_card').fillna(
+        _column(events, 'bad_behaviour_card'))
+
+    kinds = pd.Series(None, index=events.index, dtype=object)
+    details = pd.Series('', index=events.index, dtype=object)
+    priority = pd.Series(np.inf, index=events.index)
+
+    shots = event_type == 'Shot'
+    kinds[shots] = 'Shot'
+    details[shots] = shot_outcome[shots].fillna('').astype(str)
+    xg = _column(events, 'shot_statsbomb_xg')
+    has_xg = shots & xg.notna()
+    details[has_xg] = details[has_xg] + ' xG ' + \
+        xg[has_xg].astype(float).round(2).astype(str)
+    priority[shots] = 2
+
+    goals = shots & (shot_outcome == 'Goal') & (_column(events, 'period') != SHOOTOUT_PERIOD)
+    kinds[goals] = 'Goal'
+    priority[goals] = 0
+
+    shootout = shots & (_column(events, 'period') == SHOOTOUT_PERIOD)
+    kinds[shootout] = 'Shootout'
+    details[shootout] = shot_outcome[shootout].fillna('').astype(str)
+    priority[shootout] = 1
+
+    own_goals = event_type == 'Own Goal For'
+    kinds[own_goals] = 'Own Goal'
+    priority[own_goals] = 0
+
+    cards = card.notna()
+    kinds[cards] = 'Card'
+    details[cards] = card[cards].astype(str)
+    priority[cards] = 1
+
+    substitutions = event_type == 'Substitution'
+    kinds[substitutions] = 'Substitution'
+    details[substitutions] = 'sai, entra ' + \
+        _column(events, 'substitution_replacement')[
+            substitutions].fillna('').astype(str)
+    priority[substitutions] = 1
+
+    selected = kinds.notna()
+    timeline = pd.DataFrame({
+        'minute': events['minute'],
+        'second': _column(events, 'second'),
+        'period': _column(events, 'period'),
+        'team': events['team'],
+        'player': _column(events, 'player'),
+        'kind': kinds,
+        'detail': details,
+        'priority': priority
+    })[selected]
+
+    timeline = timeline.sort_values(
+        ['priority', 'minute'], kind='stable').head(max_events)
+    timeline = timeline.sort_values(['period', 'minute', 'second'])
+    return timeline.drop(columns=['priority', 'period']).reset_index(drop=True)
+
+
+def window_aggregates(events: pd.DataFrame, window: int = WINDOW_MINUTES) -> pd.DataFrame:
+    '''
+    Função que agrega por time e janela de minutos: eventos, passes, passes completos, chutes e xG.
+    Os acréscimos de cada tempo ficam na última janela do tempo regulamentar (ou da prorrogação, que
+    tem janelas próprias a partir do minuto 90); a disputa de pênaltis fica de fora.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+        window (int): Tamanho da janela em minutos
+    Returns:
+        pd.DataFrame: Uma linha por (janela, time) com as agregações e a participação do time nos eventos da janela
+    '''
+    period = _column(events, 'period')
+    events = events[period != SHOOTOUT_PERIOD]
+    last_window = 90 // window - 1
+    last_extra_window = max(120 // window - 1, last_window + 1)
+    windows = events['minute'] // window
+    extra_time = period[events.index] >= EXTRA_TIME_PERIOD
+    windows = windows.clip(upper=last_window).where(
+        ~extra_time, windows.clip(lower=last_window + 1, upper=last_extra_window))
+    is_pass = events['type'] == 'Pass'
+    is_shot = events['type'] == 'Shot'
+
+    frame = pd.DataFrame({
+        'window': windows,
+        'team': events['team'],
+        'events': 1,
+        'passes': is_pass.astype(int),
+        'passes_completed': (is_pass & _column(events, 'pass_outcome').isna()).astype(int),
+        'shots': is_shot.astype(int),
+        'xg': _column(events, 'shot_statsbomb_xg').where(is_shot, 0.0).fillna(0.0).astype(float)
+    })
+    aggregates = frame.groupby(['window', 'team'], observed=True).sum()
+    aggregates['share'] = (aggregates['events'] /
+                           aggregates.groupby(level='window')['events'].transform('sum')).round(2)
+    aggregates['xg'] = aggregates['xg'].round(2)
+    aggregates = aggregates.reset_index()
+    aggregates['window'] = aggregates['window'].map(
+        lambda w: f"{w * window}+" if w in (last_window, last_extra_window) else f"{w * window}-{(w + 1) * window}")
+    return aggregates
+
+
+def momentum_swings(aggregates: pd.DataFrame) -> list:
+    '''
+    Função que identifica as janelas em que o time dominante (maior participação nos eventos) muda.
+    Args:
+        aggregates (pd.DataFrame): Resultado de window_aggregates
+    Returns:
+        list: Lista de dicionários com a janela e o novo time dominante
+    '''
+    dominant = aggregates.loc[aggregates.groupby(
+        'window', sort=False)['share'].idxmax(), ['window', 'team', 'share']]
+    changed = dominant['team'] != dominant['team'].shift()
+    changed.iloc[0] = False
+    return dominant[changed].to_dict('records')
+
+
+def top_performers(player_stats: pd.DataFrame, n: int = TOP_PERFORMERS) -> pd.DataFrame:
+    '''
+    Função que retorna os jogadores de maior destaque na partida.
+    Args:
+        player_stats (pd.DataFrame): Tabela de estatísticas dos jogadores
+        n (int): Número de jogadores
+    Returns:
+        pd.DataFrame: Jogadores ordenados por gols, assistências, chutes e passes completos
+    '''
+    columns = ['team', 'goals', 'assists', 'shots', 'passes_completed',
+               'interceptions', 'ball_recoveries']
+    return player_stats[columns].sort_values(
+        ['goals', 'assists', 'shots', 'passes_completed'], ascending=False).head(n)
+
+
+def in_play_stats(player_stats: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Função que remove da tabela de estatísticas os chutes e gols da disputa de pênaltis, que não contam
+    no placar da partida.
+    Args:
+        player_stats (pd.DataFrame): Tabela de estatísticas dos jogadores
+        events (pd.DataFrame): DataFrame com os eventos da partida
+    Returns:
+        pd.DataFrame: Tabela sem as cobranças da disputa (a própria tabela se não houve disputa)
+    '''
+    kicks = (_column(events, 'period') == SHOOTOUT_PERIOD) & (events['type'] == 'Shot')
+    if not kicks.any():
+        return player_stats
+    kickers = events.loc[kicks, 'player'].astype(object)
+    scored = kickers[_column(events, 'shot_outcome')[kicks] == 'Goal']
+    table = player_stats.copy()
+    for column, players in (('shots', kickers), ('goals', scored)):
+        table[column] = table[column] - players.value_counts().reindex(table.index, fill_value=0)
+    return table
+
+
+def extract_key_moments(events: pd.DataFrame, player_stats: pd.DataFrame) -> dict:
+    '''
+    Função que produz o resumo limitado da partida usado na narração.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+        player_stats (pd.DataFrame): Tabela de estatísticas dos jogadores
+    Returns:
+        dict: Linha do tempo, agregações por janela, viradas de domínio e destaques
+    '''
+    aggregates = window_aggregates(events)
+    return {
+        'timeline': key_event_timeline(events),
+        'windows': aggregates,
+        'momentum': momentum_swings(aggregates),
+        'top_performers': top_performers(in_play_stats(player_stats, events))
+    }
+
+
+def encode_key_moments(moments: dict) -> str:
+    '''
+    Codifica o resumo de momentos-chave como texto compacto para o prompt.
+    Args:
+        moments (dict): Resultado de extract_key_moments
+    Returns:
+        str: Texto com as tabelas do resumo
+    '''
+    timeline = moments['timeline'].set_index('minute')
+    windows = moments['windows'].set_index('window')
+    momentum = '\n'.join(f"{m['window']}: {m['team']} ({m['share']})"
+                         for m in moments['momentum']) or 'sem mudanças'
+    return '\n\n'.join([
+        encode_table('key_events', timeline),
+        encode_table(f'team_windows_{WINDOW_MINUTES}min', windows),
+        'momentum_swings:\n' + momentum,
+        encode_table('top_performers', moments['top_performers'])
+    ])
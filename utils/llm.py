@@ -0,0 +1,247 @@
+import hashlib
+import os
+import threading
+import time
+
+from utils.instrumentation import text_size, tracer
+from utils.llm_cache import llm_cache
+
+# Modelo e configuração de geração usados nas narrações e perfis
+MODEL_NAME = 'gemini-1.5-flash'
+GENERATION_CONFIG = {
+    'temperature': 0.3,
+    'max_output_tokens': 500,
+    'top_p': 0.95,
+    'top_k': 40
+}
+
+# Backend do LLM: 'gemini' (API real) ou 'fake' (offline, para testes e benchmarks)
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+# Número de palavras por pedaço ao reproduzir respostas do cache
+REPLAY_CHUNK_WORDS = 8
+# Motivos de término de uma geração completa; respostas bloqueadas ou interrompidas não vão para o cache
+COMPLETE_FINISH_REASONS = ('STOP', 'MAX_TOKENS')
+
+
+class GeminiBackend:
+    '''
+    Backend que chama a API do Gemini, com geração completa ou em streaming.
+    '''
+
+    name = 'gemini'
+
+    def __init__(self, api_key: str = None):
+        # google.genai é importado aqui para não pesar na importação do app e do backend falso
+        from google import genai
+        from google.genai import types
+
+        self.types = types
+        self.client = genai.Client(api_key=api_key or os.getenv('GEMINI_API_KEY'))
+
+    def generate(self, prompt: str, model: str = MODEL_NAME, config: dict = GENERATION_CONFIG) -> str:
+        response = self.client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=self.types.GenerateContentConfig(**config))
+        return response.text
+
+    def stream(self, prompt: str, model: str = MODEL_NAME, config: dict = GENERATION_CONFIG):
+        finish_reason = None
+        for chunk in self.client.models.generate_content_stream(
+                model=model,
+                contents=prompt,
+                config=self.types.GenerateContentConfig(**config)):
+            usage = getattr(chunk, 'usage_metadata', None)
+            if usage is not None and usage.prompt_token_count:
+                # Contagem real de tokens informada pela API
+                tracer.annotate(api_prompt_tokens=usage.prompt_token_count,
+                                api_response_tokens=usage.candidates_token_count)
+            feedback = getattr(chunk, 'prompt_feedback', None)
+            if feedback is not None and feedback.block_reason is not None:
+                finish_reason = f'BLOCKED_{getattr(feedback.block_reason, "name", feedback.block_reason)}'
+            for candidate in getattr(chunk, 'candidates', None) or []:
+                if candidate.finish_reason is not None:
+                    finish_reason = getattr(candidate.finish_reason, 'name', str(candidate.finish_reason))
+            if chunk.text:
+                yield chunk.text
+        # Motivo de término informado pela API (stream_response só grava no cache gerações completas)
+        tracer.annotate(finish_reason=finish_reason or 'UNKNOWN')
+
+
+class FakeStreamingBackend:
+    '''
+    Backend falso que gera um texto determinístico a partir do hash do prompt, em pedaços,
+    com atraso configurável. Permite testar o streaming e medir throughput sem rede.
+    '''
+
+    name = 'fake'
+
+    def __init__(self, words: int = 250, chunk_words: int = 5, delay: float = 0.0,
+                 first_chunk_delay: float = 0.0):
+        self.words = words
+        self.chunk_words = chunk_words
+        self.delay = delay
+        self.first_chunk_delay = first_chunk_delay
+        self.calls = 0
+
+    def _text(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        words = [f'palavra{i}' for i in range(self.words - 3)]
+        return ' '.join(['Resposta', 'simulada', digest] + words)
+
+    def generate(self, prompt: str, model: str = MODEL_NAME, config: dict = GENERATION_CONFIG) -> str:
+        return ''.join(self.stream(prompt, model, config))
+
+    def stream(self, prompt: str, model: str = MODEL_NAME, config: dict = GENERATION_CONFIG):
+        self.calls += 1
+        time.sleep(self.first_chunk_delay)
+        for i, chunk in enumerate(split_chunks(self._text(prompt), self.chunk_words)):
+            if i > 0:
+                time.sleep(self.delay)
+            yield chunk
+
+
+_backend = None
+
+
+def get_llm_backend():
+    '''
+    Retorna o backend do LLM configurado por LLM_BACKEND, criado no primeiro uso.
+    Returns:
+        GeminiBackend | FakeStreamingBackend: Backend do LLM
+    '''
+    global _backend
+    if _backend is None:
+        _backend = FakeStreamingBackend() if LLM_BACKEND == 'fake' else GeminiBackend()
+    return _backend
+
+
+def set_llm_backend(backend):
+    '''
+    Substitui o backend do LLM (ex.: FakeStreamingBackend nos testes). O nome do backend (atributo name)
+    passa a ser o LLM_BACKEND atual, seguido também pelo modelo dos agentes (agent.get_chat_model).
+    '''
+    global _backend, LLM_BACKEND
+    _backend = backend
+    LLM_BACKEND = getattr(backend, 'name', LLM_BACKEND)
+
+
+def get_llm_backend_name() -> str:
+    '''Nome do backend do LLM em uso ('gemini' ou 'fake'), lido a cada chamada'''
+    return LLM_BACKEND
+
+
+class RateLimiter:
+    '''
+    Limitador de requisições por minuto, compartilhado entre threads. Cada chamada a acquire
+    reserva o próximo horário livre, espaçando as requisições em 60 / requests_per_minute segundos.
+    '''
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        '''
+        Aguarda até o próximo horário livre.
+        Returns:
+            float: Tempo de espera em segundos
+        '''
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def split_chunks(text: str, chunk_words: int = REPLAY_CHUNK_WORDS):
+    '''
+    Divide um texto em pedaços de algumas palavras, preservando os espaços.
+    Args:
+        text (str): Texto completo
+        chunk_words (int): Palavras por pedaço
+    Returns:
+        generator: Pedaços do texto
+    '''
+    words = text.split(' ')
+    for i in range(0, len(words), chunk_words):
+        chunk = ' '.join(words[i:i + chunk_words])
+        yield chunk if i + chunk_words >= len(words) else chunk + ' '
+
+
+def cached_response(prompt: str, scope: dict):
+    '''
+    Retorna a resposta já gerada para o prompt e escopo, ou None.
+    Args:
+        prompt (str): Prompt enviado ao modelo
+        scope (dict): Escopo da resposta (partida, jogador, estilo)
+    Returns:
+        str | None: Resposta em cache
+    '''
+    return llm_cache.get(llm_cache.make_key(MODEL_NAME, GENERATION_CONFIG, prompt, scope))
+
+
+def stream_response(prompt: str, scope: dict, bypass_cache: bool = False, backend=None):
+    '''
+    Gera a resposta do LLM em streaming. Respostas já geradas são reproduzidas do cache
+    persistente pelo mesmo caminho de streaming; respostas novas são gravadas no cache ao final, apenas
+    se não estiverem vazias e a geração terminou normalmente (COMPLETE_FINISH_REASONS).
+    Backends sem motivo de término (ex.: o falso) são considerados completos.
+    Args:
+        prompt (str): Prompt enviado ao modelo
+        scope (dict): Escopo da resposta (partida, jogador, estilo)
+        bypass_cache (bool): Ignora a resposta em cache e gera novamente
+        backend: Backend do LLM (padrão: get_llm_backend())
+    Returns:
+        generator: Pedaços do texto gerado
+    '''
+    key = llm_cache.make_key(MODEL_NAME, GENERATION_CONFIG, prompt, scope)
+    span = {'kind': scope.get('kind'), 'model': MODEL_NAME, **text_size('prompt', prompt)}
+    start = time.perf_counter()
+    cached = None if bypass_cache else cached_response(prompt, scope)
+    span['cache_hit'] = cached is not None
+    if cached is not None:
+        chunks = split_chunks(cached)
+    else:
+        backend = backend or get_llm_backend()
+        chunks = backend.stream(prompt, MODEL_NAME, GENERATION_CONFIG)
+
+    # Mede apenas o tempo gasto esperando o modelo, sem o tempo de quem consome os pedaços
+    text = []
+    llm_seconds = time.perf_counter() - start
+    while True:
+        chunk_start = time.perf_counter()
+        with tracer.active(span):
+            chunk = next(chunks, None)
+        llm_seconds += time.perf_counter() - chunk_start
+        if chunk is None:
+            break
+        if not text:
+            span['first_chunk_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        text.append(chunk)
+        yield chunk
+
+    response = ''.join(text)
+    span.update(text_size('response', response))
+    tracer.record('llm_response', 'llm', llm_seconds * 1000, **span)
+    complete = span.get('finish_reason', 'STOP') in COMPLETE_FINISH_REASONS
+    if cached is None and complete and response.strip():
+        llm_cache.put(key, MODEL_NAME, prompt, scope, response)
+
+
+def generate_response(prompt: str, scope: dict, bypass_cache: bool = False, backend=None) -> str:
+    '''
+    Gera a resposta completa do LLM, reutilizando o cache persistente.
+    Args:
+        prompt (str): Prompt enviado ao modelo
+        scope (dict): Escopo da resposta (partida, jogador, estilo)
+        bypass_cache (bool): Ignora a resposta em cache e gera novamente
+        backend: Backend do LLM (padrão: get_llm_backend())
+    Returns:
+        str: Texto gerado
+    '''
+    return ''.join(stream_response(prompt, scope, bypass_cache, backend))
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Configurações do cache de respostas do LLM, ajustáveis por variáveis de ambiente
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'llm_cache.sqlite')
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+
+
+class LLMResponseCache:
+    '''
+    Cache persistente (SQLite) das respostas do LLM para narrações e perfis de jogadores.
+
+    A chave combina modelo, configuração de geração, hash do prompt e o escopo da resposta
+    (partida, jogador, estilo de narração). Entradas expiram após o TTL e, acima do limite de
+    entradas, as menos acessadas recentemente são removidas.
+    '''
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: int = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model: str, config: dict, prompt: str, scope: dict) -> str:
+        '''
+        Gera a chave do cache.
+        Args:
+            model (str): Nome do modelo
+            config (dict): Configuração de geração (temperatura, top_p, ...)
+            prompt (str): Prompt enviado ao modelo
+            scope (dict): Escopo da resposta (ex.: {'kind': 'narration', 'match_id': 1, 'style': 'Formal'})
+        Returns:
+            str: Hash SHA-256 da combinação
+        '''
+        payload = json.dumps({
+            'model': model,
+            'config': config,
+            'prompt_hash': hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+            'scope': scope
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        '''
+        Retorna a resposta armazenada ou None se ausente ou expirada.
+        Args:
+            key (str): Chave gerada por make_key
+        Returns:
+            str | None: Resposta do LLM
+        '''
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                'SELECT response, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            conn.execute(
+                'UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, model: str, prompt: str, scope: dict, response: str):
+        '''
+        Armazena uma resposta e aplica a política de remoção (TTL e número máximo de entradas).
+        Args:
+            key (str): Chave gerada por make_key
+            model (str): Nome do modelo
+            prompt (str): Prompt enviado ao modelo
+            scope (dict): Escopo da resposta
+            response (str): Texto gerado
+        '''
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, model, json.dumps(scope, sort_keys=True, ensure_ascii=False),
+                 hashlib.sha256(prompt.encode('utf-8')).hexdigest(), response, now, now)
+            )
+            conn.execute('DELETE FROM responses WHERE created_at < ?',
+                         (now - self.ttl,))
+            conn.execute('''
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def stats(self) -> dict:
+        with self._lock, self._connect() as conn:
+            entries = conn.execute(
+                'SELECT COUNT(*) FROM responses').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+
+llm_cache = LLMResponseCache()
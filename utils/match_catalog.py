@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+from utils.data_source import data_source
+from utils.match_sync import match_sync
+from utils.narration import build_match_info
+
+# Tempo (segundos) que as listas de partidas de uma temporada ficam em memória antes de serem
+# buscadas novamente na fonte de dados (que ainda passa pelo cache HTTP). Uma sincronização da
+# temporada (sync.py) também faz a lista ser buscada novamente.
+MATCH_CATALOG_TTL = int(os.getenv('MATCH_CATALOG_TTL', '3600'))
+
+
+class SeasonMatches:
+    '''
+    Partidas de uma competição/temporada com os índices usados pela barra lateral.
+    '''
+
+    def __init__(self, matches: dict, sync_stamp: int = None):
+        ordered = sorted(matches.values(), key=lambda m: (
+            str(m.get('match_date')), str(m.get('kick_off'))))
+        self.matches = {match['match_id']: match for match in ordered}
+        self.infos = {match_id: build_match_info(match)
+                      for match_id, match in self.matches.items()}
+        self.ids_by_display = {}
+        for match_id, info in self.infos.items():
+            display = f"{info['home_team_name']} vs {info['away_team_name']}"
+            if display in self.ids_by_display:
+                display += f" ({info['match_date']})"
+            self.ids_by_display[display] = match_id
+        self.loaded_at = time.monotonic()
+        # Estado da sincronização da temporada quando a lista foi carregada (MatchSync.state_stamp)
+        self.sync_stamp = sync_stamp
+
+    @property
+    def displays(self) -> list:
+        return list(self.ids_by_display)
+
+
+class MatchCatalog:
+    '''
+    Catálogo de competições, temporadas e partidas, carregado sob demanda e mantido em memória
+    para todo o processo. Resolve nomes para IDs e partidas para suas informações normalizadas
+    com consultas a dicionários, sem repetir chamadas à fonte de dados a cada interação.
+    '''
+
+    def __init__(self, ttl: int = MATCH_CATALOG_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._competitions = None
+        self._competition_ids = {}
+        self._seasons = {}
+        self._season_matches = {}
+        self._match_infos = {}
+
+    def _load_competitions(self):
+        with self._lock:
+            if self._competitions is not None:
+                return
+            competitions = data_source.competitions()
+            competition_ids = {}
+            seasons = {}
+            for entry in competitions.values():
+                competition_ids.setdefault(entry['competition_name'], entry['competition_id'])
+                seasons.setdefault(entry['competition_id'], {})[entry['season_name']] = entry['season_id']
+            self._competition_ids = competition_ids
+            self._seasons = seasons
+            self._competitions = competitions
+
+    def competition_names(self) -> list:
+        '''
+        Retorna os nomes das competições disponíveis.
+        Returns:
+            list: Nomes das competições em ordem alfabética
+        '''
+        self._load_competitions()
+        return sorted(self._competition_ids)
+
+    def competition_id(self, competition_name: str) -> int:
+        self._load_competitions()
+        return self._competition_ids.get(competition_name)
+
+    def seasons(self, competition_id: int) -> dict:
+        '''
+        Retorna as temporadas de uma competição.
+        Args:
+            competition_id (int): ID da competição
+        Returns:
+            dict: Nome da temporada -> ID da temporada, na ordem do StatsBomb
+        '''
+        self._load_competitions()
+        return dict(self._seasons.get(competition_id, {}))
+
+    def season_matches(self, competition_id: int, season_id: int) -> SeasonMatches:
+        '''
+        Retorna as partidas de uma competição/temporada, buscando na fonte de dados apenas na
+        primeira vez, depois do TTL ou depois de uma sincronização da temporada.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            SeasonMatches: Partidas e índices da temporada
+        '''
+        key = (int(competition_id), int(season_id))
+        season = self._season_matches.get(key)
+        sync_stamp = match_sync.state_stamp(*key)
+        if season is not None and time.monotonic() - season.loaded_at < self.ttl \
+                and season.sync_stamp == sync_stamp:
+            return season
+
+        season = SeasonMatches(data_source.matches(*key), sync_stamp)
+        with self._lock:
+            self._season_matches[key] = season
+            self._match_infos.update(season.infos)
+        return season
+
+    def match_info(self, match_id: int) -> dict:
+        '''
+        Retorna as informações normalizadas de uma partida de uma temporada já carregada.
+        Args:
+            match_id (int): ID da partida
+        Returns:
+            dict | None: Informações da partida (build_match_info)
+        '''
+        return self._match_infos.get(int(match_id))
+
+    def clear(self):
+        with self._lock:
+            self._competitions = None
+            self._competition_ids = {}
+            self._seasons = {}
+            self._season_matches = {}
+            self._match_infos = {}
+
+
+match_catalog = MatchCatalog()
@@ -0,0 +1,59 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.dataprep import get_player_stats_table, load_match_events, load_match_lineups
+from utils.instrumentation import propagate_context, text_size, tracer
+from utils.key_moments import encode_key_moments, extract_key_moments
+from utils.prompt_encoder import encode_lineups
+
+MatchContext = namedtuple(
+    'MatchContext',
+    ['match_id', 'events', 'lineups', 'player_stats', 'lineups_context',
+     'key_moments_context', 'timings']
+)
+
+
+def _timed(timings: dict, stage: str, func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 4)
+
+
+def assemble_match_context(match_id) -> MatchContext:
+    '''
+    Função que monta tudo o que o prompt de narração precisa de uma partida.
+    Escalações e eventos são carregados uma única vez e em paralelo; as estatísticas dos jogadores
+    e os momentos-chave são derivados do DataFrame de eventos já carregado.
+    Args:
+        match_id (int): ID da partida
+    Returns:
+        MatchContext: Dados da partida, contextos codificados e tempo de cada etapa em segundos
+    '''
+    match_id = int(match_id)
+    timings = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        lineups_future = executor.submit(
+            propagate_context(_timed), timings, 'lineups', load_match_lineups, match_id)
+        events_future = executor.submit(
+            propagate_context(_timed), timings, 'events', load_match_events, match_id)
+        lineups = lineups_future.result()
+        events = events_future.result()
+
+    player_stats = _timed(timings, 'player_stats',
+                          get_player_stats_table, match_id)
+    with tracer.span('key_moments', 'transform', match_id=match_id) as span:
+        key_moments_context = _timed(
+            timings, 'key_moments',
+            lambda: encode_key_moments(extract_key_moments(events, player_stats)))
+        span.update(text_size('context', key_moments_context))
+    lineups_context = _timed(timings, 'encode_lineups',
+                             encode_lineups, lineups)
+
+    timings['total'] = round(time.perf_counter() - start, 4)
+    return MatchContext(match_id, events, lineups, player_stats,
+                        lineups_context, key_moments_context, timings)
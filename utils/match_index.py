@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+# Tamanho das faixas de minutos do índice
+MINUTE_BUCKET = 15
+
+
+def chronological(events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Função que ordena os eventos na ordem em que aconteceram na partida.
+    Usa a coluna 'index' do StatsBomb (sequência dos eventos) ou, na falta dela, período, minuto e segundo.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+    Returns:
+        pd.DataFrame: Eventos em ordem cronológica, com índice 0..n-1
+    '''
+    keys = ['index'] if 'index' in events else [
+        col for col in ('period', 'minute', 'second') if col in events]
+    if keys:
+        events = events.sort_values(keys, kind='stable')
+    return events.reset_index(drop=True)
+
+
+def _groups(column: pd.Series) -> dict:
+    '''Valor -> posições (ordenadas) das linhas com esse valor, ignorando nulos'''
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Colunas categóricas (eventos compactos): agrupa pelos códigos inteiros
+        codes = column.cat.codes.to_numpy()
+        categories = column.cat.categories
+        return {categories[code]: positions for code, positions in
+                pd.Series(codes).groupby(codes, sort=False).indices.items() if code >= 0}
+    return column.reset_index(drop=True).groupby(column.to_numpy(), sort=False).indices
+
+
+class MatchIndex:
+    '''
+    Índices secundários de uma partida, construídos uma única vez quando os eventos são carregados.
+
+    Guarda as posições das linhas por time, jogador, tipo de evento e faixa de minutos, além da
+    resolução de mandante e visitante. Os eventos devem estar em ordem cronológica (chronological),
+    então as posições retornadas também estão. O índice é compartilhado entre sessões e não deve
+    ser modificado.
+    '''
+
+    def __init__(self, events: pd.DataFrame, bucket_minutes: int = MINUTE_BUCKET):
+        self.events = events
+        self.bucket_minutes = bucket_minutes
+        self.minutes = events['minute'].to_numpy()
+        self.by_team = _groups(events['team'])
+        self.by_player = _groups(events['player'])
+        self.by_type = _groups(events['type'])
+        self.by_bucket = _groups(pd.Series(self.minutes // bucket_minutes * bucket_minutes))
+
+        # Mandante: time do primeiro 'Starting XI' da partida
+        starting = self.by_type.get('Starting XI')
+        teams = list(self.by_team)
+        self.home_team = events['team'].iat[starting[0]] if starting is not None and len(starting) \
+            else (teams[0] if teams else None)
+        self.away_team = next((team for team in teams if team != self.home_team), None)
+
+        players = events['player'].to_numpy()
+        self.players_by_team = {
+            team: [player for player in pd.unique(players[positions]) if pd.notna(player)]
+            for team, positions in self.by_team.items()
+        }
+
+    @property
+    def teams(self) -> list:
+        return [team for team in (self.home_team, self.away_team) if team is not None]
+
+    @property
+    def nbytes(self) -> int:
+        '''Memória ocupada pelos índices (sem contar o DataFrame de eventos)'''
+        return int(self.minutes.nbytes + sum(
+            positions.nbytes for index in (self.by_team, self.by_player, self.by_type, self.by_bucket)
+            for positions in index.values()))
+
+    def players(self, team: str = None) -> list:
+        '''
+        Retorna os jogadores da partida (ou de um time) na ordem em que aparecem nos eventos.
+        Args:
+            team (str): Nome do time (opcional)
+        Returns:
+            list: Nomes dos jogadores
+        '''
+        if team is not None:
+            return list(self.players_by_team.get(team, []))
+        return [player for team in self.teams for player in self.players_by_team.get(team, [])]
+
+    def rows(self, team: str = None, player: str = None, type: str = None,
+             minute_from: int = None, minute_to: int = None) -> np.ndarray:
+        '''
+        Retorna as posições dos eventos que atendem aos filtros, intersectando os índices.
+        Args:
+            team (str): Nome do time
+            player (str): Nome do jogador
+            type (str): Tipo de evento (ex.: Pass, Shot)
+            minute_from (int): Minuto inicial (inclusive)
+            minute_to (int): Minuto final (inclusive)
+        Returns:
+            np.ndarray: Posições dos eventos em ordem cronológica
+        '''
+        empty = np.array([], dtype=np.intp)
+        positions = None
+        for value, index in ((team, self.by_team), (player, self.by_player), (type, self.by_type)):
+            if value is None:
+                continue
+            found = index.get(value, empty)
+            positions = found if positions is None else np.intersect1d(
+                positions, found, assume_unique=True)
+        return self.in_minutes(positions, minute_from, minute_to)
+
+    def in_minutes(self, positions: np.ndarray = None, minute_from: int = None,
+                   minute_to: int = None) -> np.ndarray:
+        '''
+        Filtra posições por intervalo de minutos.
+        Args:
+            positions (np.ndarray): Posições a filtrar (padrão: todos os eventos)
+            minute_from (int): Minuto inicial (inclusive)
+            minute_to (int): Minuto final (inclusive)
+        Returns:
+            np.ndarray: Posições dentro do intervalo
+        '''
+        if positions is None:
+            positions = np.arange(len(self.events))
+        if minute_from is None and minute_to is None:
+            return positions
+        minute_from = None if minute_from is None else int(minute_from)
+        minute_to = None if minute_to is None else int(minute_to)
+        if minute_from is not None and minute_to is not None and \
+                minute_from % self.bucket_minutes == 0 and (minute_to + 1) % self.bucket_minutes == 0:
+            # Intervalo alinhado às faixas: une as faixas pré-calculadas
+            buckets = [self.by_bucket[start] for start in
+                       range(minute_from, minute_to + 1, self.bucket_minutes) if start in self.by_bucket]
+            in_range = np.concatenate(buckets) if buckets else np.array([], dtype=np.intp)
+            return np.intersect1d(positions, in_range, assume_unique=True)
+        minutes = self.minutes[positions]
+        keep = np.ones(len(positions), dtype=bool)
+        if minute_from is not None:
+            keep &= minutes >= minute_from
+        if minute_to is not None:
+            keep &= minutes <= minute_to
+        return positions[keep]
+
+    def frame(self, **filters) -> pd.DataFrame:
+        '''
+        Retorna a fatia do DataFrame de eventos que atende aos filtros de rows.
+        Returns:
+            pd.DataFrame: Eventos filtrados
+        '''
+        return self.events.iloc[self.rows(**filters)]
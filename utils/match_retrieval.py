@@ -0,0 +1,396 @@
+import math
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils.match_index import MatchIndex
+from utils.player_stats import SHOOTOUT_PERIOD
+from utils.prompt_encoder import TYPE_PRIORITY, encode_lineups
+
+# Trechos retornados por busca (padrão e máximo) e tamanho máximo de cada trecho em caracteres:
+# o tamanho da resposta da ferramenta não depende da duração nem do número de eventos da partida
+RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', '5'))
+RETRIEVAL_MAX_TOP_K = 10
+RETRIEVAL_MAX_CHUNK_CHARS = int(os.getenv('RETRIEVAL_MAX_CHUNK_CHARS', '900'))
+# Eventos por trecho da linha do tempo (os eventos de um mesmo minuto são divididos acima disso)
+CHUNK_EVENTS = 12
+# Eventos anteriores incluídos no trecho de cada gol
+GOAL_CONTEXT_EVENTS = 6
+# Distância máxima (em eventos) entre o passe de assistência e o gol
+ASSIST_WINDOW_EVENTS = 25
+# Peso dos termos do título do trecho (ex.: "second goal of the match", nome do jogador) no índice
+TITLE_WEIGHT = 3
+# Tipos de evento com pouca informação para perguntas (recepções, conduções, pressões, formações),
+# fora dos trechos da linha do tempo
+LOW_INFORMATION_PRIORITY = 4
+# Parâmetros do BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'at', 'by', 'did', 'do', 'does', 'for', 'from', 'game', 'had', 'has',
+    'have', 'how', 'in', 'is', 'it', 'many', 'match', 'me', 'of', 'on', 'or', 'the', 'their', 'to',
+    'was', 'were', 'what', 'when', 'where', 'which', 'who', 'whom', 'why', 'with'
+}
+ORDINALS = ['first', 'second', 'third', 'fourth', 'fifth', 'sixth', 'seventh', 'eighth', 'ninth', 'tenth']
+
+# Colunas com nomes de times e jogadores registrados em cada trecho (índice de campos)
+ENTITY_COLUMNS = ['team', 'player', 'pass_recipient', 'substitution_replacement']
+# Tamanho mínimo de uma parte do nome (ex.: sobrenome) para identificar um jogador ou time na pergunta
+MIN_ALIAS_CHARS = 4
+
+# Trecho indexado: tipo (goal, timeline, player, lineup), título, texto mostrado ao agente e
+# times/jogadores citados
+Chunk = namedtuple('Chunk', ['kind', 'title', 'text', 'entities'], defaults=[frozenset()])
+
+
+def _normalize(text: str) -> str:
+    '''Minúsculas e sem acentos'''
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list:
+    '''
+    Quebra um texto em termos para o índice: minúsculas, sem acentos, sem palavras vazias e com
+    os sufixos mais comuns do inglês removidos (assisted/assists -> assist, goals -> goal).
+    Args:
+        text (str): Texto do trecho ou da pergunta
+    Returns:
+        list: Termos
+    '''
+    return [_stem(token) for token in re.findall(r'[a-z0-9]+', _normalize(text)) if token not in STOPWORDS]
+
+
+def _stem(token: str) -> str:
+    if len(token) > 5 and token.endswith('ing'):
+        return token[:-3]
+    if len(token) > 4 and token.endswith('ed'):
+        return token[:-2]
+    if len(token) > 4 and token.endswith('es') and token[-3] in 'sxz':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def _ordinal(n: int) -> str:
+    return ORDINALS[n - 1] if n <= len(ORDINALS) else f'{n}th'
+
+
+def _column(events: pd.DataFrame, name: str) -> pd.Series:
+    if name in events:
+        return events[name].astype(object)
+    return pd.Series(None, index=events.index, dtype=object)
+
+
+def event_lines(events: pd.DataFrame) -> pd.Series:
+    '''
+    Descreve cada evento em uma linha de texto: minuto, time, jogador, tipo e detalhes
+    (resultado, recebedor do passe, assistência, tipo de chute, cartão e substituto).
+    Args:
+        events (pd.DataFrame): Eventos (compactos ou no formato do statsbombpy)
+    Returns:
+        pd.Series: Uma linha por evento
+    '''
+    clock = events['minute'].astype(str) + ':' + (
+        events['second'].astype(int).astype(str).str.zfill(2) if 'second' in events else '00')
+    lines = clock.str.cat([_column(events, 'team').fillna(''),
+                           _column(events, 'player').fillna(''),
+                           _column(events, 'type').fillna('')], sep=' | ')
+    details = [
+        ('shot_type', '{}'), ('shot_outcome', '{}'), ('pass_outcome', '{}'), ('dribble_outcome', '{}'),
+        ('duel_outcome', '{}'), ('interception_outcome', '{}'), ('pass_recipient', 'to {}'),
+        ('foul_committed_card', '{}'), ('bad_behaviour_card', '{}'),
+        ('substitution_replacement', 'replaced by {}'),
+    ]
+    for column, template in details:
+        values = _column(events, column)
+        present = values.notna()
+        if present.any():
+            lines = lines.where(~present, lines + ' | ' + values[present].map(template.format))
+    assist = _column(events, 'pass_goal_assist') == True  # noqa: E712
+    if assist.any():
+        lines = lines.where(~assist, lines + ' | goal assist')
+    return lines
+
+
+class MatchRetrievalIndex:
+    '''
+    Índice invertido (BM25) sobre trechos dos dados de uma partida, para a ferramenta de busca
+    do agente de Q&A.
+
+    Os trechos são: um por gol (autor, assistência, placar e eventos anteriores), a linha do tempo
+    em blocos de até CHUNK_EVENTS eventos do mesmo minuto, um por jogador (time, número e estatísticas)
+    e um por escalação. Além dos termos, cada trecho registra os times e jogadores citados: quando a
+    pergunta cita um deles (nome completo ou uma parte exclusiva, como o sobrenome), a busca fica
+    restrita aos trechos que o citam. O índice é construído uma única vez por partida; cada busca pontua
+    apenas os trechos que contêm os termos da pergunta e devolve no máximo RETRIEVAL_MAX_TOP_K trechos curtos.
+    '''
+
+    def __init__(self, chunks: list):
+        self.chunks = chunks
+        postings = defaultdict(dict)
+        entities = defaultdict(list)
+        lengths = []
+        for chunk_id, chunk in enumerate(chunks):
+            for name in chunk.entities:
+                entities[_normalize(name)].append(chunk_id)
+            terms = Counter(tokenize(chunk.text))
+            for term in tokenize(chunk.title):
+                terms[term] += TITLE_WEIGHT
+            lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                postings[term][chunk_id] = count
+        self.lengths = np.array(lengths, dtype=np.float64)
+        self.avg_length = float(self.lengths.mean()) if len(chunks) else 0.0
+        self.postings = {
+            term: (np.fromiter(docs.keys(), dtype=np.int32, count=len(docs)),
+                   np.fromiter(docs.values(), dtype=np.float64, count=len(docs)))
+            for term, docs in postings.items()
+        }
+        self.idf = {term: math.log(1 + (len(chunks) - len(ids) + 0.5) / (len(ids) + 0.5))
+                    for term, (ids, _) in self.postings.items()}
+        self.entities = {name: np.array(ids, dtype=np.int32) for name, ids in entities.items()}
+        # Trecho de estatísticas de cada jogador, sempre incluído quando ele é citado na pergunta
+        self.profiles = {_normalize(chunk.title.split(' (')[0]): chunk_id
+                         for chunk_id, chunk in enumerate(chunks) if chunk.kind == 'player'}
+        # Partes do nome que identificam um único time ou jogador (ex.: sobrenome)
+        owners = defaultdict(set)
+        for name in self.entities:
+            for part in re.findall(r'[a-z0-9]+', name):
+                if len(part) >= MIN_ALIAS_CHARS and part not in STOPWORDS:
+                    owners[part].add(name)
+        self.aliases = {part: next(iter(names)) for part, names in owners.items() if len(names) == 1}
+
+    def mentioned(self, query: str) -> list:
+        '''
+        Times e jogadores da partida citados na pergunta, pelo nome completo ou por uma parte exclusiva.
+        Args:
+            query (str): Pergunta
+        Returns:
+            list: Nomes normalizados (nomes contidos em outro nome citado são descartados)
+        '''
+        query = _normalize(query)
+        found = {name for name in self.entities if name in query}
+        found |= {self.aliases[part] for part in re.findall(r'[a-z0-9]+', query) if part in self.aliases}
+        return sorted(name for name in found if not any(name != other and name in other for other in found))
+
+    def _allowed(self, names: list) -> np.ndarray:
+        '''Máscara dos trechos que citam todos os times/jogadores da pergunta'''
+        mask = np.ones(len(self.chunks), dtype=bool)
+        for name in names:
+            cited = np.zeros(len(self.chunks), dtype=bool)
+            cited[self.entities[name]] = True
+            mask &= cited
+        if not mask.any():
+            # Nenhum trecho cita todos: aceita os que citam qualquer um deles
+            mask = np.zeros(len(self.chunks), dtype=bool)
+            mask[np.concatenate([self.entities[name] for name in names])] = True
+        return mask
+
+    @property
+    def nbytes(self) -> int:
+        '''Memória aproximada do índice (trechos e listas invertidas)'''
+        return int(self.lengths.nbytes + sum(len(chunk.text) + len(chunk.title) for chunk in self.chunks) +
+                   sum(ids.nbytes + counts.nbytes for ids, counts in self.postings.values()))
+
+    def search(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> list:
+        '''
+        Retorna os trechos mais relevantes para a pergunta.
+        Args:
+            query (str): Pergunta ou palavras-chave
+            top_k (int): Número de trechos (no máximo RETRIEVAL_MAX_TOP_K)
+        Returns:
+            list: Pares (pontuação, Chunk), do mais relevante para o menos relevante; as estatísticas
+            dos jogadores citados vêm primeiro (com pontuação 0)
+        '''
+        top_k = max(1, min(int(top_k), RETRIEVAL_MAX_TOP_K))
+        terms = set(tokenize(query))
+        names = self.mentioned(query)
+        if names:
+            # Os nomes citados já filtram os trechos; a pontuação fica com os demais termos
+            terms = (terms - set(tokenize(' '.join(names)))) or terms
+        scores = np.zeros(len(self.chunks))
+        for term in terms:
+            if term not in self.postings:
+                continue
+            ids, counts = self.postings[term]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[ids] / self.avg_length)
+            scores[ids] += self.idf[term] * counts * (BM25_K1 + 1) / (counts + norm)
+        if names:
+            scores[~self._allowed(names)] = 0
+        pinned = [self.profiles[name] for name in names if name in self.profiles]
+        scores[pinned] = 0
+        matched = np.flatnonzero(scores)
+        best = pinned + matched[np.argsort(-scores[matched], kind='stable')].tolist()
+        return [(float(scores[chunk_id]), self.chunks[chunk_id]) for chunk_id in best[:top_k]]
+
+    def render(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> str:
+        '''
+        Busca e formata os trechos como resposta da ferramenta do agente.
+        Args:
+            query (str): Pergunta ou palavras-chave
+            top_k (int): Número de trechos
+        Returns:
+            str: Trechos numerados com tipo e título, cada um com até RETRIEVAL_MAX_CHUNK_CHARS caracteres
+        '''
+        results = self.search(query, top_k)
+        if not results:
+            return 'No matching passages. Try other keywords (player, team, event type or minute).'
+        parts = []
+        for rank, (score, chunk) in enumerate(results, start=1):
+            text = chunk.text if len(chunk.text) <= RETRIEVAL_MAX_CHUNK_CHARS \
+                else chunk.text[:RETRIEVAL_MAX_CHUNK_CHARS].rsplit('\n', 1)[0] + '\n...'
+            parts.append(f'[{rank}] {chunk.kind}: {chunk.title}\n{text}')
+        return '\n\n'.join(parts)
+
+
+def _entities(names: list, positions) -> frozenset:
+    '''Times e jogadores citados nos eventos das posições dadas'''
+    found = set()
+    for column in names:
+        found.update(value for value in column[positions] if isinstance(value, str) and value)
+    return frozenset(found)
+
+
+def goal_chunks(events: pd.DataFrame, lines: pd.Series, home_team: str, away_team: str) -> list:
+    '''
+    Um trecho por gol, com a ordem do gol na partida e no time, autor, assistência, placar
+    depois do gol e os eventos que o antecederam. As cobranças da disputa de pênaltis não são gols
+    da partida (ver shootout_chunks).
+    '''
+    event_type = _column(events, 'type')
+    in_play = _column(events, 'period') != SHOOTOUT_PERIOD
+    goals = np.flatnonzero((((event_type == 'Shot') & (_column(events, 'shot_outcome') == 'Goal')) |
+                            (event_type == 'Own Goal For')) & in_play)
+    assists = np.flatnonzero(_column(events, 'pass_goal_assist') == True)  # noqa: E712
+    teams, players = _column(events, 'team'), _column(events, 'player')
+    names = [_column(events, column).to_numpy() for column in ENTITY_COLUMNS]
+    score = Counter()
+    chunks = []
+    for number, position in enumerate(goals, start=1):
+        team, player = teams.iat[position], players.iat[position]
+        score[team] += 1
+        # Assistência: último passe com pass_goal_assist do mesmo time pouco antes do gol
+        assist = next((candidate for candidate in assists[::-1]
+                       if position - ASSIST_WINDOW_EVENTS <= candidate < position
+                       and teams.iat[candidate] == team), None)
+        assist_text = players.iat[assist] if assist is not None else 'none recorded'
+        own_goal = event_type.iat[position] == 'Own Goal For'
+        minute = events['minute'].iat[position]
+        title = (f"{_ordinal(number)} goal of the match, {team}'s {_ordinal(score[team])} goal, "
+                 f"minute {minute}")
+        start = max(0, position - GOAL_CONTEXT_EVENTS)
+        context = lines.iloc[start:position + 1]
+        entities = _entities(names, np.arange(start, position + 1))
+        if assist is not None:
+            entities |= _entities(names, [assist])
+        text = '\n'.join([
+            f"{'Own goal in favour of' if own_goal else 'Goal scored by'} "
+            f"{player if pd.notna(player) else team} ({team}) "
+            f"at {lines.iat[position].split(' | ')[0]}",
+            f'Assisted by: {assist_text}',
+            f'Score after the goal: {home_team} {score[home_team]} - {score[away_team]} {away_team}',
+            'Events before the goal (minute:second | team | player | type | details):',
+            *context.tolist()
+        ])
+        chunks.append(Chunk('goal', title, text, entities))
+    return chunks
+
+
+def shootout_chunks(events: pd.DataFrame, home_team: str, away_team: str) -> list:
+    '''
+    Um trecho com as cobranças da disputa de pênaltis, em ordem, com o placar da disputa após cada uma
+    (vazio se a partida não foi para os pênaltis).
+    '''
+    kicks = np.flatnonzero(((_column(events, 'period') == SHOOTOUT_PERIOD) &
+                            (_column(events, 'type') == 'Shot')).to_numpy())
+    if not len(kicks):
+        return []
+    teams, players = _column(events, 'team'), _column(events, 'player')
+    outcomes = _column(events, 'shot_outcome')
+    names = [_column(events, column).to_numpy() for column in ENTITY_COLUMNS]
+    score = Counter()
+    lines = []
+    for number, position in enumerate(kicks, start=1):
+        team, outcome = teams.iat[position], outcomes.iat[position]
+        score[team] += outcome == 'Goal'
+        lines.append(f"{number}. {team} | {players.iat[position]} | "
+                     f"{'scored' if outcome == 'Goal' else f'missed ({outcome})'} | "
+                     f'shootout {score[home_team]} - {score[away_team]}')
+    text = '\n'.join([
+        f'Penalty shootout (not counted in the match score): {home_team} {score[home_team]} - '
+        f'{score[away_team]} {away_team}',
+        'Kicks (order. team | player | result | shootout score):',
+        *lines
+    ])
+    return [Chunk('shootout', 'penalty shootout kicks', text, _entities(names, kicks))]
+
+
+def timeline_chunks(events: pd.DataFrame, lines: pd.Series) -> list:
+    '''Linha do tempo em blocos de até CHUNK_EVENTS eventos de um mesmo minuto, sem os eventos pouco informativos'''
+    priority = _column(events, 'type').map(TYPE_PRIORITY).astype(float).fillna(0)
+    keep = (priority < LOW_INFORMATION_PRIORITY).to_numpy() & (_column(events, 'type') != 'Starting XI').to_numpy()
+    periods = events['period'].to_numpy() if 'period' in events else np.ones(len(events), dtype=int)
+    minutes = events['minute'].to_numpy()
+    kept = np.flatnonzero(keep)
+    names = [_column(events, column).to_numpy() for column in ENTITY_COLUMNS]
+    chunks = []
+    if not len(kept):
+        return chunks
+    # Novo bloco quando muda o período/minuto ou o bloco atinge CHUNK_EVENTS eventos
+    keys = pd.Series(list(zip(periods[kept], minutes[kept])))
+    starts = np.flatnonzero((keys != keys.shift()).to_numpy())
+    for start, end in zip(starts, list(starts[1:]) + [len(kept)]):
+        for offset in range(start, end, CHUNK_EVENTS):
+            positions = kept[offset:min(offset + CHUNK_EVENTS, end)]
+            period, minute = periods[positions[0]], minutes[positions[0]]
+            chunks.append(Chunk('timeline', f'period {period}, minute {minute}',
+                                '\n'.join(lines.iloc[positions].tolist()), _entities(names, positions)))
+    return chunks
+
+
+def player_chunks(player_stats: pd.DataFrame, lineups: dict) -> list:
+    '''Um trecho por jogador com time, número da camisa e as estatísticas diferentes de zero'''
+    jerseys = {}
+    for lineup in lineups.values():
+        if 'player_name' in lineup and 'jersey_number' in lineup:
+            jerseys.update(zip(lineup['player_name'], lineup['jersey_number']))
+    numeric = player_stats.drop(columns=['team']).select_dtypes('number')
+    chunks = []
+    for player, row in numeric.iterrows():
+        stats = ', '.join(f"{key.replace('_', ' ')} {int(value)}" for key, value in row.items() if value)
+        team = player_stats.at[player, 'team']
+        jersey = f', jersey {jerseys[player]}' if player in jerseys else ''
+        chunks.append(Chunk('player', f'{player} ({team}{jersey})',
+                            f'Statistics: {stats or "no recorded actions"}', frozenset([player, team])))
+    return chunks
+
+
+def build_retrieval_index(match_index: MatchIndex, player_stats: pd.DataFrame,
+                          lineups: dict) -> MatchRetrievalIndex:
+    '''
+    Função que divide os eventos, as estatísticas dos jogadores e as escalações de uma partida
+    em trechos e constrói o índice de busca.
+    Args:
+        match_index (MatchIndex): Índices da partida (eventos em ordem cronológica)
+        player_stats (pd.DataFrame): Tabela de estatísticas dos jogadores
+        lineups (dict): Escalações no formato do statsbombpy
+    Returns:
+        MatchRetrievalIndex: Índice da partida
+    '''
+    events = match_index.events
+    lines = event_lines(events)
+    chunks = goal_chunks(events, lines, match_index.home_team, match_index.away_team)
+    chunks += shootout_chunks(events, match_index.home_team, match_index.away_team)
+    chunks += timeline_chunks(events, lines)
+    chunks += player_chunks(player_stats, lineups)
+    chunks += [Chunk('lineup', f'{team} lineup', encode_lineups({team: lineup}),
+                     frozenset([team, *lineup.get('player_name', [])]))
+               for team, lineup in lineups.items()]
+    return MatchRetrievalIndex(chunks)
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import statsbombpy.entities as ents
+
+from utils.cache_manager import cache_manager
+from utils.data_source import DataSourceError, _loads, data_source
+from utils.dataprep import invalidate_match, read_player_stats_table
+from utils.event_store import EVENT_STORE_DIR, event_store
+from utils.instrumentation import propagate_context, tracer
+from utils.season_stats import season_stats
+
+# Diretório com o estado da sincronização de cada competição/temporada (validadores HTTP da listagem,
+# versão de cada partida e marca d'água da última sincronização)
+SYNC_STATE_DIR = os.getenv('SYNC_STATE_DIR', os.path.join(EVENT_STORE_DIR, 'sync'))
+# Partidas baixadas ao mesmo tempo
+SYNC_WORKERS = int(os.getenv('SYNC_WORKERS', '8'))
+
+
+def open_data_url(path: str) -> str:
+    '''Endereço de um arquivo do open-data como pedido pelo statsbombpy (e chave do cache HTTP)'''
+    return cache_manager.data_url(path)
+
+
+def match_version(match: dict) -> str:
+    '''
+    Versão de uma partida na listagem: o campo last_updated do StatsBomb (e o dos dados 360) ou,
+    se ausente, um hash do registro da partida.
+    Args:
+        match (dict): Registro da partida (sb.matches(fmt='dict'))
+    Returns:
+        str: Versão da partida
+    '''
+    if match.get('last_updated'):
+        return f"{match['last_updated']}|{match.get('last_updated_360') or ''}"
+    payload = json.dumps(match, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+class MatchSync:
+    '''
+    Sincronização incremental das partidas de uma competição/temporada com a fonte de dados.
+
+    A listagem de partidas é pedida com requisição condicional (If-None-Match/If-Modified-Since com os
+    validadores da última sincronização) ou, na fonte local, comparada pelo hash do arquivo. Se ela não
+    mudou, a sincronização custa uma única requisição. Se mudou, a versão de cada partida (last_updated)
+    é comparada com a gravada e apenas partidas novas ou alteradas são baixadas; as alteradas têm o cache
+    HTTP ignorado e as tabelas gravadas substituídas. Os processos do app percebem a mudança pela versão
+    gravada no armazenamento local (EventStore.version) e recarregam a partida e a listagem da temporada.
+    O estado fica em <SYNC_STATE_DIR>/<competição>_<temporada>.json.
+    '''
+
+    def __init__(self, root: str = SYNC_STATE_DIR):
+        self.root = root
+        self._lock = threading.RLock()
+
+    def _path(self, competition_id: int, season_id: int) -> str:
+        return os.path.join(self.root, f'{int(competition_id)}_{int(season_id)}.json')
+
+    def state_stamp(self, competition_id: int, season_id: int):
+        '''
+        Retorna a data de modificação do estado da temporada, que muda a cada sincronização
+        (usada pelo catálogo de partidas para recarregar a listagem).
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            int: Data de modificação em nanossegundos ou None se a temporada nunca foi sincronizada
+        '''
+        try:
+            return os.stat(self._path(competition_id, season_id)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def state(self, competition_id: int, season_id: int) -> dict:
+        '''
+        Retorna o estado da última sincronização da temporada.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            dict: Validadores da listagem, versão por partida, marca d'água e data da sincronização
+        '''
+        path = self._path(competition_id, season_id)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'etag': None, 'last_modified': None, 'listing_hash': None,
+                'matches': {}, 'watermark': None, 'synced_at': None}
+
+    def _save_state(self, competition_id: int, season_id: int, state: dict):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(competition_id, season_id)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp_path, path)
+
+    def fetch_listing(self, competition_id: int, season_id: int, state: dict, force: bool = False):
+        '''
+        Busca a listagem de partidas, apenas se ela mudou desde a última sincronização.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+            state (dict): Estado da última sincronização (validadores e hash da listagem)
+            force (bool): Ignora os validadores e busca a listagem completa
+        Returns:
+            tuple: Partidas (match_id -> registro, ou None se a listagem não mudou) e validadores novos
+        '''
+        if data_source.name == 'local':
+            path = os.path.join(data_source.backend.root, 'data', 'matches',
+                                str(int(competition_id)), f'{int(season_id)}.json')
+            if not os.path.exists(path):
+                raise DataSourceError(f"File not found in local open-data: {path}")
+            with open(path, 'rb') as f:
+                content = f.read()
+            validators = {'etag': None, 'last_modified': None}
+        else:
+            headers = {}
+            if not force and state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if not force and state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+            # force_refresh: a requisição vai sempre ao servidor; uma resposta 200 substitui a listagem
+            # no cache HTTP, então o app passa a ver as partidas novas
+            response = cache_manager.session.get(
+                open_data_url(f'matches/{int(competition_id)}/{int(season_id)}.json'),
+                headers=headers, force_refresh=True)
+            if response.status_code == 304:
+                return None, {'etag': state.get('etag'), 'last_modified': state.get('last_modified'),
+                              'listing_hash': state.get('listing_hash')}
+            response.raise_for_status()
+            content = response.content
+            validators = {'etag': response.headers.get('ETag'),
+                          'last_modified': response.headers.get('Last-Modified')}
+
+        # Servidores sem validadores (ou a fonte local): a listagem é comparada pelo hash do conteúdo
+        validators['listing_hash'] = hashlib.sha256(content).hexdigest()
+        if not force and validators['listing_hash'] == state.get('listing_hash'):
+            return None, validators
+        return ents.matches(_loads(content)), validators
+
+    def refresh_match(self, match_id: int, changed: bool = False):
+        '''
+        Baixa e grava eventos, escalação e estatísticas dos jogadores de uma partida.
+        Args:
+            match_id (int): ID da partida
+            changed (bool): A partida já estava gravada e mudou na fonte; os dados são baixados novamente
+                (sem o cache HTTP) e substituem as tabelas gravadas
+        '''
+        match_id = int(match_id)
+        event_store.get_events(match_id, refresh=changed)
+        data_source.lineups(match_id, refresh=changed)
+        if changed:
+            # Cache deste processo; os outros processos comparam a versão gravada
+            invalidate_match(match_id)
+        read_player_stats_table(match_id, refresh=changed)
+
+    def sync(self, competition_id: int, season_id: int, workers: int = SYNC_WORKERS,
+             force: bool = False) -> dict:
+        '''
+        Sincroniza as partidas de uma competição/temporada, baixando apenas as novas ou alteradas.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+            workers (int): Número máximo de partidas baixadas ao mesmo tempo
+            force (bool): Busca a listagem mesmo sem mudanças (as partidas continuam comparadas pela versão)
+        Returns:
+            dict: Situação da listagem, partidas novas, alteradas, removidas e com falha, requisições
+            feitas, marca d'água e tempo em segundos
+        '''
+        start = time.perf_counter()
+        with self._lock, tracer.span('match_sync', 'fetch', competition_id=competition_id,
+                                     season_id=season_id) as span:
+            state = self.state(competition_id, season_id)
+            matches, validators = self.fetch_listing(competition_id, season_id, state, force=force)
+            result = {'competition_id': competition_id, 'season_id': season_id,
+                      'listing': 'not_modified' if matches is None else 'modified',
+                      'new': [], 'changed': [], 'removed': [], 'failed': {}, 'requests': 1}
+            state.update(validators)
+
+            if matches is not None:
+                versions = {str(match_id): match_version(match) for match_id, match in matches.items()}
+                known = state['matches']
+                result['removed'] = sorted(int(match_id) for match_id in known if match_id not in versions)
+                pending = {}
+                for match_id in sorted(matches):
+                    stored = known.get(str(match_id))
+                    if stored is None or not event_store.contains(match_id):
+                        pending[match_id] = False
+                    elif stored != versions[str(match_id)]:
+                        pending[match_id] = True
+
+                with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                    refresh = propagate_context(self.refresh_match)
+                    futures = {executor.submit(refresh, match_id, changed): match_id
+                               for match_id, changed in pending.items()}
+                    for future in as_completed(futures):
+                        match_id = futures[future]
+                        try:
+                            future.result()
+                        except Exception as e:
+                            result['failed'][str(match_id)] = str(e)
+                            continue
+                        # Partidas com falha ficam sem versão e são tentadas na próxima sincronização
+                        known[str(match_id)] = versions[str(match_id)]
+                        result['changed' if pending[match_id] else 'new'].append(match_id)
+
+                for match_id in result['removed']:
+                    known.pop(str(match_id), None)
+                # Com falhas, os validadores não são gravados: a próxima sincronização busca a listagem
+                # completa e tenta de novo as partidas que faltaram
+                if result['failed']:
+                    state.update({'etag': None, 'last_modified': None, 'listing_hash': None})
+                # Cada partida baixada custa duas requisições (eventos e escalação) na fonte HTTP
+                result['requests'] += 2 * (len(result['new']) + len(result['changed']))
+
+                season_stats.update(competition_id, season_id,
+                                    match_ids=[int(match_id) for match_id in known],
+                                    refresh=result['changed'], workers=workers)
+
+                last_updated = [matches[int(match_id)].get('last_updated') for match_id in known
+                                if int(match_id) in matches]
+                state['watermark'] = max(filter(None, last_updated), default=state.get('watermark'))
+
+            result['new'].sort()
+            result['changed'].sort()
+            state['synced_at'] = datetime.now(timezone.utc).isoformat()
+            self._save_state(competition_id, season_id, state)
+            result['watermark'] = state['watermark']
+            result['elapsed_seconds'] = round(time.perf_counter() - start, 2)
+            span.update({key: len(result[key]) for key in ('new', 'changed', 'failed')})
+            span['listing'] = result['listing']
+        return result
+
+
+match_sync = MatchSync()
@@ -0,0 +1,78 @@
+from utils.prompt_encoder import encode_mapping
+
+# Estilos de narração disponíveis na barra lateral
+BROADCAST_STYLES = ('Formal', 'Humorístico', 'Técnico')
+
+
+def build_match_info(match: dict) -> dict:
+    '''
+    Função que extrai as informações gerais de uma partida retornada por data_source.matches.
+    Campos ausentes são preenchidos com 'N/A'.
+    Args:
+        match (dict): Partida no formato do StatsBomb
+    Returns:
+        dict: Informações gerais da partida usadas nos prompts e no agente
+    '''
+    def value(*keys):
+        current = match
+        for key in keys:
+            current = current.get(key) if isinstance(current, dict) else None
+        return current if current is not None else 'N/A'
+
+    def manager(team_key):
+        managers = match.get(team_key, {}).get('managers')
+        return managers[0].get('name') if managers else 'N/A'
+
+    return {
+        'match_date': value('match_date'),
+        'competition_country': value('competition', 'country_name'),
+        'competition_name': value('competition', 'competition_name'),
+        'home_team_country': value('home_team', 'country', 'name'),
+        'away_team_country': value('away_team', 'country', 'name'),
+        'stadium_name': value('stadium', 'name'),
+        'season_name': value('season', 'season_name'),
+        'home_team_name': value('home_team', 'home_team_name'),
+        'away_team_name': value('away_team', 'away_team_name'),
+        'home_team_manager': manager('home_team'),
+        'away_team_manager': manager('away_team'),
+        'home_score': value('home_score'),
+        'away_score': value('away_score'),
+        'competition_stage': value('competition_stage', 'name')
+    }
+
+
+def narration_scope(match_id: int, broadcast_style: str) -> dict:
+    '''Escopo da narração no cache de respostas do LLM'''
+    return {'kind': 'narration', 'match_id': int(match_id), 'style': broadcast_style}
+
+
+def build_narration_prompt(match_info: dict, match_context, broadcast_style: str) -> str:
+    '''
+    Função que monta o prompt de narração de uma partida.
+    Usada pela aba de visão geral e pela geração em lote (narrate.py), para que as duas
+    produzam o mesmo prompt e compartilhem as respostas em cache.
+    Args:
+        match_info (dict): Informações gerais da partida (build_match_info)
+        match_context (MatchContext): Contexto montado por assemble_match_context
+        broadcast_style (str): Estilo de narração (Formal, Humorístico ou Técnico)
+    Returns:
+        str: Prompt de narração
+    '''
+    lineups_context = match_context.lineups_context
+    match_info_context = encode_mapping(match_info)
+    key_moments_context = match_context.key_moments_context
+
+    return (f'''
+                Elabore um resumo envolvente e informativo do jogo descrito abaixo, em português, através do conteúdo das tabelas fornecidas:
+                - Lineups: {lineups_context} - contêm informações sobre as escalações dos times
+                - Match Info: {match_info_context} - contêm informações gerais da partida como data, estádio, times, placar, nome da competição.
+                - Key Moments: {key_moments_context} - contêm os momentos-chave da partida: linha do tempo de gols, chutes, cartões, substituições e cobranças da disputa de pênaltis, que não contam no placar (key_events),
+                estatísticas de cada time a cada 15 minutos (team_windows_15min), mudanças de domínio da partida (momentum_swings) e os jogadores de destaque (top_performers).
+                - Broadcast Style: {broadcast_style} - contêm o estilo de narração escolhido pelo usuário. Podendo ser Formal(técnico e objetivo), Humorístico(descontraído e criativo) ou Técnico(análise detalhada dos eventos).
+                Utilize apenas as informações fornecidas, sem fazer suposições ou preencher lacunas, como por exemplo adivinhar a ordem dos eventos da partida.
+                O objetivo é criar um texto cativante e acessível, destacando os principais acontecimentos e aspectos interessantes da partida.
+                O resumo deve ter no máximo 250 palavras e ser escrito como um comentarista esportivo, com o tom escolhido pelo usuário.
+                Mencione a data da partida explicitamente, sem utilizar termos como 'hoje'.
+                Não use termos como de acordo com os dados que me foram fornecidos, ou algo do tipo.
+                Focalize os momentos-chave do jogo, não entre em detalhes excessivos sobre cada jogador.
+                ''')
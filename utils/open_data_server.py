@@ -0,0 +1,46 @@
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalOpenDataServer:
+    '''
+    Servidor HTTP local que serve uma cópia da árvore de dados abertos do StatsBomb
+    (data/competitions.json, data/matches, data/events, data/lineups).
+    Usado em testes no lugar do GitHub, em conjunto com cache_manager.configure(base_url=...).
+
+    Exemplo:
+        with LocalOpenDataServer('fixtures/open-data') as server:
+            cache_manager.configure(backend='memory', base_url=server.url)
+    '''
+
+    def __init__(self, root: str, host: str = '127.0.0.1', port: int = 0):
+        handler = partial(_QuietHandler, directory=root)
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,150 @@
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from mplsoccer import Pitch
+
+from utils.dataprep import load_match_index, match_version
+from utils.event_frame import event_xy
+from utils.frame_cache import frame_cache
+from utils.instrumentation import tracer
+from utils.match_index import MatchIndex
+
+# Resolução das imagens geradas
+FIGURE_DPI = 100
+# Mínimo de passes entre dois jogadores para aparecer na rede de passes
+MIN_NETWORK_PASSES = 3
+
+
+def pass_arrays(match_index: MatchIndex, team: str, player: str = None) -> dict:
+    '''
+    Função que extrai os passes de um time (ou de um jogador) como arrays NumPy.
+    Args:
+        match_index (MatchIndex): Índices da partida
+        team (str): Nome do time
+        player (str): Nome do jogador (opcional)
+    Returns:
+        dict: Arrays x, y, x_end, y_end, completed (bool), player e recipient
+    '''
+    passes = match_index.frame(team=team, player=player, type='Pass')
+
+    x, y = event_xy(passes, 'location')
+    x_end, y_end = event_xy(passes, 'pass_end_location')
+    recipient = passes['pass_recipient'] if 'pass_recipient' in passes else pd.Series(
+        np.nan, index=passes.index, dtype=object)
+    return {
+        'x': x.to_numpy(),
+        'y': y.to_numpy(),
+        'x_end': x_end.to_numpy(),
+        'y_end': y_end.to_numpy(),
+        'completed': passes['pass_outcome'].isna().to_numpy(),
+        'player': passes['player'].to_numpy(dtype=object),
+        'recipient': recipient.to_numpy(dtype=object)
+    }
+
+
+def _to_png(fig) -> bytes:
+    with tracer.span('figure_png', 'render') as span:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=FIGURE_DPI, bbox_inches='tight')
+        plt.close(fig)
+        span['bytes'] = buffer.tell()
+    return buffer.getvalue()
+
+
+def draw_pass_map(passes: dict):
+    '''
+    Desenha o mapa de passes com uma única chamada de setas para os passes concluídos
+    e outra para os incompletos.
+    Args:
+        passes (dict): Arrays produzidos por pass_arrays
+    Returns:
+        matplotlib.figure.Figure: Figura do mapa de passes
+    '''
+    pitch = Pitch(pitch_color='grass', line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+
+    completed = passes['completed']
+    for mask, color, alpha, label in ((completed, 'blue', 0.7, 'Passes Concluídos'),
+                                      (~completed, 'red', 0.5, 'Passes Incompletos')):
+        if mask.any():
+            pitch.arrows(passes['x'][mask], passes['y'][mask],
+                         passes['x_end'][mask], passes['y_end'][mask],
+                         color=color, alpha=alpha, ax=ax, width=2, label=label)
+
+    if completed.size:
+        ax.legend(loc='upper left', fontsize='small')
+    return fig
+
+
+def draw_pass_network(passes: dict, min_passes: int = MIN_NETWORK_PASSES):
+    '''
+    Desenha a rede de passes do time: posição média de cada jogador ao passar a bola e
+    linhas entre passador e recebedor com espessura proporcional ao número de passes concluídos.
+    Args:
+        passes (dict): Arrays produzidos por pass_arrays para o time inteiro
+        min_passes (int): Mínimo de passes para desenhar a ligação entre dois jogadores
+    Returns:
+        matplotlib.figure.Figure: Figura da rede de passes
+    '''
+    frame = pd.DataFrame({
+        'player': passes['player'], 'recipient': passes['recipient'],
+        'x': passes['x'], 'y': passes['y']
+    })[passes['completed']].dropna(subset=['player', 'recipient'])
+
+    positions = frame.groupby('player')[['x', 'y']].mean()
+    touches = frame.groupby('player').size()
+    links = frame.groupby(['player', 'recipient']).size()
+    links = links[links >= min_passes]
+    links = links[links.index.get_level_values('recipient').isin(positions.index)]
+
+    pitch = Pitch(pitch_color='grass', line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+
+    if len(links):
+        start = positions.loc[links.index.get_level_values('player')].to_numpy()
+        end = positions.loc[links.index.get_level_values('recipient')].to_numpy()
+        widths = links.to_numpy() / links.max() * 8
+        pitch.lines(start[:, 0], start[:, 1], end[:, 0], end[:, 1],
+                    lw=widths, color='white', alpha=0.6, zorder=1, ax=ax)
+    if len(positions):
+        pitch.scatter(positions['x'], positions['y'], s=touches[positions.index] * 15 + 100,
+                      color='blue', edgecolors='white', linewidth=1.5, zorder=2, ax=ax)
+        for name, (x, y) in positions.iterrows():
+            pitch.annotate(name.split()[-1], xy=(x, y), ax=ax, va='center', ha='center',
+                           fontsize=7, color='white', zorder=3)
+    return fig
+
+
+def render_pass_map(match_id: int, team: str, player: str) -> bytes:
+    '''
+    Retorna o PNG do mapa de passes de um jogador, gerado uma única vez por (partida, time, jogador) e
+    refeito quando os eventos gravados da partida mudam (match_version).
+    Args:
+        match_id (int): ID da partida
+        team (str): Nome do time
+        player (str): Nome do jogador
+    Returns:
+        bytes: Imagem PNG
+    '''
+    return frame_cache.get_or_load(
+        ('pass_map', int(match_id), team, player),
+        lambda: _to_png(draw_pass_map(pass_arrays(load_match_index(match_id), team, player))),
+        version=lambda: match_version(match_id))
+
+
+def render_pass_network(match_id: int, team: str) -> bytes:
+    '''
+    Retorna o PNG da rede de passes de um time, gerado uma única vez por (partida, time) e refeito quando
+    os eventos gravados da partida mudam (match_version).
+    Args:
+        match_id (int): ID da partida
+        team (str): Nome do time
+    Returns:
+        bytes: Imagem PNG
+    '''
+    return frame_cache.get_or_load(
+        ('pass_network', int(match_id), team),
+        lambda: _to_png(draw_pass_network(pass_arrays(load_match_index(match_id), team))),
+        version=lambda: match_version(match_id))
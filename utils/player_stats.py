@@ -0,0 +1,201 @@
+from collections import namedtuple
+
+import pandas as pd
+
+# Definição declarativa de uma métrica por jogador:
+# - key: nome da métrica no JSON da API (GetMatchStats.get_player_stats)
+# - label: rótulo em português usado na aba de perfil do jogador (None se não aparecer na aba)
+# - event_type: tipo de evento contado (None para qualquer tipo)
+# - conditions: condições adicionais (coluna, operador, valor) com operadores 'isna', '==' e '!='
+# - in_api: se a métrica faz parte do JSON da API
+Metric = namedtuple(
+    'Metric',
+    ['key', 'label', 'event_type', 'conditions', 'in_api'],
+    defaults=[(), True]
+)
+
+METRICS = [
+    Metric('passes_completed', 'Passes Completos', 'Pass',
+           conditions=(('pass_outcome', 'isna', None),)),
+    Metric('passes_attempted', 'Tentativas de Passes', 'Pass'),
+    Metric('shots', 'Chutes', 'Shot'),
+    Metric('shots_on_target', 'Chutes no Alvo', 'Shot',
+           conditions=(('shot_outcome', '==', 'On Target'),)),
+    Metric('goals', None, 'Shot',
+           conditions=(('shot_outcome', '==', 'Goal'),)),
+    Metric('assists', None, None,
+           conditions=(('pass_goal_assist', '==', True),)),
+    Metric('fouls_committed', 'Faltas Cometidas', 'Foul Committed'),
+    Metric('fouls_won', 'Faltas Sofridas', 'Foul Won'),
+    Metric('tackles', 'Contestações de Bola', 'Tackle'),
+    Metric('interceptions', 'Interceptações', 'Interception'),
+    Metric('dribbles_completed', 'Dribles Completados', 'Dribble',
+           conditions=(('dribble_outcome', '==', 'Complete'),), in_api=False),
+    Metric('dribbles_attempted', 'Tentativas de Dribles', 'Dribble',
+           in_api=False),
+    Metric('non_penalty_goals', 'Gols (exceto pênaltis)', 'Shot',
+           conditions=(('shot_outcome', '==', 'Goal'), ('shot_type', '!=', 'Penalty')), in_api=False),
+    Metric('penalty_goals', 'Gols de Pênalti', 'Shot',
+           conditions=(('shot_outcome', '==', 'Goal'), ('shot_type', '==', 'Penalty')), in_api=False),
+    Metric('ball_recoveries', 'Recuperações de Bola', 'Ball Recovery',
+           in_api=False),
+    Metric('blocks', 'Bloqueios', 'Block', in_api=False),
+    Metric('injury_stoppages', 'Paralisações por Lesão', 'Injury Stoppage',
+           in_api=False),
+    Metric('miscontrols', 'Perda de Controle', 'Miscontrol', in_api=False),
+    Metric('yellow_cards', 'Cartões Amarelos', 'Foul Committed',
+           conditions=(('foul_committed_card', '==', 'Yellow Card'),), in_api=False),
+    Metric('red_cards', 'Cartões Vermelhos', 'Foul Committed',
+           conditions=(('foul_committed_card', '==', 'Red Card'),), in_api=False),
+]
+
+# Colunas da tabela produzida por compute_player_stats, usadas para validar tabelas gravadas em disco
+PLAYER_STATS_COLUMNS = ['team', 'minutes_played'] + \
+    [metric.key for metric in METRICS]
+# Versão do cálculo da tabela: tabelas gravadas com outra versão são recalculadas
+# (2: minutos em campo pelas substituições e expulsões, em vez do minuto do último evento)
+PLAYER_STATS_SCHEMA = 2
+# Cartões que tiram o jogador da partida
+SENDING_OFF_CARDS = ('Red Card', 'Second Yellow')
+# Período da disputa de pênaltis, fora do tempo de jogo
+SHOOTOUT_PERIOD = 5
+
+
+def _metric_mask(events: pd.DataFrame, metric: Metric, type_masks: dict) -> pd.Series:
+    '''Máscara booleana vetorizada de uma métrica sobre todos os eventos da partida'''
+    if metric.event_type is not None:
+        if metric.event_type not in type_masks:
+            type_masks[metric.event_type] = events['type'] == metric.event_type
+        mask = type_masks[metric.event_type]
+    else:
+        mask = pd.Series(True, index=events.index)
+
+    for column, op, value in metric.conditions:
+        # Colunas ausentes na partida (ex.: nenhum cartão) se comportam como valores nulos
+        if column not in events:
+            if op == '==':
+                return pd.Series(False, index=events.index)
+            continue
+        if op == 'isna':
+            mask = mask & events[column].isna()
+        elif op == '==':
+            mask = mask & (events[column] == value)
+        elif op == '!=':
+            mask = mask & (events[column] != value)
+    return mask
+
+
+def minutes_played(events: pd.DataFrame) -> pd.Series:
+    '''
+    Função que calcula os minutos em campo de cada jogador: da entrada (início da partida para os titulares
+    do Starting XI, ou o minuto da substituição) à saída (substituição, expulsão ou fim da partida, sem a
+    disputa de pênaltis). Sem Starting XI nos eventos, todos os jogadores sem substituição de entrada
+    contam desde o início.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+    Returns:
+        pd.Series: Minutos inteiros indexados pelo nome do jogador (jogadores com eventos na partida)
+    '''
+    clock = events['minute'].astype(float)
+    if 'second' in events:
+        clock = clock + events['second'].fillna(0).astype(float) / 60
+    in_play = events['period'] != SHOOTOUT_PERIOD if 'period' in events else clock.notna()
+    end = clock[in_play].max() if in_play.any() else 0.0
+    types = events['type'].astype(object)
+    players = events['player'].astype(object)
+
+    entered, left = {}, {}
+    has_lineup = False
+    if 'tactics' in events:
+        for tactics in events.loc[types == 'Starting XI', 'tactics']:
+            if isinstance(tactics, dict):
+                has_lineup = True
+                for entry in tactics.get('lineup') or []:
+                    entered[entry['player']['name']] = 0.0
+    if 'substitution_replacement' in events:
+        substitutions = types == 'Substitution'
+        for player, replacement, minute in zip(players[substitutions],
+                                               events.loc[substitutions, 'substitution_replacement'],
+                                               clock[substitutions]):
+            if isinstance(player, str):
+                left.setdefault(player, minute)
+            if isinstance(replacement, str):
+                entered.setdefault(replacement, minute)
+    for column in ('foul_committed_card', 'bad_behaviour_card'):
+        if column in events:
+            sent_off = events[column].isin(SENDING_OFF_CARDS) & players.notna() & in_play
+            for player, minute in zip(players[sent_off], clock[sent_off]):
+                left[player] = min(left.get(player, minute), minute)
+
+    # Jogadores com eventos fora do Starting XI e sem substituição de entrada: desde o primeiro evento
+    has_player = players.notna()
+    first_event = clock[has_player].groupby(players[has_player], sort=True).min()
+    minutes = {player: max(0.0, left.get(player, end) - entered.get(player, first if has_lineup else 0.0))
+               for player, first in first_event.items()}
+    return pd.Series(minutes, dtype=float).round().astype('int64')
+
+
+def compute_player_stats(events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Função que calcula todas as métricas do registro para todos os jogadores em uma única passagem
+    (groupby) sobre os eventos da partida.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+    Returns:
+        pd.DataFrame: Tabela indexada pelo nome do jogador com as colunas 'team', 'minutes_played'
+        (minutes_played) e uma coluna por métrica do registro
+    '''
+    player_events = events[events['player'].notna()]
+    type_masks = {}
+    masks = pd.DataFrame(
+        {metric.key: _metric_mask(player_events, metric, type_masks)
+         for metric in METRICS},
+        index=player_events.index
+    )
+
+    # observed=True: com jogador e time categóricos, apenas os valores presentes viram linhas
+    grouped = masks.groupby(player_events['player'], sort=True, observed=True).sum()
+    table = grouped.astype('int64')
+    table.insert(0, 'team', player_events.groupby(
+        'player', sort=True, observed=True)['team'].first().astype(object))
+    table.index = table.index.astype(object)
+    table.insert(1, 'minutes_played', minutes_played(events).reindex(table.index, fill_value=0))
+    table.index.name = 'player'
+    return table
+
+
+def player_stats_records(table: pd.DataFrame) -> list:
+    '''
+    Converte a tabela de estatísticas no formato de lista usado pelo JSON da API.
+    Args:
+        table (pd.DataFrame): Tabela de estatísticas dos jogadores
+    Returns:
+        list: Lista de dicionários com jogador, time e estatísticas
+    '''
+    api_keys = [metric.key for metric in METRICS if metric.in_api]
+    api_keys.append('minutes_played')
+    return [
+        {
+            "player": player,
+            "team": row['team'],
+            "statistics": {key: int(row[key]) for key in api_keys}
+        }
+        for player, row in table.iterrows()
+    ]
+
+
+def player_profile_stats(table: pd.DataFrame, player: str) -> dict:
+    '''
+    Retorna as estatísticas de um jogador com os rótulos em português da aba de perfil.
+    Args:
+        table (pd.DataFrame): Tabela de estatísticas dos jogadores
+        player (str): Nome do jogador
+    Returns:
+        dict: Dicionário com o nome do jogador e suas estatísticas
+    '''
+    stats = {"Jogador": player}
+    row = table.loc[player] if player in table.index else None
+    for metric in METRICS:
+        if metric.label is not None:
+            stats[metric.label] = int(row[metric.key]) if row is not None else 0
+    return stats
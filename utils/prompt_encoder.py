@@ -0,0 +1,168 @@
+import math
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils.event_frame import event_xy
+
+# Estimativa de tokens por caracteres (conservadora para textos com muitos números)
+CHARS_PER_TOKEN = 3
+# Orçamento padrão de tokens para a tabela de eventos enviada ao LLM
+EVENTS_TOKEN_BUDGET = int(os.getenv('PROMPT_EVENTS_TOKEN_BUDGET', '20000'))
+
+# Tipos de evento descartados primeiro quando a tabela excede o orçamento (menor valor = mais importante)
+TYPE_PRIORITY = {
+    'Shot': 0, 'Own Goal For': 0, 'Own Goal Against': 0, 'Substitution': 0, 'Bad Behaviour': 0,
+    'Foul Committed': 1, 'Foul Won': 1, 'Interception': 1, 'Dribble': 1, 'Goal Keeper': 1,
+    'Block': 2, 'Ball Recovery': 2, 'Clearance': 2, 'Duel': 2, 'Miscontrol': 2, 'Dispossessed': 2,
+    'Pass': 3,
+    'Carry': 4, 'Pressure': 4,
+    'Ball Receipt*': 5,
+}
+DEFAULT_PRIORITY = 3
+
+OUTCOME_COLUMNS = ['shot_outcome', 'pass_outcome', 'dribble_outcome', 'duel_outcome',
+                   'interception_outcome', 'foul_committed_card', 'bad_behaviour_card']
+
+EncodedContext = namedtuple(
+    'EncodedContext',
+    ['text', 'tokens_before', 'tokens_after', 'rows_total', 'rows_kept']
+)
+
+
+def estimate_tokens(text: str) -> int:
+    '''
+    Estima o número de tokens de um texto.
+    Args:
+        text (str): Texto a ser enviado ao LLM
+    Returns:
+        int: Número estimado de tokens
+    '''
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _codes(series: pd.Series):
+    '''Codificação por dicionário: retorna os códigos (string, vazio para nulos) e o dicionário'''
+    codes, uniques = pd.factorize(series)
+    text = pd.Series(codes, index=series.index).astype(str).where(codes >= 0, '')
+    return text, list(uniques)
+
+
+def _rounded(series: pd.Series) -> pd.Series:
+    return series.round().astype('Int64').astype(str).replace('<NA>', '')
+
+
+def _dictionary_line(name: str, values: list) -> str:
+    return f"{name}: " + '|'.join(f'{i}={v}' for i, v in enumerate(values))
+
+
+def encode_events(events: pd.DataFrame, budget_tokens: int = EVENTS_TOKEN_BUDGET) -> EncodedContext:
+    '''
+    Codifica os eventos da partida em uma tabela compacta para o prompt do LLM: times, jogadores,
+    tipos de evento e resultados codificados por dicionário, coordenadas arredondadas e um
+    evento por linha. Se a tabela exceder o orçamento, eventos menos relevantes (recepções,
+    conduções, pressões, passes) são descartados primeiro, mantendo a ordem cronológica.
+    Args:
+        events (pd.DataFrame): DataFrame com os eventos da partida
+        budget_tokens (int): Número máximo de tokens estimados da tabela
+    Returns:
+        EncodedContext: Texto codificado e relatório de tokens antes/depois
+    '''
+    columns = [col for col in ['period', 'minute', 'second', 'team', 'player', 'type',
+                               'location', 'pass_end_location', 'x', 'y', 'end_x', 'end_y']
+               if col in events]
+    events = events.sort_values(['period', 'minute', 'second']
+                                if 'period' in events else ['minute']).reset_index(drop=True)
+
+    # Tamanho da representação anterior (JSON de registros) para o relatório
+    # Coordenadas float32 dos eventos compactos são arredondadas para não inflar o JSON
+    xy = {col: float for col in ('x', 'y', 'end_x', 'end_y') if col in columns}
+    tokens_before = estimate_tokens(
+        events[columns].astype(xy).round({col: 2 for col in xy}).to_json(orient='records'))
+
+    team, teams = _codes(events['team'])
+    player, players = _codes(events['player'])
+    event_type, types = _codes(events['type'])
+
+    outcome_series = pd.Series(np.nan, index=events.index, dtype=object)
+    for col in OUTCOME_COLUMNS:
+        if col in events:
+            outcome_series = outcome_series.fillna(events[col])
+    outcome, outcomes = _codes(outcome_series)
+
+    x, y = event_xy(events, 'location')
+    end_x, end_y = event_xy(events, 'pass_end_location')
+
+    lines = events['minute'].astype(str).str.cat(
+        [events['second'].astype(str) if 'second' in events else pd.Series('', index=events.index),
+         team, player, event_type, outcome,
+         _rounded(x), _rounded(y), _rounded(end_x), _rounded(end_y)],
+        sep=','
+    )
+
+    header = '\n'.join([
+        _dictionary_line('teams', teams),
+        _dictionary_line('players', players),
+        _dictionary_line('types', types),
+        _dictionary_line('outcomes', outcomes),
+        'events(minute,second,team,player,type,outcome,x,y,end_x,end_y):'
+    ])
+
+    budget_chars = budget_tokens * CHARS_PER_TOKEN - len(header)
+    line_chars = lines.str.len() + 1
+    keep = pd.Series(True, index=events.index)
+    if line_chars.sum() > budget_chars:
+        priority = events['type'].map(TYPE_PRIORITY).astype(float).fillna(DEFAULT_PRIORITY)
+        order = priority.sort_values(kind='stable').index
+        keep = (line_chars[order].cumsum() <= budget_chars).reindex(events.index)
+
+    kept = lines[keep]
+    text = header + '\n' + '\n'.join(kept.tolist())
+    return EncodedContext(text, tokens_before, estimate_tokens(text), len(events), int(keep.sum()))
+
+
+def encode_table(name: str, table: pd.DataFrame) -> str:
+    '''
+    Codifica uma tabela pequena (ex.: estatísticas dos jogadores) como cabeçalho + linhas separadas por vírgula.
+    Args:
+        name (str): Nome da tabela
+        table (pd.DataFrame): Tabela a ser codificada (o índice vira a primeira coluna)
+    Returns:
+        str: Texto codificado
+    '''
+    table = table.reset_index()
+    # Colunas só com zeros não trazem informação para o LLM
+    numeric = table.select_dtypes('number')
+    table = table.drop(columns=numeric.columns[(numeric == 0).all()])
+    header = f"{name}({','.join(map(str, table.columns))}):"
+    rows = table.astype(str).agg(','.join, axis=1)
+    return header + '\n' + '\n'.join(rows.tolist())
+
+
+def encode_mapping(mapping: dict) -> str:
+    '''
+    Codifica um dicionário simples (ex.: informações da partida) como linhas chave: valor.
+    Args:
+        mapping (dict): Dicionário a ser codificado
+    Returns:
+        str: Texto codificado
+    '''
+    return '\n'.join(f'{key}: {value}' for key, value in mapping.items())
+
+
+def encode_lineups(lineups: dict) -> str:
+    '''
+    Codifica as escalações (time -> DataFrame do statsbombpy) como uma linha por time.
+    Args:
+        lineups (dict): Escalações retornadas por data_source.lineups
+    Returns:
+        str: Texto codificado
+    '''
+    lines = []
+    for team, lineup in lineups.items():
+        players = lineup.sort_values('jersey_number') if 'jersey_number' in lineup else lineup
+        names = [f"{row.jersey_number}-{row.player_name}" for row in players.itertuples()]
+        lines.append(f"{team}: " + '|'.join(names))
+    return '\n'.join(lines)
@@ -0,0 +1,269 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data_source import data_source
+from utils.dataprep import read_player_stats_table
+from utils.event_store import EVENT_STORE_DIR
+from utils.frame_cache import frame_cache
+from utils.instrumentation import propagate_context, tracer
+from utils.player_stats import METRICS, PLAYER_STATS_COLUMNS, PLAYER_STATS_SCHEMA
+
+# Diretório das tabelas de temporada (uma por competição/temporada)
+SEASON_STATS_DIR = os.getenv('SEASON_STATS_DIR', os.path.join(EVENT_STORE_DIR, 'season_stats'))
+# Minutos mínimos na temporada para calcular as taxas por 90 minutos (abaixo disso ficam nulas)
+SEASON_STATS_MIN_MINUTES = int(os.getenv('SEASON_STATS_MIN_MINUTES', '90'))
+# Partidas processadas ao mesmo tempo na atualização incremental
+SEASON_STATS_WORKERS = int(os.getenv('SEASON_STATS_WORKERS', '8'))
+
+METRIC_KEYS = [metric.key for metric in METRICS]
+# Colunas das linhas por partida gravadas em disco
+SEASON_ROW_COLUMNS = ['match_id', 'player'] + PLAYER_STATS_COLUMNS
+
+
+def aggregate_season(rows: pd.DataFrame, min_minutes: int = SEASON_STATS_MIN_MINUTES) -> pd.DataFrame:
+    '''
+    Função que agrega as estatísticas por partida em totais da temporada e taxas por 90 minutos.
+    Args:
+        rows (pd.DataFrame): Uma linha por jogador e partida (SEASON_ROW_COLUMNS)
+        min_minutes (int): Minutos mínimos para calcular as taxas por 90 minutos
+    Returns:
+        pd.DataFrame: Tabela indexada pelo nome do jogador com 'team' (time da última partida),
+        'matches', 'minutes_played', o total de cada métrica e as colunas '<métrica>_per90'
+    '''
+    if rows.empty:
+        return pd.DataFrame(columns=['team', 'matches', 'minutes_played'] + METRIC_KEYS +
+                            [f'{key}_per90' for key in METRIC_KEYS]).rename_axis('player')
+
+    rows = rows.sort_values('match_id', kind='stable')
+    grouped = rows.groupby('player', sort=True)
+    table = grouped[['minutes_played'] + METRIC_KEYS].sum().astype('int64')
+    table.insert(0, 'team', grouped['team'].last())
+    table.insert(1, 'matches', grouped['match_id'].nunique().astype('int64'))
+
+    minutes = table['minutes_played'].where(table['minutes_played'] >= max(min_minutes, 1))
+    per90 = table[METRIC_KEYS].div(minutes, axis=0).mul(90).round(2)
+    per90.columns = [f'{key}_per90' for key in METRIC_KEYS]
+    return pd.concat([table, per90], axis=1)
+
+
+def season_profile_stats(table: pd.DataFrame, player: str) -> dict:
+    '''
+    Retorna os totais e as taxas por 90 minutos de um jogador na temporada, com os rótulos em português
+    da aba de perfil.
+    Args:
+        table (pd.DataFrame): Tabela da temporada (aggregate_season)
+        player (str): Nome do jogador
+    Returns:
+        dict: Estatísticas do jogador na temporada ou None se ele não aparecer na tabela
+    '''
+    if player not in table.index:
+        return None
+    row = table.loc[player]
+    stats = {"Jogador": player, "Partidas": int(row['matches']),
+             "Minutos": int(row['minutes_played'])}
+    for metric in METRICS:
+        if metric.label is not None:
+            stats[metric.label] = int(row[metric.key])
+            # Sem taxas por 90 minutos para quem jogou menos que SEASON_STATS_MIN_MINUTES
+            rate = row[f'{metric.key}_per90']
+            if not pd.isna(rate):
+                stats[f'{metric.label} por 90'] = float(rate)
+    return stats
+
+
+class SeasonStats:
+    '''
+    Estatísticas dos jogadores agregadas por competição/temporada.
+
+    As estatísticas por partida (as mesmas da aba de perfil) são gravadas em uma tabela Parquet por
+    temporada (<competição>_<temporada>.parquet) com um manifesto das partidas já processadas. A
+    atualização é incremental: apenas partidas ainda não processadas são lidas. A tabela agregada
+    (totais e taxas por 90 minutos) é calculada na leitura e mantida no cache em processo.
+    '''
+
+    def __init__(self, root: str = SEASON_STATS_DIR):
+        self.root = root
+        self._lock = threading.RLock()
+
+    def _path(self, competition_id: int, season_id: int, extension: str) -> str:
+        return os.path.join(self.root, f'{int(competition_id)}_{int(season_id)}.{extension}')
+
+    def _load_manifest(self, competition_id: int, season_id: int) -> dict:
+        path = self._path(competition_id, season_id, 'json')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            # Tabelas gravadas com outro registro de métricas ou outro cálculo são descartadas e refeitas
+            if manifest.get('columns') == SEASON_ROW_COLUMNS and manifest.get('schema') == PLAYER_STATS_SCHEMA:
+                return manifest
+        return {'match_ids': [], 'columns': SEASON_ROW_COLUMNS}
+
+    def version(self, competition_id: int, season_id: int):
+        '''
+        Retorna a versão da tabela gravada da temporada (data de modificação e tamanho do manifesto), que
+        muda a cada atualização, inclusive por outro processo (ex.: sync.py ou prefetch.py).
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            tuple: Versão da tabela ou None se a temporada nunca foi processada
+        '''
+        try:
+            stat = os.stat(self._path(competition_id, season_id, 'json'))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def ingested(self, competition_id: int, season_id: int) -> set:
+        '''
+        Retorna as partidas já incluídas na tabela da temporada.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            set: IDs das partidas processadas
+        '''
+        with self._lock:
+            return set(self._load_manifest(competition_id, season_id)['match_ids'])
+
+    def rows(self, competition_id: int, season_id: int) -> pd.DataFrame:
+        '''
+        Lê as estatísticas por partida gravadas para a temporada.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            pd.DataFrame: Uma linha por jogador e partida (vazio se a temporada não foi processada)
+        '''
+        with self._lock:
+            if not self._load_manifest(competition_id, season_id)['match_ids']:
+                return pd.DataFrame(columns=SEASON_ROW_COLUMNS)
+            return pq.read_table(self._path(competition_id, season_id, 'parquet'),
+                                 memory_map=True).to_pandas()
+
+    def update(self, competition_id: int, season_id: int, match_ids: list = None,
+               workers: int = SEASON_STATS_WORKERS, rebuild: bool = False, refresh: list = None) -> dict:
+        '''
+        Inclui na tabela da temporada as partidas ainda não processadas.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+            match_ids (list): Partidas consideradas (padrão: todas as partidas da temporada)
+            workers (int): Número de partidas processadas ao mesmo tempo
+            rebuild (bool): Descarta a tabela gravada e processa todas as partidas novamente
+            refresh (list): Partidas já processadas cujas linhas são refeitas (ex.: atualizadas na fonte)
+        Returns:
+            dict: Partidas adicionadas, já processadas, com falha, total de jogadores e tempo em segundos
+        '''
+        start = time.perf_counter()
+        if match_ids is None:
+            match_ids = list(data_source.matches(competition_id, season_id))
+        refresh = {int(match_id) for match_id in refresh or []}
+        match_ids = sorted({int(match_id) for match_id in match_ids} | refresh)
+
+        with self._lock:
+            manifest = {'match_ids': [], 'columns': SEASON_ROW_COLUMNS} if rebuild \
+                else self._load_manifest(competition_id, season_id)
+            done = set(manifest['match_ids']) - refresh
+            pending = [match_id for match_id in match_ids if match_id not in done]
+            state = {'competition_id': competition_id, 'season_id': season_id,
+                     'added': [], 'skipped': len(match_ids) - len(pending), 'failed': {}}
+
+            tables = []
+            with tracer.span('season_stats_update', 'transform', competition_id=competition_id,
+                             season_id=season_id, pending=len(pending)):
+                with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                    load_table = propagate_context(read_player_stats_table)
+                    futures = {executor.submit(load_table, match_id): match_id
+                               for match_id in pending}
+                    for future in as_completed(futures):
+                        match_id = futures[future]
+                        try:
+                            table = future.result()
+                        except Exception as e:
+                            state['failed'][str(match_id)] = str(e)
+                            continue
+                        table = table.reset_index()
+                        table.insert(0, 'match_id', match_id)
+                        tables.append(table[SEASON_ROW_COLUMNS])
+                        state['added'].append(match_id)
+
+                if tables or rebuild or refresh:
+                    existing = self.rows(competition_id, season_id)
+                    existing = existing[existing['match_id'].isin(done)]
+                    frames = tables if rebuild or existing.empty else [existing] + tables
+                    rows = pd.concat(frames, ignore_index=True) if frames \
+                        else pd.DataFrame(columns=SEASON_ROW_COLUMNS)
+                    self._write(competition_id, season_id, rows,
+                                sorted(done | set(state['added'])))
+
+            frame_cache.invalidate(('season_stats', int(competition_id), int(season_id)))
+
+        state['added'].sort()
+        state['players'] = len(self.table(competition_id, season_id))
+        state['elapsed_seconds'] = round(time.perf_counter() - start, 2)
+        return state
+
+    def _write(self, competition_id: int, season_id: int, rows: pd.DataFrame, match_ids: list):
+        os.makedirs(self.root, exist_ok=True)
+        rows = rows.sort_values(['match_id', 'player'], kind='stable').reset_index(drop=True)
+        rows['match_id'] = rows['match_id'].astype('int64')
+        rows[PLAYER_STATS_COLUMNS[1:]] = rows[PLAYER_STATS_COLUMNS[1:]].astype('int64')
+
+        path = self._path(competition_id, season_id, 'parquet')
+        tmp_path = f'{path}.tmp'
+        pq.write_table(pa.Table.from_pandas(rows, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+
+        manifest_path = self._path(competition_id, season_id, 'json')
+        tmp_path = f'{manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'match_ids': match_ids, 'columns': SEASON_ROW_COLUMNS, 'schema': PLAYER_STATS_SCHEMA,
+                       'rows': int(len(rows)),
+                       'updated_at': datetime.now(timezone.utc).isoformat()}, f, indent=4)
+        os.replace(tmp_path, manifest_path)
+
+    def table(self, competition_id: int, season_id: int) -> pd.DataFrame:
+        '''
+        Retorna a tabela agregada da temporada, calculada uma única vez por atualização (recalculada quando a
+        versão da tabela gravada muda, inclusive por outro processo). O DataFrame é compartilhado e não deve
+        ser modificado.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+        Returns:
+            pd.DataFrame: Totais e taxas por 90 minutos por jogador (aggregate_season)
+        '''
+        key = ('season_stats', int(competition_id), int(season_id))
+        return frame_cache.get_or_load(key, lambda: self._aggregate(competition_id, season_id),
+                                       version=lambda: self.version(competition_id, season_id))
+
+    def _aggregate(self, competition_id: int, season_id: int) -> pd.DataFrame:
+        with tracer.span('season_stats_aggregate', 'transform', competition_id=competition_id,
+                         season_id=season_id) as span:
+            rows = self.rows(competition_id, season_id)
+            span['rows'] = len(rows)
+            return aggregate_season(rows)
+
+    def player(self, competition_id: int, season_id: int, player: str) -> dict:
+        '''
+        Retorna as estatísticas de temporada de um jogador para o prompt do perfil.
+        Args:
+            competition_id (int): ID da competição
+            season_id (int): ID da temporada
+            player (str): Nome do jogador
+        Returns:
+            dict: season_profile_stats do jogador ou None se a temporada não tiver dados dele
+        '''
+        return season_profile_stats(self.table(competition_id, season_id), player)
+
+
+season_stats = SeasonStats()